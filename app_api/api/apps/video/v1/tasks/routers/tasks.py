@@ -1,12 +1,14 @@
 import uuid
+from typing import Annotated
 
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Body, HTTPException, Query
 from sqlalchemy.exc import NoResultFound
 from starlette import status
 from starlette.responses import Response
 from yt_shared.enums import TaskStatus
 
 from api.apps.video.v1.tasks.schemas.task import (
+    CancelTaskOut,
     CreateTaskIn,
     CreateTaskOut,
     TaskSchema,
@@ -43,6 +45,19 @@ async def create_task(task: CreateTaskIn, pb: RMQDep) -> CreateTaskOut:
         ) from None
 
 
+@router.post('/bulk', status_code=status.HTTP_201_CREATED)
+async def create_tasks(
+    tasks: Annotated[list[CreateTaskIn], Body(min_length=1, max_length=1000)],
+    pb: RMQDep,
+) -> list[CreateTaskOut]:
+    try:
+        return await TaskService.create_tasks_non_db(tasks=tasks, publisher=pb)
+    except TaskServiceError as err:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(err)
+        ) from None
+
+
 @router.get('/stats')
 async def get_stats(db: DBDep) -> TasksStatsSchema:
     return await TaskService(db).get_stats()
@@ -72,8 +87,24 @@ async def get_task(
 @router.delete(
     '/{task_id}', status_code=status.HTTP_204_NO_CONTENT, response_class=Response
 )
-async def delete_task(task_id: uuid.UUID, db: DBDep) -> None:
+async def delete_task(task_id: uuid.UUID, db: DBDep, pb: RMQDep) -> None:
+    try:
+        await TaskService(db).delete_task(id_=task_id, publisher=pb)
+    except NoResultFound:
+        raise TaskNotFoundHTTPError from None
+    except TaskServiceError as err:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(err)
+        ) from None
+
+
+@router.post('/{task_id}/cancel')
+async def cancel_task(task_id: uuid.UUID, db: DBDep, pb: RMQDep) -> CancelTaskOut:
     try:
-        await TaskService(db).delete_task(id_=task_id)
+        return await TaskService(db).cancel_task(id_=task_id, publisher=pb)
     except NoResultFound:
         raise TaskNotFoundHTTPError from None
+    except TaskServiceError as err:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR, detail=str(err)
+        ) from None
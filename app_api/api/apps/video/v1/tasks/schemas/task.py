@@ -27,6 +27,8 @@ class FileSimpleSchema(BaseOrmModel):
     duration: StrictFloat | StrictInt | None
     width: StrictInt | None
     height: StrictInt | None
+    encode_duration: StrictFloat | None
+    encode_speed: StrictFloat | None
     cache: CacheSchema | None = ...
 
 
@@ -46,6 +48,7 @@ class TaskSimpleSchema(BaseOrmModel):
     message_id: StrictInt | None
     yt_dlp_version: StrictStr | None
     error: StrictStr | None
+    parent_id: uuid.UUID | None
     files: list[FileSimpleSchema]
 
 
@@ -59,6 +62,7 @@ class CreateTaskIn(StrictRealBaseModel):
     save_to_storage: bool = ...
     custom_filename: str = ...
     automatic_extension: bool = ...
+    fan_out_playlist: bool = False
 
 
 class CreateTaskOut(StrictRealBaseModel):
@@ -75,3 +79,8 @@ class TasksStatsSchema(BaseOrmModel):
     processing: StrictInt
     failed: StrictInt
     done: StrictInt
+    cancelled: StrictInt
+
+
+class CancelTaskOut(StrictRealBaseModel):
+    cancelled_ids: list[uuid.UUID]
@@ -5,9 +5,11 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from yt_shared.enums import TaskSource, TaskStatus
 from yt_shared.rabbit.publisher import RmqPublisher
 from yt_shared.repositories.task import TaskRepository
+from yt_shared.schemas.control import CancelTaskPayload
 from yt_shared.schemas.media import InbMediaPayload
 
 from api.apps.video.v1.tasks.schemas.task import (
+    CancelTaskOut,
     CreateTaskIn,
     CreateTaskOut,
     TaskSchema,
@@ -26,9 +28,21 @@ class TaskService:
     def _get_schema(include_meta: bool) -> type[TaskSchema | TaskSimpleSchema]:
         return TaskSchema if include_meta else TaskSimpleSchema
 
-    async def delete_task(self, id_: str | uuid.UUID) -> None:
+    async def delete_task(self, id_: str | uuid.UUID, publisher: RmqPublisher) -> None:
+        # Stop running task first, otherwise it keeps occupying the worker slot.
+        await self.cancel_task(id_=id_, publisher=publisher)
         await self._repository.delete_task(id_)
 
+    async def cancel_task(
+        self, id_: str | uuid.UUID, publisher: RmqPublisher
+    ) -> CancelTaskOut:
+        cancelled_ids = await self._repository.cancel_task(id_)
+        if cancelled_ids and not await publisher.send_cancel_task(
+            CancelTaskPayload(task_ids=cancelled_ids)
+        ):
+            raise TaskServiceError('Failed to send task cancellation')
+        return CancelTaskOut(cancelled_ids=cancelled_ids)
+
     async def get_latest_task(
         self, include_meta: bool
     ) -> TaskSchema | TaskSimpleSchema:
@@ -60,15 +74,37 @@ class TaskService:
     async def create_task_non_db(
         task: CreateTaskIn, publisher: RmqPublisher
     ) -> CreateTaskOut:
-        task_id = uuid.uuid4()
-        source = TaskSource.API
-        added_at = datetime.now(UTC)
-        payload = InbMediaPayload(
-            id=task_id,
+        payload = TaskService._create_payload(task)
+        if not await publisher.send_for_download(payload):
+            raise TaskServiceError('Failed to create task')
+        return TaskService._create_task_out(payload)
+
+    @staticmethod
+    async def create_tasks_non_db(
+        tasks: list[CreateTaskIn], publisher: RmqPublisher
+    ) -> list[CreateTaskOut]:
+        payloads = [TaskService._create_payload(task) for task in tasks]
+        results = await publisher.send_many_for_download(payloads)
+        failed_urls = [
+            payload.url
+            for payload, is_sent in zip(payloads, results, strict=True)
+            if not is_sent
+        ]
+        if failed_urls:
+            raise TaskServiceError(
+                f'Failed to create {len(failed_urls)} of {len(tasks)} tasks: '
+                f'{", ".join(failed_urls)}'
+            )
+        return [TaskService._create_task_out(payload) for payload in payloads]
+
+    @staticmethod
+    def _create_payload(task: CreateTaskIn) -> InbMediaPayload:
+        return InbMediaPayload(
+            id=uuid.uuid4(),
             url=task.url,
             original_url=task.url,
-            added_at=added_at,
-            source=source,
+            added_at=datetime.now(UTC),
+            source=TaskSource.API,
             download_media_type=task.download_media_type,
             save_to_storage=task.save_to_storage,
             from_chat_id=None,
@@ -78,10 +114,17 @@ class TaskService:
             ack_message_id=None,
             custom_filename=task.custom_filename,
             automatic_extension=task.automatic_extension,
+            fan_out_playlist=task.fan_out_playlist,
+        )
+
+    @staticmethod
+    def _create_task_out(payload: InbMediaPayload) -> CreateTaskOut:
+        return CreateTaskOut(
+            id=payload.id,
+            url=payload.url,
+            added_at=payload.added_at,
+            source=payload.source,
         )
-        if not await publisher.send_for_download(payload):
-            raise TaskServiceError('Failed to create task')
-        return CreateTaskOut(id=task_id, url=task.url, added_at=added_at, source=source)
 
     async def get_stats(self) -> TasksStatsSchema:
         return TasksStatsSchema.model_validate(await self._repository.get_stats())
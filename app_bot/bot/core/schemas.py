@@ -41,6 +41,7 @@ class UserSchema(_BaseUserSchema):
     use_url_regex_match: bool
     upload: UploadSchema
     save_to_database: bool = True
+    fan_out_playlist: bool = False
 
 
 class ApiSchema(StrictBaseConfigModel):
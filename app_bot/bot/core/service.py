@@ -1,5 +1,6 @@
 import logging
 import re
+import uuid
 from itertools import product
 from urllib.parse import urljoin, urlparse
 
@@ -20,11 +21,16 @@ class UrlService:
         self._rmq_publisher = RmqPublisher()
 
     async def process_urls(self, urls: list[URL]) -> None:
-        for url in urls:
-            await self._send_to_worker(url)
+        payloads = [self._create_payload(url) for url in urls]
+        results = await self._rmq_publisher.send_many_for_download(payloads)
+        for url, is_sent in zip(urls, results, strict=True):
+            if not is_sent:
+                self._log.error('Failed to publish URL %s to message broker', url.url)
 
-    async def _send_to_worker(self, url: URL) -> bool:
-        payload = InbMediaPayload(
+    @staticmethod
+    def _create_payload(url: URL) -> InbMediaPayload:
+        return InbMediaPayload(
+            id=uuid.uuid4(),
             url=url.url,
             original_url=url.original_url,
             message_id=url.message_id,
@@ -37,11 +43,9 @@ class UrlService:
             download_media_type=url.download_media_type,
             custom_filename=None,
             automatic_extension=False,
+            max_file_size=url.max_file_size,
+            fan_out_playlist=url.fan_out_playlist,
         )
-        is_sent = await self._rmq_publisher.send_for_download(payload)
-        if not is_sent:
-            self._log.error('Failed to publish URL %s to message broker', url.url)
-        return is_sent
 
 
 class UrlParser:
@@ -76,10 +80,19 @@ class UrlParser:
                 ack_message_id=ack_message.id,
                 save_to_storage=user.save_to_storage,
                 download_media_type=user.download_media_type,
+                max_file_size=self._get_max_file_size(user),
+                fan_out_playlist=user.fan_out_playlist,
             )
             for orig_url, url in self._preprocess_urls(urls).items()
         ]
 
+    @staticmethod
+    def _get_max_file_size(user: UserSchema) -> int | None:
+        """Limit media size only when it's downloaded just to be uploaded."""
+        if user.upload.upload_video_file and not user.save_to_storage:
+            return user.upload.upload_video_max_file_size
+        return None
+
     def filter_urls(self, urls: list[str], regexes: list[str]) -> list[str]:
         """Return valid urls."""
         self._log.debug('Matching urls: %s against regexes %s', urls, regexes)
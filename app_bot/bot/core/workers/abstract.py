@@ -1,15 +1,19 @@
 """RabbitMQ Queue abstract worker module."""
 
 from abc import abstractmethod
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, ClassVar
 
 from aio_pika import IncomingMessage
-from pydantic import BaseModel
+from pydantic import TypeAdapter, ValidationError
+from yt_shared.enums import RabbitPayloadType
 from yt_shared.rabbit import get_rabbitmq
+from yt_shared.rabbit.codec import BodyDecodeError, decode_body
+from yt_shared.schemas.base_rabbit import BaseRabbitDownloadPayload
 from yt_shared.utils.tasks.abstract import AbstractTask
 
 from bot.core.config.config import get_main_config
 from bot.core.exceptions import InvalidBodyError
+from bot.core.handlers.abstract import AbstractDownloadHandler
 from bot.core.workers.enums import RabbitWorkerType
 
 if TYPE_CHECKING:
@@ -19,7 +23,9 @@ if TYPE_CHECKING:
 class AbstractDownloadResultWorker(AbstractTask):
     TYPE: RabbitWorkerType | None = None
     QUEUE_TYPE: str | None = None
-    SCHEMA_CLS: tuple[type[BaseModel]] = ()
+    # Decoder of the discriminated union of the payloads consumed from the queue.
+    PAYLOAD_ADAPTER: ClassVar[TypeAdapter]
+    HANDLERS: ClassVar[dict[RabbitPayloadType, type[AbstractDownloadHandler]]] = {}
 
     def __init__(self, bot: 'VideoBotClient') -> None:
         super().__init__()
@@ -32,9 +38,14 @@ class AbstractDownloadResultWorker(AbstractTask):
         await self._watch_queue()
 
     @abstractmethod
-    async def _process_body(self, body: BaseModel) -> bool:
+    async def _process_body(self, body: BaseRabbitDownloadPayload) -> None:
         pass
 
+    def _create_handler(
+        self, body: BaseRabbitDownloadPayload
+    ) -> AbstractDownloadHandler:
+        return self.HANDLERS[body.type](body=body, bot=self._bot)
+
     async def _watch_queue(self) -> None:
         message: IncomingMessage
         async with self._queue.iterator() as queue_iter:
@@ -52,18 +63,22 @@ class AbstractDownloadResultWorker(AbstractTask):
         await self._process_body(body)
         await message.ack()
 
-    async def _deserialize_message(self, message: IncomingMessage) -> BaseModel:
-        # TODO: Use discriminator.
-        for schema_cls in self.SCHEMA_CLS:
-            try:
-                return schema_cls.model_validate_json(message.body)
-            except Exception:  # noqa: S110
-                # TODO: Use pydantic discriminator.
-                # Skip unmatched schema class that failed to parse the body.
-                pass
-        self._log.error('Failed to decode message body')
-        await self._reject_invalid_body(message)
-        raise InvalidBodyError
+    async def _deserialize_message(
+        self, message: IncomingMessage
+    ) -> BaseRabbitDownloadPayload:
+        # Messages of unexpected type are dropped without parsing the body.
+        if message.type and message.type not in self.HANDLERS:
+            self._log.error('Unexpected message type "%s"', message.type)
+            await self._reject_invalid_body(message)
+            raise InvalidBodyError
+
+        try:
+            body = decode_body(message.body, message.content_encoding)
+            return self.PAYLOAD_ADAPTER.validate_json(body)
+        except (BodyDecodeError, ValidationError):
+            self._log.exception('Failed to decode message body')
+            await self._reject_invalid_body(message)
+            raise InvalidBodyError from None
 
     async def _reject_invalid_body(self, message: IncomingMessage) -> None:
         body = message.body
@@ -1,6 +1,11 @@
+from typing import Annotated, ClassVar
+
+from pydantic import Field, TypeAdapter
+from yt_shared.enums import RabbitPayloadType
 from yt_shared.rabbit.rabbit_config import ERROR_QUEUE
 from yt_shared.schemas.error import ErrorDownloadGeneralPayload, ErrorDownloadPayload
 
+from bot.core.handlers.abstract import AbstractDownloadHandler
 from bot.core.handlers.error import ErrorDownloadHandler
 from bot.core.workers.abstract import AbstractDownloadResultWorker, RabbitWorkerType
 
@@ -8,10 +13,18 @@ from bot.core.workers.abstract import AbstractDownloadResultWorker, RabbitWorker
 class ErrorDownloadResultWorker(AbstractDownloadResultWorker):
     TYPE = RabbitWorkerType.ERROR
     QUEUE_TYPE = ERROR_QUEUE
-    SCHEMA_CLS = (ErrorDownloadPayload, ErrorDownloadGeneralPayload)
-    HANDLER_CLS = ErrorDownloadHandler
+    PAYLOAD_ADAPTER = TypeAdapter(
+        Annotated[
+            ErrorDownloadPayload | ErrorDownloadGeneralPayload,
+            Field(discriminator='type'),
+        ]
+    )
+    HANDLERS: ClassVar[dict[RabbitPayloadType, type[AbstractDownloadHandler]]] = {
+        RabbitPayloadType.DOWNLOAD_ERROR: ErrorDownloadHandler,
+        RabbitPayloadType.GENERAL_ERROR: ErrorDownloadHandler,
+    }
 
     async def _process_body(
         self, body: ErrorDownloadPayload | ErrorDownloadGeneralPayload
     ) -> None:
-        await self.HANDLER_CLS(body=body, bot=self._bot).handle()
+        await self._create_handler(body).handle()
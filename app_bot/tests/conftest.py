@@ -0,0 +1,41 @@
+import importlib
+import os
+from pathlib import Path
+from typing import IO
+from unittest import mock
+
+from dotenv import dotenv_values
+
+_ROOT_PATH = Path(__file__).parents[2]
+_CONFIG_PATH = _ROOT_PATH / 'app_bot' / 'config.yml'
+_EXAMPLE_CONFIG_PATH = _ROOT_PATH / 'app_bot' / 'config-example.yml'
+
+for _key, _value in dotenv_values(_ROOT_PATH / 'envs' / 'bot.env').items():
+    os.environ.setdefault(_key, _value)
+
+
+def _import_config_module() -> None:
+    """Import bot config, which is loaded at import, from the example config.
+
+    The local `config.yml` holds real credentials and may be missing, so reads of
+    it are redirected to the example config for the duration of the import.
+    """
+    path_open, path_is_file = Path.open, Path.is_file
+
+    def redirect(path: Path) -> Path:
+        return _EXAMPLE_CONFIG_PATH if path == _CONFIG_PATH else path
+
+    def open_(path: Path, *args, **kwargs) -> IO:
+        return path_open(redirect(path), *args, **kwargs)
+
+    def is_file(path: Path) -> bool:
+        return path_is_file(redirect(path))
+
+    with (
+        mock.patch.object(Path, 'open', open_),
+        mock.patch.object(Path, 'is_file', is_file),
+    ):
+        importlib.import_module('bot.core.config.config')
+
+
+_import_config_module()
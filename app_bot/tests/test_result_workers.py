@@ -0,0 +1,126 @@
+import asyncio
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from pydantic import ValidationError
+from yt_shared.config import settings
+from yt_shared.enums import DownMediaType, RabbitPayloadType, TaskSource
+from yt_shared.rabbit.codec import encode_body
+from yt_shared.schemas.error import ErrorDownloadGeneralPayload, ErrorDownloadPayload
+from yt_shared.schemas.media import InbMediaPayload
+
+from bot.core.exceptions import InvalidBodyError
+from bot.core.workers import abstract
+from bot.core.workers.error import ErrorDownloadResultWorker
+
+_ADAPTER = ErrorDownloadResultWorker.PAYLOAD_ADAPTER
+
+
+def make_error_payload(
+    payload_cls: type[ErrorDownloadGeneralPayload],
+) -> ErrorDownloadGeneralPayload:
+    context = InbMediaPayload(
+        from_chat_id=1,
+        from_chat_type=None,
+        from_user_id=1,
+        message_id=1,
+        ack_message_id=2,
+        url='https://example.com/video',
+        original_url='https://example.com/video',
+        source=TaskSource.BOT,
+        save_to_storage=False,
+        download_media_type=DownMediaType.VIDEO,
+        custom_filename=None,
+        automatic_extension=False,
+    )
+    return payload_cls(
+        task_id=uuid.uuid4(),
+        message='Download error',
+        url=context.url,
+        exception_msg='Unsupported URL',
+        exception_type='DownloadError',
+        yt_dlp_version='2025.01.01',
+        context=context,
+        from_chat_id=1,
+        from_chat_type=None,
+        from_user_id=1,
+        message_id=1,
+    )
+
+
+@pytest.fixture
+def worker(monkeypatch: pytest.MonkeyPatch) -> ErrorDownloadResultWorker:
+    """Return worker without the bot, config and RabbitMQ connection."""
+    rabbit_mq = SimpleNamespace(queues={ErrorDownloadResultWorker.QUEUE_TYPE: None})
+    monkeypatch.setattr(abstract, 'get_rabbitmq', lambda: rabbit_mq)
+    monkeypatch.setattr(abstract, 'get_main_config', lambda: None)
+    return ErrorDownloadResultWorker(bot=None)
+
+
+def make_message(
+    body: bytes, type_: str | None = None, content_encoding: str | None = None
+) -> SimpleNamespace:
+    return SimpleNamespace(
+        body=body, type=type_, content_encoding=content_encoding, reject=AsyncMock()
+    )
+
+
+@pytest.mark.parametrize(
+    'payload_cls', [ErrorDownloadPayload, ErrorDownloadGeneralPayload]
+)
+def test_adapter_decodes_payload_by_type(
+    payload_cls: type[ErrorDownloadGeneralPayload],
+) -> None:
+    payload = make_error_payload(payload_cls)
+
+    decoded = _ADAPTER.validate_json(payload.model_dump_json())
+
+    assert type(decoded) is payload_cls
+    assert decoded == payload
+
+
+def test_adapter_rejects_unknown_type() -> None:
+    body = make_error_payload(ErrorDownloadPayload).model_dump(mode='json')
+    body['type'] = RabbitPayloadType.SUCCESS.value
+
+    with pytest.raises(ValidationError):
+        _ADAPTER.validate_python(body)
+
+
+def test_compressed_message_is_decoded(
+    worker: ErrorDownloadResultWorker, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(settings, 'RABBITMQ_COMPRESSION_ENABLED', True)
+    monkeypatch.setattr(settings, 'RABBITMQ_COMPRESSION_MIN_SIZE', 1)
+    payload = make_error_payload(ErrorDownloadGeneralPayload)
+    body, content_encoding = encode_body(payload.model_dump_json().encode())
+    message = make_message(body, payload.type.value, content_encoding)
+
+    decoded = asyncio.run(worker._deserialize_message(message))
+
+    assert decoded == payload
+    message.reject.assert_not_awaited()
+
+
+@pytest.mark.parametrize(
+    'message',
+    [
+        pytest.param(
+            make_message(b'not json', type_=RabbitPayloadType.SUCCESS.value),
+            id='unexpected-type',
+        ),
+        pytest.param(make_message(b'not json'), id='invalid-body'),
+        pytest.param(
+            make_message(b'not zstd', content_encoding='zstd'), id='invalid-encoding'
+        ),
+    ],
+)
+def test_invalid_message_is_rejected(
+    worker: ErrorDownloadResultWorker, message: SimpleNamespace
+) -> None:
+    with pytest.raises(InvalidBodyError):
+        asyncio.run(worker._deserialize_message(message))
+
+    message.reject.assert_awaited_once_with(requeue=False)
@@ -0,0 +1,35 @@
+"""empty message.
+
+Revision ID: 3ab589c8b919
+Revises: cafd11b20758
+Create Date: 2026-10-18 15:02:41.907163
+
+"""
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '3ab589c8b919'
+down_revision = 'cafd11b20758'
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.execute("ALTER TYPE taskstatus ADD VALUE IF NOT EXISTS 'CANCELLED'")
+
+
+def downgrade() -> None:
+    # Postgres can't drop enum values, recreate the type without it.
+    op.execute("UPDATE task SET status = 'FAILED' WHERE status = 'CANCELLED'")
+    op.execute('ALTER TABLE task ALTER COLUMN status DROP DEFAULT')
+    op.execute('ALTER TYPE taskstatus RENAME TO taskstatus_old')
+    op.execute(
+        "CREATE TYPE taskstatus AS ENUM ('PENDING', 'PROCESSING', 'FAILED', 'DONE')"
+    )
+    op.execute(
+        'ALTER TABLE task ALTER COLUMN status TYPE taskstatus '
+        'USING status::text::taskstatus'
+    )
+    op.execute("ALTER TABLE task ALTER COLUMN status SET DEFAULT 'PENDING'")
+    op.execute('DROP TYPE taskstatus_old')
@@ -0,0 +1,94 @@
+"""Benchmark in-process MP4/WebM header parsing against ffprobe.
+
+Probes every file of the fixture corpus directory with both, reports timings
+and whether the in-process result matches ffprobe for the fields used by the
+worker. Files the parser doesn't support are reported as fallbacks.
+
+Run inside the worker container:
+
+    python -m benchmarks.media_probe /path/to/corpus
+"""
+
+import json
+import subprocess
+import sys
+import timeit
+from pathlib import Path
+
+from worker.core.media_probe import probe_media
+
+_NUMBER = 20
+_FFPROBE_CMD = (
+    'ffprobe',
+    '-loglevel',
+    'error',
+    '-show_format',
+    '-show_streams',
+    '-of',
+    'json',
+)
+_STREAM_FIELDS = ('codec_type', 'codec_name', 'width', 'height')
+_DURATION_TOLERANCE = 0.1
+
+
+def _ffprobe(path: Path) -> dict:
+    proc = subprocess.run(  # noqa: S603
+        [*_FFPROBE_CMD, str(path)], capture_output=True, check=True
+    )
+    return json.loads(proc.stdout)
+
+
+def _summarize(context: dict) -> tuple[float, list[tuple]]:
+    streams = [
+        tuple(stream.get(field) for field in _STREAM_FIELDS)
+        for stream in context['streams']
+        if stream['codec_type'] in ('video', 'audio')
+    ]
+    return float(context['format']['duration']), streams
+
+
+def _is_matching(context: dict, ffprobe_context: dict) -> bool:
+    duration, streams = _summarize(context)
+    ffprobe_duration, ffprobe_streams = _summarize(ffprobe_context)
+    return (
+        abs(duration - ffprobe_duration) <= _DURATION_TOLERANCE
+        and streams == ffprobe_streams
+    )
+
+
+def main() -> None:
+    corpus = sorted(path for path in Path(sys.argv[1]).iterdir() if path.is_file())
+    print(f'{"file":<40}{"ffprobe, ms":>14}{"parser, ms":>14}{"result":>12}')  # noqa: T201
+    total_ffprobe = total_parser = 0.0
+    for path in corpus:
+        ffprobe_time = timeit.timeit(
+            lambda: _ffprobe(path),  # noqa: B023
+            number=_NUMBER,
+        )
+        parser_time = timeit.timeit(
+            lambda: probe_media(path),  # noqa: B023
+            number=_NUMBER,
+        )
+        total_ffprobe += ffprobe_time
+        total_parser += parser_time
+
+        context = probe_media(path)
+        if not context:
+            result = 'fallback'
+        elif _is_matching(context, _ffprobe(path)):
+            result = 'match'
+        else:
+            result = 'MISMATCH'
+        print(  # noqa: T201
+            f'{path.name[:39]:<40}{ffprobe_time / _NUMBER * 1000:>14.3f}'
+            f'{parser_time / _NUMBER * 1000:>14.3f}{result:>12}'
+        )
+    if corpus:
+        print(  # noqa: T201
+            f'{"mean":<40}{total_ffprobe / _NUMBER / len(corpus) * 1000:>14.3f}'
+            f'{total_parser / _NUMBER / len(corpus) * 1000:>14.3f}'
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""Benchmark of success message size and parsing with and without yt-dlp meta.
+
+Builds a success payload with a YouTube-like info dict (60 formats, 40
+thumbnails, 150 caption languages) and compares the message the worker used to
+publish, with `meta` included, to the current one without it. Parsing is timed
+with `SuccessDownloadPayload.model_validate_json` as done by the bot.
+
+Run inside the worker container:
+
+    python -m benchmarks.success_payload
+"""
+
+import random
+import string
+import tempfile
+import timeit
+import uuid
+from pathlib import Path
+
+from yt_shared.enums import DownMediaType, TaskSource
+from yt_shared.schemas.media import DownMedia, InbMediaPayload, Video
+from yt_shared.schemas.success import SuccessDownloadPayload
+
+_NUMBER = 200
+_SEED = 42
+_FORMATS_NUM = 60
+_THUMBNAILS_NUM = 40
+_CAPTION_LANGS_NUM = 150
+_CAPTION_EXTS = ('json3', 'srv1', 'srv2', 'srv3', 'ttml', 'vtt')
+
+
+def _make_url(rnd: random.Random, length: int) -> str:
+    query = ''.join(rnd.choices(string.ascii_letters, k=length))
+    return f'https://rr1.googlevideo.com/videoplayback?{query}'
+
+
+def _make_meta() -> dict:
+    """Return info dict shaped like the one yt-dlp extracts for YouTube."""
+    rnd = random.Random(_SEED)  # noqa: S311
+    return {
+        'id': 'dQw4w9WgXcQ',
+        'title': 'x' * 80,
+        'description': 'd' * 3000,
+        'tags': ['tag'] * 30,
+        'formats': [
+            {
+                'format_id': str(index),
+                'format_note': '720p',
+                'url': _make_url(rnd, 1200),
+                'protocol': 'https',
+                'ext': 'mp4',
+                'width': 1280,
+                'height': 720,
+                'tbr': 1000.5,
+                'vcodec': 'avc1.64001F',
+                'acodec': 'none',
+                'filesize': 123456789,
+                'http_headers': {
+                    'User-Agent': f'Mozilla/5.0 {"x" * 100}',
+                    'Accept': '*/*',
+                    'Accept-Language': 'en-us',
+                },
+                'downloader_options': {'http_chunk_size': 10485760},
+            }
+            for index in range(_FORMATS_NUM)
+        ],
+        'thumbnails': [
+            {
+                'id': str(index),
+                'url': _make_url(rnd, 120),
+                'preference': -index,
+                'width': 320,
+                'height': 180,
+            }
+            for index in range(_THUMBNAILS_NUM)
+        ],
+        'automatic_captions': {
+            f'lang{index}': [
+                {'ext': ext, 'url': _make_url(rnd, 600), 'name': 'Language'}
+                for ext in _CAPTION_EXTS
+            ]
+            for index in range(_CAPTION_LANGS_NUM)
+        },
+    }
+
+
+def _make_payload(root_path: Path) -> SuccessDownloadPayload:
+    context = InbMediaPayload(
+        from_chat_id=1,
+        from_chat_type=None,
+        from_user_id=1,
+        message_id=1,
+        ack_message_id=2,
+        url='https://youtu.be/dQw4w9WgXcQ',
+        original_url='https://youtu.be/dQw4w9WgXcQ',
+        source=TaskSource.BOT,
+        save_to_storage=False,
+        download_media_type=DownMediaType.VIDEO,
+        custom_filename=None,
+        automatic_extension=False,
+    )
+    video = Video(
+        title='Video',
+        original_filename='video.mp4',
+        directory_path=root_path,
+        file_size=1,
+        duration=1.0,
+        width=1280,
+        height=720,
+    )
+    media = DownMedia(
+        audio=None,
+        video=video,
+        media_type=DownMediaType.VIDEO,
+        root_path=root_path,
+        meta=_make_meta(),
+    )
+    return SuccessDownloadPayload(
+        task_id=uuid.uuid4(),
+        media=media,
+        message_id=1,
+        from_chat_id=1,
+        from_chat_type=None,
+        from_user_id=1,
+        context=context,
+        yt_dlp_version='2025.01.01',
+    )
+
+
+def main() -> None:
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        payload = _make_payload(Path(tmp_dir))
+        bodies = {
+            'with meta': payload.model_dump_json().encode(),
+            'without meta': payload.model_dump_json(
+                exclude={'media': {'meta'}}
+            ).encode(),
+        }
+        print(f'{"message":<14}{"size, bytes":>14}{"parse, ms":>12}')  # noqa: T201
+        for name, body in bodies.items():
+            duration = timeit.timeit(
+                lambda: SuccessDownloadPayload.model_validate_json(body),  # noqa: B023
+                number=_NUMBER,
+            )
+            print(  # noqa: T201
+                f'{name:<14}{len(body):>14}{duration / _NUMBER * 1000:>12.3f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
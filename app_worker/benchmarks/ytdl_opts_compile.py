@@ -0,0 +1,64 @@
+"""Microbenchmark of per-task yt-dlp options building.
+
+Compares the previous approach (converting CLI options with `yt_dlp.parse_options`
+on every task) with the precompiled options from `YtdlOptsCompiler`.
+
+Run inside the worker container:
+
+    python -m benchmarks.ytdl_opts_compile
+"""
+
+import timeit
+from pathlib import Path
+
+import yt_dlp
+from yt_shared.enums import DownMediaType
+
+from ytdl_opts.per_host._compiler import YtdlOptsCompiler
+from ytdl_opts.per_host._registry import HostConfRegistry
+
+_NUMBER = 50
+_TMP_DIR = Path('/tmp/benchmark')  # noqa: S108
+
+
+def _build_per_task(host_cls: type, media_type: DownMediaType) -> dict:
+    """Previous per-task behaviour: parse defaults and options on every call."""
+    opts = host_cls.build_cli_opts(media_type)
+    default = yt_dlp.parse_options([]).ydl_opts
+    diff = {
+        k: v for k, v in yt_dlp.parse_options(opts).ydl_opts.items() if default[k] != v
+    }
+    if 'postprocessors' in diff:
+        diff['postprocessors'] = [
+            pp for pp in diff['postprocessors'] if pp not in default['postprocessors']
+        ]
+    diff['outtmpl']['default'] = str(_TMP_DIR / diff['outtmpl']['default'])
+    return diff
+
+
+def main() -> None:
+    host_classes = HostConfRegistry.get_registry().values()
+    YtdlOptsCompiler.compile_all(host_classes)
+    print(f'{"host config":<16}{"media type":<14}{"before, ms":>12}{"after, ms":>12}')  # noqa: T201
+    for host_cls in host_classes:
+        for media_type in DownMediaType:
+            before = timeit.timeit(
+                lambda: _build_per_task(host_cls, media_type),  # noqa: B023
+                number=_NUMBER,
+            )
+            after = timeit.timeit(
+                lambda: YtdlOptsCompiler.get_ytdl_opts(
+                    host_cls,  # noqa: B023
+                    media_type,  # noqa: B023
+                    _TMP_DIR,
+                ),
+                number=_NUMBER,
+            )
+            print(  # noqa: T201
+                f'{host_cls.__name__:<16}{media_type.value:<14}'
+                f'{before / _NUMBER * 1000:>12.3f}{after / _NUMBER * 1000:>12.3f}'
+            )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,14 @@
+import os
+from pathlib import Path
+
+from dotenv import dotenv_values
+
+_ENVS_PATH = Path(__file__).parents[2] / 'envs'
+
+for _key, _value in dotenv_values(_ENVS_PATH / 'worker.env').items():
+    os.environ.setdefault(_key, _value)
+_TMP_PATH = Path(os.environ['TMP_DOWNLOAD_ROOT_PATH']).parent
+os.environ.update(
+    MEDIA_CACHE_PATH=str(_TMP_PATH / 'media_cache'),
+    STORAGE_PATH=str(_TMP_PATH),
+)
@@ -0,0 +1,228 @@
+import asyncio
+import uuid
+from collections.abc import AsyncIterator
+from pathlib import Path
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+from aio_pika import Message
+from pamqp.commands import Basic
+from sqlalchemy import exc as sa_exc
+from yt_shared.config import settings as shared_settings
+from yt_shared.enums import DownMediaType, TaskSource, TaskStatus
+from yt_shared.models import Task
+from yt_shared.rabbit.publisher import RmqPublisher
+from yt_shared.rabbit.rabbit_config import (
+    DEAD_LETTER_EXCHANGE,
+    DEAD_LETTER_QUEUE,
+    ERROR_EXCHANGE,
+    RETRY_COUNT_HEADER,
+    RETRY_EXCHANGE,
+    SUCCESS_EXCHANGE,
+    get_retry_queue,
+)
+from yt_shared.schemas.media import DownMedia, InbMediaPayload, Video
+from yt_shared.schemas.success import SuccessDownloadPayload
+
+from worker.core import payload_handler
+from worker.core.callbacks import RMQCallbacks
+from worker.core.exceptions import FinishedVideoServiceError, TransientProcessingError
+from worker.core.payload_handler import InboundPayloadHandler
+from worker.core.result_store import result_store
+
+_MAX_RETRIES = 2
+
+
+class FakeExchange:
+    def __init__(self, name: str, published: list) -> None:
+        self._name = name
+        self._published = published
+        self.is_confirming = True
+
+    async def publish(self, message: Message, routing_key: str, **_) -> object:
+        self._published.append((self._name, routing_key, message))
+        return Basic.Ack() if self.is_confirming else Basic.Nack()
+
+
+class FakeRabbitMQ:
+    """Record messages published through `RmqPublisher`."""
+
+    def __init__(self) -> None:
+        self.published: list[tuple[str, str, Message]] = []
+        self.exchanges: dict[str, FakeExchange] = {}
+
+    def get_publish_exchange(self, name: str) -> FakeExchange:
+        return self.exchanges.setdefault(name, FakeExchange(name, self.published))
+
+    def get_routes(self) -> list[tuple[str, str]]:
+        return [(exchange, key) for exchange, key, _ in self.published]
+
+
+@pytest.fixture
+def rabbit_mq(monkeypatch: pytest.MonkeyPatch) -> FakeRabbitMQ:
+    rabbit_mq = FakeRabbitMQ()
+    # Publisher is a singleton shared by the callbacks and the payload handler.
+    monkeypatch.setattr(RmqPublisher(), '_rabbit_mq', rabbit_mq)
+    monkeypatch.setattr(shared_settings, 'CONSUMER_NUMBER_OF_RETRY', _MAX_RETRIES)
+    return rabbit_mq
+
+
+def make_payload() -> InbMediaPayload:
+    return InbMediaPayload(
+        from_chat_id=1,
+        from_chat_type=None,
+        from_user_id=1,
+        message_id=1,
+        ack_message_id=2,
+        url='https://example.com/video',
+        original_url='https://example.com/video',
+        source=TaskSource.BOT,
+        save_to_storage=False,
+        download_media_type=DownMediaType.VIDEO,
+        custom_filename=None,
+        automatic_extension=False,
+    )
+
+
+def make_message(body: bytes, retry_count: int | None = None) -> SimpleNamespace:
+    headers = {} if retry_count is None else {RETRY_COUNT_HEADER: retry_count}
+    return SimpleNamespace(
+        body=body,
+        content_encoding=None,
+        headers=headers,
+        processed=False,
+        ack=AsyncMock(),
+        reject=AsyncMock(),
+    )
+
+
+def make_callbacks(handle: AsyncMock) -> RMQCallbacks:
+    callbacks = RMQCallbacks()
+    callbacks._payload_handler = SimpleNamespace(handle=handle)
+    return callbacks
+
+
+@pytest.mark.parametrize('retry_count', [None, 1])
+def test_transient_error_is_retried(
+    rabbit_mq: FakeRabbitMQ, retry_count: int | None
+) -> None:
+    handle = AsyncMock(side_effect=TransientProcessingError)
+    body = make_payload().model_dump_json().encode()
+    message = make_message(body, retry_count)
+
+    asyncio.run(make_callbacks(handle).on_input_message(message))
+
+    next_retry_count = (retry_count or 0) + 1
+    assert handle.await_args.kwargs['is_last_attempt'] is False
+    assert rabbit_mq.get_routes() == [
+        (RETRY_EXCHANGE, get_retry_queue(next_retry_count))
+    ]
+    retry_message = rabbit_mq.published[0][2]
+    assert retry_message.body == body
+    assert retry_message.headers[RETRY_COUNT_HEADER] == next_retry_count
+    message.ack.assert_awaited_once()
+    message.reject.assert_not_awaited()
+
+
+def test_exhausted_retries_are_dead_lettered(rabbit_mq: FakeRabbitMQ) -> None:
+    handle = AsyncMock(side_effect=TransientProcessingError)
+    body = make_payload().model_dump_json().encode()
+    message = make_message(body, retry_count=_MAX_RETRIES)
+
+    asyncio.run(make_callbacks(handle).on_input_message(message))
+
+    assert handle.await_args.kwargs['is_last_attempt'] is True
+    assert rabbit_mq.get_routes() == [(DEAD_LETTER_EXCHANGE, DEAD_LETTER_QUEUE)]
+    assert rabbit_mq.published[0][2].body == body
+    message.ack.assert_awaited_once()
+
+
+def test_unconfirmed_retry_is_dead_lettered(rabbit_mq: FakeRabbitMQ) -> None:
+    rabbit_mq.get_publish_exchange(RETRY_EXCHANGE).is_confirming = False
+    handle = AsyncMock(side_effect=TransientProcessingError)
+    message = make_message(make_payload().model_dump_json().encode())
+
+    asyncio.run(make_callbacks(handle).on_input_message(message))
+
+    assert rabbit_mq.get_routes() == [
+        (RETRY_EXCHANGE, get_retry_queue(1)),
+        (DEAD_LETTER_EXCHANGE, DEAD_LETTER_QUEUE),
+    ]
+    message.ack.assert_awaited_once()
+
+
+@pytest.mark.parametrize(
+    ('is_last_attempt', 'expected_exchanges'), [(False, []), (True, [ERROR_EXCHANGE])]
+)
+def test_transient_failure_is_reported_on_last_attempt(
+    rabbit_mq: FakeRabbitMQ,
+    monkeypatch: pytest.MonkeyPatch,
+    is_last_attempt: bool,
+    expected_exchanges: list[str],
+) -> None:
+    handler = InboundPayloadHandler()
+    error = sa_exc.OperationalError('SELECT 1', {}, ConnectionRefusedError())
+    monkeypatch.setattr(handler, '_handle', AsyncMock(side_effect=error))
+
+    with pytest.raises(TransientProcessingError):
+        asyncio.run(handler.handle(make_payload(), is_last_attempt=is_last_attempt))
+
+    assert [exchange for exchange, _ in rabbit_mq.get_routes()] == expected_exchanges
+
+
+async def fake_get_db() -> AsyncIterator[None]:
+    yield None
+
+
+def make_success_payload(task: Task, root_path: Path) -> SuccessDownloadPayload:
+    root_path.mkdir()
+    (root_path / 'video.mp4').write_bytes(b'video')
+    video = Video(
+        title='video',
+        original_filename='video.mp4',
+        directory_path=root_path,
+        file_size=len(b'video'),
+    )
+    media = DownMedia(
+        audio=None, video=video, media_type=DownMediaType.VIDEO, root_path=root_path
+    )
+    return SuccessDownloadPayload(
+        task_id=task.id,
+        media=media,
+        message_id=task.message_id,
+        from_chat_id=1,
+        from_chat_type=None,
+        from_user_id=1,
+        context=make_payload(),
+        yt_dlp_version=None,
+    )
+
+
+def test_redelivered_done_task_republishes_stored_result(
+    rabbit_mq: FakeRabbitMQ, monkeypatch: pytest.MonkeyPatch, tmp_path: Path
+) -> None:
+    task = Task(id=uuid.uuid4(), status=TaskStatus.DONE, message_id=1)
+    success_payload = make_success_payload(task, tmp_path / 'media')
+    result_store.save(success_payload)
+
+    class FinishedMediaService:
+        def __init__(self, **_) -> None:
+            pass
+
+        async def process(self) -> None:
+            raise FinishedVideoServiceError(message='Task is done', task=task)
+
+    monkeypatch.setattr(payload_handler, 'get_db', fake_get_db)
+    monkeypatch.setattr(payload_handler, 'MediaService', FinishedMediaService)
+
+    asyncio.run(InboundPayloadHandler().handle(make_payload()))
+    # Result isn't published twice once the broker confirmed it.
+    asyncio.run(InboundPayloadHandler().handle(make_payload()))
+
+    assert [exchange for exchange, _ in rabbit_mq.get_routes()] == [SUCCESS_EXCHANGE]
+    published = SuccessDownloadPayload.model_validate_json(
+        rabbit_mq.published[0][2].body
+    )
+    assert published == success_payload
+    assert result_store.load(task.id) is None
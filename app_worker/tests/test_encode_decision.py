@@ -0,0 +1,108 @@
+from pathlib import Path
+
+import pytest
+from yt_shared.enums import EncodeDecision
+
+from worker.core import encode_decision
+from worker.core.encode_decision import EncodeDecisionEngine
+
+_MP4_FORMAT_NAME = 'mov,mp4,m4a,3gp,3g2,mj2'
+_MATROSKA_FORMAT_NAME = 'matroska,webm'
+
+H264 = {'codec_type': 'video', 'codec_name': 'h264', 'pix_fmt': 'yuv420p'}
+H264_10BIT = {'codec_type': 'video', 'codec_name': 'h264', 'pix_fmt': 'yuv420p10le'}
+VP9 = {'codec_type': 'video', 'codec_name': 'vp9', 'pix_fmt': 'yuv420p'}
+COVER_ART = {
+    'codec_type': 'video',
+    'codec_name': 'mjpeg',
+    'pix_fmt': 'yuvj444p',
+    'disposition': {'attached_pic': 1},
+}
+AAC = {'codec_type': 'audio', 'codec_name': 'aac'}
+OPUS = {'codec_type': 'audio', 'codec_name': 'opus'}
+
+
+def make_probe_ctx(format_name: str, *streams: dict) -> dict:
+    return {'streams': list(streams), 'format': {'format_name': format_name}}
+
+
+@pytest.mark.parametrize(
+    ('filename', 'probe_ctx', 'faststart', 'expected'),
+    [
+        (
+            'video.webm',
+            make_probe_ctx(_MATROSKA_FORMAT_NAME, VP9, OPUS),
+            None,
+            EncodeDecision.FULL_ENCODE,
+        ),
+        (
+            'video.mp4',
+            make_probe_ctx(_MP4_FORMAT_NAME, H264_10BIT, AAC),
+            True,
+            EncodeDecision.FULL_ENCODE,
+        ),
+        (
+            'audio.mp4',
+            make_probe_ctx(_MP4_FORMAT_NAME, COVER_ART, AAC),
+            True,
+            EncodeDecision.FULL_ENCODE,
+        ),
+        (
+            'video.mp4',
+            make_probe_ctx(_MP4_FORMAT_NAME, H264, OPUS),
+            True,
+            EncodeDecision.TRANSCODE_AUDIO,
+        ),
+        (
+            'video.mkv',
+            make_probe_ctx(_MATROSKA_FORMAT_NAME, H264, AAC),
+            None,
+            EncodeDecision.REMUX,
+        ),
+        (
+            'video.mov',
+            make_probe_ctx(_MP4_FORMAT_NAME, H264, AAC),
+            True,
+            EncodeDecision.REMUX,
+        ),
+        (
+            'video.mp4',
+            make_probe_ctx(_MP4_FORMAT_NAME, H264, AAC),
+            False,
+            EncodeDecision.REMUX,
+        ),
+        (
+            'video.mp4',
+            make_probe_ctx(_MP4_FORMAT_NAME, H264, AAC, COVER_ART),
+            True,
+            EncodeDecision.NOOP,
+        ),
+        (
+            'video.mp4',
+            make_probe_ctx(_MP4_FORMAT_NAME, H264),
+            True,
+            EncodeDecision.NOOP,
+        ),
+    ],
+    ids=[
+        'vp9-webm',
+        'h264-10bit',
+        'cover-art-only',
+        'opus-audio',
+        'matroska',
+        'quicktime',
+        'moov-at-end',
+        'with-cover-art',
+        'no-audio',
+    ],
+)
+def test_decide(
+    monkeypatch: pytest.MonkeyPatch,
+    filename: str,
+    probe_ctx: dict,
+    faststart: bool | None,
+    expected: EncodeDecision,
+) -> None:
+    monkeypatch.setattr(encode_decision, 'is_faststart', lambda _: faststart)
+
+    assert EncodeDecisionEngine.decide(probe_ctx, Path(filename)) is expected
@@ -0,0 +1,65 @@
+import asyncio
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import pytest
+from yt_shared.enums import DownMediaType, EncodeDecision
+from yt_shared.schemas.media import DownMedia, Video
+
+from worker.core.tasks.encode import EncodeToH264Task
+from worker.core.tasks.fit_to_size import FitToSizeTask
+
+_FILE_SIZE = 1000
+
+
+class UnprobeableFileService:
+    """Probe service failing to probe any file, like ffprobe on broken media."""
+
+    async def get_context(self, file_path: Path) -> None:  # noqa: ARG002
+        return None
+
+
+def make_media(root_path: Path) -> DownMedia:
+    root_path.mkdir()
+    filename = 'video.mp4'
+    (root_path / filename).write_bytes(b'\0' * _FILE_SIZE)
+    video = Video(
+        title='video',
+        original_filename=filename,
+        directory_path=root_path,
+        file_size=_FILE_SIZE,
+    )
+    return DownMedia(
+        audio=None,
+        video=video,
+        media_type=DownMediaType.VIDEO,
+        root_path=root_path,
+    )
+
+
+@pytest.fixture
+def media(tmp_path: Path) -> DownMedia:
+    return make_media(tmp_path / 'media')
+
+
+def test_encode_falls_back_to_full_encode_without_probe(media: DownMedia) -> None:
+    task = EncodeToH264Task(
+        media=media, cmd_tpl='ffmpeg', probe_service=UnprobeableFileService()
+    )
+
+    assert asyncio.run(task._get_decision()) is EncodeDecision.FULL_ENCODE
+    assert asyncio.run(task._is_long_video()) is False
+
+
+def test_fit_to_size_skips_video_without_probe(media: DownMedia) -> None:
+    task = FitToSizeTask(
+        media=media,
+        max_file_size=_FILE_SIZE // 2,
+        probe_service=UnprobeableFileService(),
+    )
+    task._fit = AsyncMock()
+
+    asyncio.run(task.run())
+
+    task._fit.assert_not_awaited()
+    assert media.video.current_filepath == media.root_path / 'video.mp4'
@@ -0,0 +1,90 @@
+import asyncio
+import time
+from collections.abc import Awaitable, Callable
+
+from worker.core.host_scheduler import HostScheduler, TokenBucket
+
+# 600 requests per minute, one token per 0.1 seconds.
+_RATE_PER_MINUTE = 600
+_TOKEN_INTERVAL = 0.1
+_TOLERANCE = 0.05
+
+
+class LimitedHost:
+    MAX_CONCURRENT_DOWNLOADS = 1
+    REQUESTS_PER_MINUTE = None
+
+
+class RateLimitedHost:
+    MAX_CONCURRENT_DOWNLOADS = None
+    REQUESTS_PER_MINUTE = _RATE_PER_MINUTE
+
+
+class UnlimitedHost:
+    MAX_CONCURRENT_DOWNLOADS = None
+    REQUESTS_PER_MINUTE = None
+
+
+async def measure(
+    coro_factory: Callable[[], Awaitable[object]], number: int
+) -> list[float]:
+    """Run coroutines concurrently, return seconds each of them finished at."""
+    start_time = time.monotonic()
+
+    async def run() -> float:
+        await coro_factory()
+        return time.monotonic() - start_time
+
+    return sorted(await asyncio.gather(*(run() for _ in range(number))))
+
+
+def test_token_bucket_allows_burst_then_refills_at_rate() -> None:
+    bucket = TokenBucket(rate_per_minute=_RATE_PER_MINUTE, capacity=2)
+
+    finished_at = asyncio.run(measure(bucket.acquire, number=4))
+
+    assert finished_at[1] < _TOLERANCE
+    assert abs(finished_at[2] - _TOKEN_INTERVAL) < _TOLERANCE
+    assert abs(finished_at[3] - _TOKEN_INTERVAL * 2) < _TOLERANCE
+
+
+def test_scheduler_limits_concurrent_downloads_per_host() -> None:
+    scheduler = HostScheduler()
+    running = max_running = 0
+
+    async def download(host_cls: type) -> None:
+        nonlocal running, max_running
+        async with scheduler.acquire(host_cls):
+            running += 1
+            max_running = max(max_running, running)
+            await asyncio.sleep(0.01)
+            running -= 1
+
+    async def main() -> None:
+        nonlocal max_running
+        await asyncio.gather(*(download(LimitedHost) for _ in range(3)))
+        assert max_running == 1
+        max_running = 0
+        await asyncio.gather(*(download(UnlimitedHost) for _ in range(3)))
+        assert max_running == 3
+
+    asyncio.run(main())
+
+
+def test_scheduler_rate_limits_requests_per_host() -> None:
+    scheduler = HostScheduler()
+
+    async def download(host_cls: type) -> None:
+        async with scheduler.acquire(host_cls):
+            pass
+
+    async def main() -> tuple[list[float], list[float]]:
+        return await asyncio.gather(
+            measure(lambda: download(RateLimitedHost), number=3),
+            measure(lambda: download(UnlimitedHost), number=3),
+        )
+
+    limited, unlimited = asyncio.run(main())
+
+    assert abs(limited[-1] - _TOKEN_INTERVAL * 2) < _TOLERANCE
+    assert unlimited[-1] < _TOLERANCE
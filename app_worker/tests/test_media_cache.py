@@ -0,0 +1,88 @@
+from pathlib import Path
+
+import pytest
+from yt_shared.enums import DownMediaType
+from yt_shared.schemas.media import DownMedia, Video
+
+from worker.core.config import settings
+from worker.core.media_cache import MediaCache
+
+_FILE_SIZE = 1000
+
+
+@pytest.fixture
+def media_cache(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> MediaCache:
+    monkeypatch.setattr(settings, 'MEDIA_CACHE_PATH', tmp_path / 'cache')
+    monkeypatch.setattr(settings, 'MEDIA_CACHE_MAX_SIZE_BYTES', _FILE_SIZE * 2)
+    return MediaCache()
+
+
+def make_media(root_path: Path, size: int = _FILE_SIZE) -> DownMedia:
+    root_path.mkdir(parents=True)
+    filename = 'video.mp4'
+    (root_path / filename).write_bytes(root_path.name.encode().ljust(size, b'\0'))
+    video = Video(
+        title=root_path.name,
+        original_filename=filename,
+        directory_path=root_path,
+        file_size=size,
+    )
+    return DownMedia(
+        audio=None,
+        video=video,
+        media_type=DownMediaType.VIDEO,
+        root_path=root_path,
+    )
+
+
+def test_get_materializes_cached_media(media_cache: MediaCache, tmp_path: Path) -> None:
+    media_cache.put('a', make_media(tmp_path / 'a'))
+
+    media = media_cache.get('a', tmp_path / 'dest')
+
+    assert media.root_path == tmp_path / 'dest'
+    assert media.video.current_filepath.read_bytes().startswith(b'a\0')
+    assert media_cache.get('b', tmp_path / 'dest-b') is None
+
+
+def test_evicts_least_recently_used(media_cache: MediaCache, tmp_path: Path) -> None:
+    media_cache.put('a', make_media(tmp_path / 'a'))
+    media_cache.put('b', make_media(tmp_path / 'b'))
+    assert media_cache.get('a', tmp_path / 'dest-a')
+
+    media_cache.put('c', make_media(tmp_path / 'c'))
+
+    assert media_cache.get('b', tmp_path / 'dest-b') is None
+    assert media_cache.get('a', tmp_path / 'dest-a2')
+    assert media_cache.get('c', tmp_path / 'dest-c')
+
+
+def test_skips_media_bigger_than_cache(media_cache: MediaCache, tmp_path: Path) -> None:
+    media_cache.put('a', make_media(tmp_path / 'a', size=_FILE_SIZE * 3))
+
+    assert media_cache.get('a', tmp_path / 'dest') is None
+
+
+def test_removes_corrupted_entry(media_cache: MediaCache, tmp_path: Path) -> None:
+    media_cache.put('a', make_media(tmp_path / 'a'))
+    entry_path = media_cache._get_entry_path('a')
+    (entry_path / 'video.mp4').write_bytes(b'corrupted')
+
+    assert media_cache.get('a', tmp_path / 'dest') is None
+    assert not entry_path.exists()
+
+
+def test_changing_materialized_file_keeps_entry(
+    media_cache: MediaCache, tmp_path: Path
+) -> None:
+    source = make_media(tmp_path / 'a')
+    media_cache.put('a', source)
+    media = media_cache.get('a', tmp_path / 'dest')
+
+    # Post-processing steps like `ffmpeg -y` overwrite files in place.
+    for path in (source.video.current_filepath, media.video.current_filepath):
+        with path.open('r+b') as fd:
+            fd.write(b'changed')
+
+    media = media_cache.get('a', tmp_path / 'dest-2')
+    assert media.video.current_filepath.read_bytes().startswith(b'a\0')
@@ -0,0 +1,194 @@
+import struct
+from collections.abc import Callable
+from pathlib import Path
+
+import pytest
+
+from worker.core.media_probe import is_faststart, probe_media
+
+_H264_HIGH_PROFILE = 100
+_H264_HIGH_10_PROFILE = 110
+
+
+def box(type_: bytes, *children: bytes) -> bytes:
+    payload = b''.join(children)
+    return struct.pack('>I4s', 8 + len(payload), type_) + payload
+
+
+def full_box(type_: bytes, *children: bytes) -> bytes:
+    return box(type_, b'\0' * 4, *children)
+
+
+def media_header(type_: bytes, timescale: int, duration: int) -> bytes:
+    times = struct.pack('>II', 0, 0)
+    return full_box(type_, times, struct.pack('>II', timescale, duration), b'\0' * 80)
+
+
+def mp4_trak(handler: bytes, sample_entry: bytes) -> bytes:
+    stsd = full_box(b'stsd', struct.pack('>I', 1), sample_entry)
+    return box(
+        b'trak',
+        box(
+            b'mdia',
+            media_header(b'mdhd', timescale=1000, duration=10_000),
+            full_box(b'hdlr', b'\0' * 4, handler, b'\0' * 13),
+            box(b'minf', box(b'stbl', stsd)),
+        ),
+    )
+
+
+def avc1_entry(width: int, height: int, profile: int) -> bytes:
+    fields = b'\0' * 24 + struct.pack('>HH', width, height) + b'\0' * 50
+    return box(b'avc1', fields, box(b'avcC', bytes((1, profile, 0, 31))))
+
+
+def mp4a_entry(channels: int, sample_rate: int) -> bytes:
+    fields = (
+        b'\0' * 8
+        + struct.pack('>H6xH', 0, channels)
+        + b'\0' * 6
+        + struct.pack('>I', sample_rate << 16)
+    )
+    # ES_Descriptor of 5 bytes with DecoderConfigDescriptor of AAC.
+    esds = full_box(b'esds', bytes((0x03, 5, 0, 1, 0, 0x04, 1, 0x40)))
+    return box(b'mp4a', fields, esds)
+
+
+def make_mp4(
+    path: Path,
+    profile: int = _H264_HIGH_PROFILE,
+    faststart: bool = True,
+    fragmented: bool = False,
+) -> Path:
+    moov = box(
+        b'moov',
+        media_header(b'mvhd', timescale=1000, duration=10_000),
+        mp4_trak(b'vide', avc1_entry(1280, 720, profile)),
+        mp4_trak(b'soun', mp4a_entry(channels=2, sample_rate=44100)),
+        box(b'mvex') if fragmented else b'',
+    )
+    mdat = box(b'mdat', b'\0' * 64)
+    ftyp = box(b'ftyp', b'isom', b'\0\0\2\0', b'isomavc1')
+    path.write_bytes(ftyp + (moov + mdat if faststart else mdat + moov))
+    return path
+
+
+def ebml(id_: int, *children: bytes) -> bytes:
+    data = b''.join(children)
+    # Size as 8 byte variable size integer.
+    size = (1 << 56 | len(data)).to_bytes(8, byteorder='big')
+    return id_.to_bytes((id_.bit_length() + 7) // 8, byteorder='big') + size + data
+
+
+def ebml_uint(id_: int, value: int) -> bytes:
+    return ebml(id_, value.to_bytes(4, byteorder='big'))
+
+
+def ebml_float(id_: int, value: float) -> bytes:
+    return ebml(id_, struct.pack('>d', value))
+
+
+def make_webm(path: Path, video_codec: str = 'V_VP9') -> Path:
+    video_track = ebml(
+        0xAE,
+        ebml_uint(0x83, 1),
+        ebml(0x86, video_codec.encode()),
+        ebml(0xE0, ebml_uint(0xB0, 1920), ebml_uint(0xBA, 1080)),
+    )
+    audio_track = ebml(
+        0xAE,
+        ebml_uint(0x83, 2),
+        ebml(0x86, b'A_OPUS'),
+        ebml(0xE1, ebml_float(0xB5, 48000.0), ebml_uint(0x9F, 2)),
+    )
+    segment = ebml(
+        0x18538067,
+        ebml(0x1549A966, ebml_uint(0x2AD7B1, 1_000_000), ebml_float(0x4489, 12345.0)),
+        ebml(0x1654AE6B, video_track, audio_track),
+        ebml(0x1F43B675, b'\0' * 64),
+    )
+    path.write_bytes(ebml(0x1A45DFA3, ebml(0x4282, b'webm')) + segment)
+    return path
+
+
+def test_probe_mp4(tmp_path: Path) -> None:
+    path = make_mp4(tmp_path / 'video.mp4')
+
+    ctx = probe_media(path)
+
+    assert ctx['format']['format_name'] == 'mov,mp4,m4a,3gp,3g2,mj2'
+    assert ctx['format']['duration'] == '10.000000'
+    assert ctx['format']['nb_streams'] == 2
+    assert ctx['format']['size'] == str(path.stat().st_size)
+    video, audio = ctx['streams']
+    assert video == {
+        'index': 0,
+        'codec_type': 'video',
+        'codec_name': 'h264',
+        'duration': '10.000000',
+        'width': 1280,
+        'height': 720,
+        'pix_fmt': 'yuv420p',
+    }
+    assert audio == {
+        'index': 1,
+        'codec_type': 'audio',
+        'codec_name': 'aac',
+        'duration': '10.000000',
+        'channels': 2,
+        'sample_rate': '44100',
+    }
+
+
+def test_probe_webm(tmp_path: Path) -> None:
+    ctx = probe_media(make_webm(tmp_path / 'video.webm'))
+
+    assert ctx['format']['format_name'] == 'matroska,webm'
+    assert ctx['format']['duration'] == '12.345000'
+    assert ctx['streams'] == [
+        {
+            'index': 0,
+            'codec_type': 'video',
+            'codec_name': 'vp9',
+            'width': 1920,
+            'height': 1080,
+        },
+        {
+            'index': 1,
+            'codec_type': 'audio',
+            'codec_name': 'opus',
+            'channels': 2,
+            'sample_rate': '48000',
+        },
+    ]
+
+
+@pytest.mark.parametrize(
+    'make_file',
+    [
+        pytest.param(
+            lambda path: make_mp4(path, profile=_H264_HIGH_10_PROFILE),
+            id='h264-high-10',
+        ),
+        pytest.param(lambda path: make_mp4(path, fragmented=True), id='fragmented'),
+        pytest.param(lambda path: make_webm(path, 'V_THEORA'), id='unknown-codec'),
+        pytest.param(
+            lambda path: path.write_bytes(make_mp4(path).read_bytes()[:-100]),
+            id='truncated',
+        ),
+        pytest.param(lambda path: path.write_bytes(b'\0' * 64), id='unknown'),
+    ],
+)
+def test_probe_unsupported_returns_none(
+    tmp_path: Path, make_file: Callable[[Path], object]
+) -> None:
+    path = tmp_path / 'media'
+    make_file(path)
+
+    assert probe_media(path) is None
+
+
+def test_is_faststart(tmp_path: Path) -> None:
+    assert is_faststart(make_mp4(tmp_path / 'fast.mp4')) is True
+    assert is_faststart(make_mp4(tmp_path / 'slow.mp4', faststart=False)) is False
+    assert is_faststart(make_webm(tmp_path / 'video.webm')) is None
@@ -0,0 +1,128 @@
+import asyncio
+from graphlib import CycleError
+
+import pytest
+
+from worker.core import post_process_dag
+from worker.core.post_process_dag import DagStep, PostProcessDag, _DagRun
+from worker.enums import PostProcessArtifact, StepStatus
+
+PROBE = PostProcessArtifact.PROBE
+ENCODED_FILE = PostProcessArtifact.ENCODED_FILE
+FINAL_FILE = PostProcessArtifact.FINAL_FILE
+
+
+class StepError(Exception):
+    pass
+
+
+def make_step(
+    name: str,
+    events: list[str],
+    delay: float = 0,
+    exc: Exception | None = None,
+    **kwargs,
+) -> DagStep:
+    async def run() -> None:
+        events.append(f'{name} started')
+        await asyncio.sleep(delay)
+        if exc:
+            raise exc
+        events.append(f'{name} done')
+
+    return DagStep(name=name, run=run, **kwargs)
+
+
+def get_statuses(timings: list) -> dict[str, StepStatus]:
+    return {timing.name: timing.status for timing in timings}
+
+
+@pytest.fixture
+def dag_runs(monkeypatch: pytest.MonkeyPatch) -> list[_DagRun]:
+    """Record DAG runs to check step statuses of a failed run."""
+    runs: list[_DagRun] = []
+
+    class RecordedDagRun(_DagRun):
+        def __init__(self, *args) -> None:
+            super().__init__(*args)
+            runs.append(self)
+
+    monkeypatch.setattr(post_process_dag, '_DagRun', RecordedDagRun)
+    return runs
+
+
+def test_steps_run_after_their_requirements() -> None:
+    events: list[str] = []
+    dag = PostProcessDag(
+        [
+            make_step('final', events, requires=(PROBE, ENCODED_FILE)),
+            make_step(
+                'encode', events, 0.02, requires=(PROBE,), provides=(ENCODED_FILE,)
+            ),
+            make_step('probe', events, 0.01, provides=(PROBE,)),
+            make_step('independent', events),
+        ]
+    )
+
+    timings = asyncio.run(dag.run())
+
+    assert events.index('probe done') < events.index('encode started')
+    assert events.index('encode done') < events.index('final started')
+    assert events.index('independent done') < events.index('probe done')
+    assert set(get_statuses(timings).values()) == {StepStatus.DONE}
+
+
+def test_optional_requirement_nobody_provides_is_available() -> None:
+    events: list[str] = []
+    dag = PostProcessDag(
+        [
+            make_step('probe', events, 0.01, provides=(PROBE,)),
+            make_step(
+                'final', events, requires=(PROBE,), optional_requires=(ENCODED_FILE,)
+            ),
+        ]
+    )
+
+    asyncio.run(dag.run())
+
+    assert events == ['probe started', 'probe done', 'final started', 'final done']
+
+
+def test_failed_step_cancels_others(dag_runs: list[_DagRun]) -> None:
+    events: list[str] = []
+    error = StepError('Encode failed')
+    steps = [
+        make_step('probe', events, provides=(PROBE,)),
+        make_step(
+            'encode', events, 0.01, error, requires=(PROBE,), provides=(ENCODED_FILE,)
+        ),
+        make_step('thumbnail', events, 1, requires=(PROBE,)),
+        make_step('final', events, requires=(ENCODED_FILE,)),
+    ]
+
+    with pytest.raises(StepError) as exc_info:
+        asyncio.run(PostProcessDag(steps).run())
+
+    assert exc_info.value is error
+    assert 'final started' not in events
+    assert get_statuses(dag_runs[0].timings) == {
+        'probe': StepStatus.DONE,
+        'encode': StepStatus.FAILED,
+        'thumbnail': StepStatus.CANCELLED,
+        'final': StepStatus.SKIPPED,
+    }
+
+
+def test_missing_requirement_is_rejected() -> None:
+    with pytest.raises(ValueError, match='ENCODED_FILE'):
+        PostProcessDag([make_step('final', [], requires=(ENCODED_FILE,))])
+
+
+def test_cycle_is_rejected() -> None:
+    with pytest.raises(CycleError):
+        PostProcessDag(
+            [
+                make_step('a', [], requires=(PROBE,), provides=(FINAL_FILE,)),
+                make_step('b', [], requires=(FINAL_FILE,), provides=(PROBE,)),
+            ]
+        )
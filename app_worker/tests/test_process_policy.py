@@ -0,0 +1,36 @@
+import asyncio
+import os
+from unittest import mock
+
+import pytest
+
+from worker.core.process_policy import ProcessPolicy
+from worker.core.subprocess_runner import SubprocessRunner
+
+# Give the worker time to apply the policy after spawn, then report nice value
+# and CPU time limit of the shell.
+_REPORT_CMD = ('sh', '-c', "sleep 0.3; cut -d ' ' -f 19 /proc/$$/stat; ulimit -t")
+# Above the default `pid_max`, so no such process group exists.
+_MISSING_PID = 2**22 + 1
+
+
+def test_policy_is_applied_to_spawned_process() -> None:
+    nice = min(os.getpriority(os.PRIO_PROCESS, 0) + 5, 19)
+    runner = SubprocessRunner(policy=ProcessPolicy(nice=nice, cpu_time_limit=30))
+
+    with mock.patch.object(
+        asyncio, 'create_subprocess_exec', wraps=asyncio.create_subprocess_exec
+    ) as create_subprocess_exec:
+        result = asyncio.run(runner.run(_REPORT_CMD))
+
+    assert result.stdout.split() == [str(nice), '30']
+    # Python code in the child of a threaded process may deadlock.
+    assert 'preexec_fn' not in create_subprocess_exec.call_args.kwargs
+
+
+def test_policy_of_exited_process_is_not_raised(
+    caplog: pytest.LogCaptureFixture,
+) -> None:
+    ProcessPolicy(nice=5).apply_to_process_group(_MISSING_PID)
+
+    assert 'Failed to apply' not in caplog.text
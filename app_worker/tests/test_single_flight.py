@@ -0,0 +1,212 @@
+import asyncio
+import os
+import time
+import uuid
+from pathlib import Path
+
+import pytest
+from yt_shared.enums import DownMediaType, TaskSource
+from yt_shared.schemas.media import DownMedia, InbMediaPayload, Video
+
+from worker.core.cancellation import CancellationToken
+from worker.core.config import settings
+from worker.core.exceptions import TaskCancelledError
+from worker.core.single_flight import SingleFlight
+
+_RESULT_TTL = 60
+
+
+class FakeLockConnection:
+    """Connection taking Postgres session advisory locks from a shared set."""
+
+    def __init__(self, locks: set[int]) -> None:
+        self._locks = locks
+        self._held: set[int] = set()
+        self.polls = 0
+        self.is_closed = False
+
+    async def scalar(self, statement: object, params: dict) -> bool:
+        lock_id = params['lock_id']
+        if 'pg_try_advisory_lock' in str(statement):
+            self.polls += 1
+            if lock_id in self._locks:
+                return False
+            self._locks.add(lock_id)
+            self._held.add(lock_id)
+            return True
+        self._locks.discard(lock_id)
+        self._held.discard(lock_id)
+        return True
+
+    async def close(self) -> None:
+        # Session locks are released with the connection.
+        self._locks.difference_update(self._held)
+        self.is_closed = True
+
+
+class FakeLockEngine:
+    def __init__(self) -> None:
+        self.locks: set[int] = set()
+        self.connections: list[FakeLockConnection] = []
+
+    async def connect(self) -> FakeLockConnection:
+        conn = FakeLockConnection(self.locks)
+        self.connections.append(conn)
+        return conn
+
+
+@pytest.fixture
+def single_flight(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> SingleFlight:
+    monkeypatch.setattr(settings, 'TMP_DOWNLOAD_ROOT_PATH', tmp_path)
+    monkeypatch.setattr(settings, 'SINGLE_FLIGHT_ENABLED', True)
+    monkeypatch.setattr(settings, 'SINGLE_FLIGHT_RESULT_TTL', _RESULT_TTL)
+    single_flight = SingleFlight()
+    single_flight._lock_engine = FakeLockEngine()
+    single_flight._LOCK_POLL_MIN_INTERVAL = 0.01
+    single_flight._LOCK_POLL_MAX_INTERVAL = 0.02
+    return single_flight
+
+
+def make_payload() -> InbMediaPayload:
+    return InbMediaPayload(
+        from_chat_id=1,
+        from_chat_type=None,
+        from_user_id=1,
+        message_id=1,
+        ack_message_id=2,
+        url='https://www.example.com/video/',
+        original_url='https://www.example.com/video/',
+        source=TaskSource.BOT,
+        save_to_storage=False,
+        download_media_type=DownMediaType.VIDEO,
+        custom_filename=None,
+        automatic_extension=False,
+    )
+
+
+class FakeDownload:
+    """Download writing a video file, optionally waiting to be released."""
+
+    def __init__(self, root_path: Path) -> None:
+        self._root_path = root_path
+        self.calls = 0
+        self.started = asyncio.Event()
+        self.release = asyncio.Event()
+        self.release.set()
+
+    async def __call__(self) -> DownMedia:
+        self.calls += 1
+        self.started.set()
+        await self.release.wait()
+        root_path = self._root_path / f'download-{self.calls}'
+        root_path.mkdir(parents=True)
+        (root_path / 'video.mp4').write_bytes(b'video')
+        video = Video(
+            title='video',
+            original_filename='video.mp4',
+            directory_path=root_path,
+            file_size=len(b'video'),
+        )
+        return DownMedia(
+            audio=None,
+            video=video,
+            media_type=DownMediaType.VIDEO,
+            root_path=root_path,
+        )
+
+
+def make_token() -> CancellationToken:
+    return CancellationToken(uuid.uuid4())
+
+
+def test_follower_reuses_leader_result(
+    single_flight: SingleFlight, tmp_path: Path
+) -> None:
+    download = FakeDownload(tmp_path / 'downloads')
+    download.release.clear()
+
+    async def main() -> tuple[DownMedia, DownMedia]:
+        leader = asyncio.create_task(
+            single_flight.run(make_payload(), download, make_token())
+        )
+        await download.started.wait()
+        follower = asyncio.create_task(
+            single_flight.run(make_payload(), download, make_token())
+        )
+        await asyncio.sleep(0.05)
+        download.release.set()
+        return await asyncio.gather(leader, follower)
+
+    leader_media, follower_media = asyncio.run(main())
+
+    assert download.calls == 1
+    assert single_flight._lock_engine.connections[1].polls > 1
+    assert all(conn.is_closed for conn in single_flight._lock_engine.connections)
+    assert not single_flight._lock_engine.locks
+    leader_path = leader_media.video.current_filepath
+    follower_path = follower_media.video.current_filepath
+    assert follower_media.root_path != leader_media.root_path
+    assert follower_path.read_bytes() == b'video'
+    # Post-processing of one task must not change the files of another.
+    assert follower_path.stat().st_ino != leader_path.stat().st_ino
+    follower_path.write_bytes(b'thumbnail')
+    assert leader_path.read_bytes() == b'video'
+
+
+def test_follower_downloads_after_failed_leader(
+    single_flight: SingleFlight, tmp_path: Path
+) -> None:
+    download = FakeDownload(tmp_path / 'downloads')
+
+    async def fail() -> DownMedia:
+        raise RuntimeError('Download failed')
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(single_flight.run(make_payload(), fail, make_token()))
+    asyncio.run(single_flight.run(make_payload(), download, make_token()))
+
+    assert download.calls == 1
+    assert not single_flight._lock_engine.locks
+
+
+def test_cancelled_follower_stops_waiting(
+    single_flight: SingleFlight, tmp_path: Path
+) -> None:
+    single_flight._lock_engine.locks.add(
+        single_flight._get_lock_id(single_flight._make_key(make_payload()))
+    )
+    token = make_token()
+
+    async def main() -> None:
+        follower = asyncio.create_task(
+            single_flight.run(make_payload(), FakeDownload(tmp_path), token)
+        )
+        await asyncio.sleep(0.05)
+        token.cancel()
+        await follower
+
+    with pytest.raises(TaskCancelledError):
+        asyncio.run(main())
+    assert single_flight._lock_engine.connections[0].is_closed
+
+
+def test_expired_result_is_not_reused_and_removed(
+    single_flight: SingleFlight, tmp_path: Path
+) -> None:
+    download = FakeDownload(tmp_path / 'downloads')
+    asyncio.run(single_flight.run(make_payload(), download, make_token()))
+    result_path = single_flight._get_result_path(
+        single_flight._make_key(make_payload())
+    )
+    expired_at = time.time() - _RESULT_TTL * 3
+    for path in (result_path, result_path / single_flight._RESULT_FILENAME):
+        os.utime(path, (expired_at, expired_at))
+    stale_path = result_path.with_name('stale')
+    stale_path.mkdir()
+    os.utime(stale_path, (expired_at, expired_at))
+
+    asyncio.run(single_flight.run(make_payload(), download, make_token()))
+
+    assert download.calls == 2
+    assert not stale_path.exists()
+    assert result_path.is_dir()
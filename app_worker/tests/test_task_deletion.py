@@ -0,0 +1,136 @@
+import asyncio
+import uuid
+from pathlib import Path
+from unittest.mock import AsyncMock
+
+import pytest
+from sqlalchemy.exc import NoResultFound
+from yt_shared.enums import DownMediaType, TaskSource, TaskStatus
+from yt_shared.models import Task
+from yt_shared.schemas.media import DownMedia, InbMediaPayload, Video
+
+from worker.core.cancellation import cancellation_registry
+from worker.core.config import settings
+from worker.core.exceptions import CancelledVideoServiceError, TaskCancelledError
+from worker.core.media_service import MediaService
+
+_URL = 'https://example.com/video'
+
+
+class FakeTaskRepository:
+    """Task repository whose task row can be deleted by the API."""
+
+    def __init__(self, task: Task) -> None:
+        self.task = task
+        self.is_deleted = False
+        self.statuses: list[TaskStatus] = []
+
+    async def get_or_create_task(self, media_payload: InbMediaPayload) -> Task:  # noqa: ARG002
+        return self.task
+
+    async def _save_status(self, status: TaskStatus) -> None:
+        if self.is_deleted:
+            raise NoResultFound
+        self.statuses.append(status)
+
+    async def save_as_processing(self, task: Task) -> None:  # noqa: ARG002
+        await self._save_status(TaskStatus.PROCESSING)
+
+    async def save_as_done(self, task: Task) -> None:  # noqa: ARG002
+        await self._save_status(TaskStatus.DONE)
+
+    async def save_as_failed(self, task: Task, error_message: str) -> None:  # noqa: ARG002
+        await self._save_status(TaskStatus.FAILED)
+
+    async def save_as_cancelled(self, task: Task) -> None:  # noqa: ARG002
+        await self._save_status(TaskStatus.CANCELLED)
+
+
+def make_payload(task_id: uuid.UUID) -> InbMediaPayload:
+    return InbMediaPayload(
+        id=task_id,
+        from_chat_id=None,
+        from_chat_type=None,
+        from_user_id=None,
+        message_id=None,
+        ack_message_id=None,
+        url=_URL,
+        original_url=_URL,
+        source=TaskSource.API,
+        save_to_storage=False,
+        download_media_type=DownMediaType.VIDEO,
+        custom_filename=None,
+        automatic_extension=False,
+    )
+
+
+def make_media(root_path: Path) -> DownMedia:
+    root_path.mkdir()
+    (root_path / 'video.mp4').write_bytes(b'video')
+    video = Video(
+        title='video',
+        original_filename='video.mp4',
+        directory_path=root_path,
+        file_size=len(b'video'),
+    )
+    return DownMedia(
+        audio=None, video=video, media_type=DownMediaType.VIDEO, root_path=root_path
+    )
+
+
+@pytest.fixture
+def repository(monkeypatch: pytest.MonkeyPatch) -> FakeTaskRepository:
+    monkeypatch.setattr(settings, 'SINGLE_FLIGHT_ENABLED', False)
+    task = Task(id=uuid.uuid4(), status=TaskStatus.PENDING, url=_URL)
+    return FakeTaskRepository(task)
+
+
+def make_media_service(
+    repository: FakeTaskRepository, download: AsyncMock
+) -> MediaService:
+    return MediaService(
+        media_payload=make_payload(repository.task.id),
+        download_engine=AsyncMock(download=download),
+        task_repository=repository,
+    )
+
+
+def test_task_deleted_while_downloading_is_stopped(
+    repository: FakeTaskRepository,
+) -> None:
+    async def download(task_id: uuid.UUID, **_) -> DownMedia:
+        # API deletes the row and broadcasts cancellation of the running task.
+        repository.is_deleted = True
+        assert cancellation_registry.cancel(task_id)
+        raise TaskCancelledError(f'Task "{task_id}" was cancelled')
+
+    media_service = make_media_service(repository, AsyncMock(side_effect=download))
+
+    with pytest.raises(CancelledVideoServiceError):
+        asyncio.run(media_service.process())
+    assert repository.statuses == [TaskStatus.PROCESSING]
+    assert not cancellation_registry.is_tracked(repository.task.id)
+
+
+def test_task_deleted_before_being_saved_as_done_is_stopped(
+    repository: FakeTaskRepository,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    media = make_media(tmp_path / 'media')
+
+    async def post_process_video(**_) -> None:
+        # Deleted before the cancellation message reached the worker.
+        repository.is_deleted = True
+
+    media_service = make_media_service(repository, AsyncMock(return_value=media))
+    monkeypatch.setattr(
+        media_service,
+        '_post_process_video',
+        AsyncMock(side_effect=post_process_video),
+    )
+
+    with pytest.raises(CancelledVideoServiceError):
+        asyncio.run(media_service.process())
+    assert repository.statuses == [TaskStatus.PROCESSING]
+    assert not media.root_path.exists()
@@ -0,0 +1,107 @@
+import asyncio
+import uuid
+from collections.abc import AsyncIterator
+from pathlib import Path
+from typing import ClassVar
+
+import pytest
+from yt_shared.enums import TaskStatus
+
+from worker.core.cancellation import cancellation_registry
+from worker.core.config import settings
+from worker.core.tasks import workspace_janitor
+from worker.core.tasks.workspace_janitor import WorkspaceJanitorTask
+from worker.core.workspace import get_workspace_path, get_workspace_task_id
+
+
+class FakeTaskRepository:
+    statuses: ClassVar[dict[uuid.UUID, TaskStatus]] = {}
+
+    def __init__(self, db: None) -> None:
+        pass
+
+    async def get_task_statuses(
+        self,
+        ids: list[uuid.UUID],
+    ) -> dict[uuid.UUID, TaskStatus]:
+        return {id_: self.statuses[id_] for id_ in ids if id_ in self.statuses}
+
+
+async def fake_get_db() -> AsyncIterator[None]:
+    yield None
+
+
+@pytest.fixture(autouse=True)
+def fake_db(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'TMP_DOWNLOAD_ROOT_PATH', tmp_path)
+    monkeypatch.setattr(workspace_janitor, 'get_db', fake_get_db)
+    monkeypatch.setattr(workspace_janitor, 'TaskRepository', FakeTaskRepository)
+    monkeypatch.setattr(FakeTaskRepository, 'statuses', {})
+
+
+def make_workspace(status: TaskStatus) -> Path:
+    task_id = uuid.uuid4()
+    FakeTaskRepository.statuses[task_id] = status
+    path = get_workspace_path(task_id)
+    path.mkdir(parents=True)
+    (path / 'video.mp4.part').write_bytes(b'\0')
+    return path
+
+
+def test_removes_only_finished_workspaces() -> None:
+    done = make_workspace(TaskStatus.DONE)
+    processing = make_workspace(TaskStatus.PROCESSING)
+
+    asyncio.run(WorkspaceJanitorTask()._cleanup())
+
+    assert not done.exists()
+    assert processing.exists()
+
+
+def test_keeps_workspace_of_running_task_with_deleted_row() -> None:
+    running = make_workspace(TaskStatus.PROCESSING)
+    deleted = make_workspace(TaskStatus.PROCESSING)
+    FakeTaskRepository.statuses.clear()
+
+    with cancellation_registry.track(get_workspace_task_id(running)):
+        asyncio.run(WorkspaceJanitorTask()._cleanup())
+
+    assert running.exists()
+    assert not deleted.exists()
+
+
+def test_workspace_changing_during_cleanup_is_skipped(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    processing = make_workspace(TaskStatus.PROCESSING)
+    done = make_workspace(TaskStatus.DONE)
+
+    def is_expired(path: Path) -> bool:
+        # `.part` file renamed by yt-dlp between listing and stat.
+        raise FileNotFoundError(path / 'video.mp4.part')
+
+    monkeypatch.setattr(WorkspaceJanitorTask, '_is_expired', staticmethod(is_expired))
+
+    asyncio.run(WorkspaceJanitorTask()._cleanup())
+
+    assert processing.exists()
+    assert not done.exists()
+
+
+def test_keeps_running_after_failed_cleanup(monkeypatch: pytest.MonkeyPatch) -> None:
+    janitor = WorkspaceJanitorTask()
+    calls = 0
+
+    async def cleanup() -> None:
+        nonlocal calls
+        calls += 1
+        if calls == 1:
+            raise RuntimeError('Database is unavailable')
+        raise asyncio.CancelledError
+
+    monkeypatch.setattr(janitor, '_cleanup', cleanup)
+    monkeypatch.setattr(janitor, '_SLEEP_TIME', 0)
+
+    with pytest.raises(asyncio.CancelledError):
+        asyncio.run(janitor.run())
+    assert calls == 2
@@ -1,8 +1,15 @@
 import logging
 
 from aio_pika import IncomingMessage
+from yt_shared.rabbit.codec import decode_body
+from yt_shared.rabbit.publisher import RmqPublisher
+from yt_shared.rabbit.rabbit_config import RETRY_COUNT_HEADER
+from yt_shared.schemas.control import CancelTaskPayload
 from yt_shared.schemas.media import InbMediaPayload
 
+from worker.core.cancellation import cancellation_registry
+from worker.core.config import settings
+from worker.core.exceptions import TransientProcessingError
 from worker.core.payload_handler import InboundPayloadHandler
 
 
@@ -12,6 +19,7 @@ class RMQCallbacks:
     def __init__(self) -> None:
         self._log = logging.getLogger(self.__class__.__name__)
         self._payload_handler = InboundPayloadHandler()
+        self._rmq_publisher = RmqPublisher()
 
     async def on_input_message(self, message: IncomingMessage) -> None:
         try:
@@ -24,15 +32,60 @@ class RMQCallbacks:
     async def _process_incoming_message(self, message: IncomingMessage) -> None:
         self._log.info('[x] Received message %s', message.body)
         try:
-            media_payload = InbMediaPayload.model_validate_json(message.body)
+            body = decode_body(message.body, message.content_encoding)
+            media_payload = InbMediaPayload.model_validate_json(body)
         except Exception:
             self._log.exception('Failed to deserialize message body: %s', message.body)
             await self._reject_invalid_message(message)
             return
 
+        # Acknowledged only when processed, so the message of a worker which died
+        # meanwhile is redelivered and the task resumed by another one.
+        retry_count = self._get_retry_count(message)
+        try:
+            await self._payload_handler.handle(
+                media_payload=media_payload,
+                is_last_attempt=retry_count >= settings.CONSUMER_NUMBER_OF_RETRY,
+            )
+        except TransientProcessingError:
+            if retry_count < settings.CONSUMER_NUMBER_OF_RETRY:
+                await self._schedule_retry(body, retry_count + 1)
+            else:
+                self._log.error('Retries exhausted, dead-lettering message')
+                await self._rmq_publisher.send_to_dead_letter(body, retry_count)
+        else:
+            self._log.info('Processing done with payload: %s', media_payload)
         await message.ack()
-        await self._payload_handler.handle(media_payload=media_payload)
-        self._log.info('Processing done with payload: %s', media_payload)
+
+    async def _schedule_retry(self, body: bytes, retry_count: int) -> None:
+        self._log.info(
+            'Retrying message in %d ms, attempt %d of %d',
+            settings.RESEND_DELAY_MS * 2 ** (retry_count - 1),
+            retry_count,
+            settings.CONSUMER_NUMBER_OF_RETRY,
+        )
+        if not await self._rmq_publisher.send_for_retry(body, retry_count):
+            self._log.error('Failed to schedule retry, dead-lettering message')
+            await self._rmq_publisher.send_to_dead_letter(body, retry_count)
+
+    @staticmethod
+    def _get_retry_count(message: IncomingMessage) -> int:
+        try:
+            return int(message.headers.get(RETRY_COUNT_HEADER, 0))
+        except (TypeError, ValueError):
+            return 0
+
+    async def on_control_message(self, message: IncomingMessage) -> None:
+        async with message.process(requeue=False):
+            try:
+                body = decode_body(message.body, message.content_encoding)
+                payload = CancelTaskPayload.model_validate_json(body)
+            except Exception:
+                self._log.exception('Invalid control message body: %s', message.body)
+                return
+            for task_id in payload.task_ids:
+                if cancellation_registry.cancel(task_id):
+                    self._log.info('Cancelled running task "%s"', task_id)
 
     async def _reject_invalid_message(self, message: IncomingMessage) -> None:
         body = message.body
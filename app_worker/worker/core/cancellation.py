@@ -0,0 +1,128 @@
+import logging
+import os
+import signal
+import time
+import uuid
+from collections.abc import Iterator
+from contextlib import contextmanager, suppress
+from pathlib import Path
+
+from worker.core.config import settings
+from worker.core.exceptions import TaskCancelledError
+
+_MARKERS_DIR_NAME = 'cancelled'
+
+
+def _get_marker_path(task_id: uuid.UUID) -> Path:
+    return settings.TMP_DOWNLOAD_ROOT_PATH / _MARKERS_DIR_NAME / str(task_id)
+
+
+class CancellationToken:
+    """Cancellation state of the task running in this worker.
+
+    Download pool processes don't share memory with the worker, so cancellation
+    is signalled to them with a marker file checked by `CancellationProbe`.
+    FFmpeg processes run in their own process groups and are killed directly.
+    """
+
+    def __init__(self, task_id: uuid.UUID) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self.task_id = task_id
+        self._marker_path = _get_marker_path(task_id)
+        self._is_cancelled = False
+        self._pgids: set[int] = set()
+
+    @property
+    def is_cancelled(self) -> bool:
+        return self._is_cancelled
+
+    def cancel(self) -> None:
+        if self._is_cancelled:
+            return
+        self._log.info('Cancelling task "%s"', self.task_id)
+        self._is_cancelled = True
+        self._marker_path.parent.mkdir(parents=True, exist_ok=True)
+        self._marker_path.touch()
+        for pgid in self._pgids:
+            self._kill_process_group(pgid)
+
+    def raise_if_cancelled(self) -> None:
+        if self._is_cancelled:
+            raise TaskCancelledError(f'Task "{self.task_id}" was cancelled')
+
+    def add_process_group(self, pgid: int) -> None:
+        """Track process group killed on cancellation, kill it if already cancelled."""
+        self._pgids.add(pgid)
+        if self._is_cancelled:
+            self._kill_process_group(pgid)
+
+    def remove_process_group(self, pgid: int) -> None:
+        self._pgids.discard(pgid)
+
+    def clear(self) -> None:
+        self._marker_path.unlink(missing_ok=True)
+
+    def _kill_process_group(self, pgid: int) -> None:
+        self._log.info('Killing process group %d of task "%s"', pgid, self.task_id)
+        with suppress(ProcessLookupError):
+            os.killpg(pgid, signal.SIGKILL)
+
+
+class CancellationProbe:
+    """Check cancellation marker of the task from a download pool process.
+
+    Used in yt-dlp progress hooks called for every downloaded chunk, so the
+    marker file is checked at most once per `_CHECK_INTERVAL` seconds.
+    """
+
+    _CHECK_INTERVAL = 0.5
+
+    def __init__(self, task_id: uuid.UUID) -> None:
+        self._task_id = task_id
+        self._marker_path = _get_marker_path(task_id)
+        self._checked_at = 0.0
+
+    def __call__(self, *args, **kwargs) -> None:  # noqa: ARG002
+        now = time.monotonic()
+        if now - self._checked_at < self._CHECK_INTERVAL:
+            return
+        self._checked_at = now
+        self.raise_if_cancelled()
+
+    def raise_if_cancelled(self) -> None:
+        if self._marker_path.exists():
+            raise TaskCancelledError(f'Task "{self._task_id}" was cancelled')
+
+
+class CancellationRegistry:
+    """Cancellation tokens of tasks currently processed by this worker."""
+
+    def __init__(self) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._tokens: dict[uuid.UUID, CancellationToken] = {}
+
+    @contextmanager
+    def track(self, task_id: uuid.UUID) -> Iterator[CancellationToken]:
+        token = CancellationToken(task_id)
+        self._tokens[task_id] = token
+        try:
+            yield token
+        finally:
+            if self._tokens.get(task_id) is token:
+                del self._tokens[task_id]
+            token.clear()
+
+    def is_tracked(self, task_id: uuid.UUID) -> bool:
+        """Return whether task is processed by this worker."""
+        return task_id in self._tokens
+
+    def cancel(self, task_id: uuid.UUID) -> bool:
+        """Cancel task if it's processed by this worker."""
+        token = self._tokens.get(task_id)
+        if not token:
+            return False
+        token.cancel()
+        return True
+
+
+cancellation_registry = CancellationRegistry()
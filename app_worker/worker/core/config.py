@@ -1,15 +1,39 @@
-from pydantic import DirectoryPath, field_validator
+from pathlib import Path
+
+from pydantic import DirectoryPath, NonNegativeInt, PositiveInt, field_validator
 from yt_shared.config import CommonSettings
+from yt_shared.enums import FsyncPolicy
+
+from worker.core.process_policy import ProcessPolicy
+from worker.enums import ProcessKind, ResourceClass
 
 
 class WorkerSettings(CommonSettings):
     APPLICATION_NAME: str
     MAX_SIMULTANEOUS_DOWNLOADS: int
+    INPUT_PREFETCH_HEADROOM: NonNegativeInt
+    DOWNLOAD_WORKER_MAX_TASKS: PositiveInt
+    DOWNLOAD_WORKER_MAX_RSS_MB: PositiveInt
+    SINGLE_FLIGHT_ENABLED: bool
+    SINGLE_FLIGHT_RESULT_TTL: PositiveInt
+    MEDIA_CACHE_ENABLED: bool
+    MEDIA_CACHE_PATH: Path
+    MEDIA_CACHE_MAX_SIZE_BYTES: PositiveInt
+    DOWNLOAD_WORKSPACE_MAX_AGE: PositiveInt
+    PLAYLIST_MAX_ENTRIES: PositiveInt
     STORAGE_PATH: DirectoryPath
+    STORAGE_FSYNC_POLICY: FsyncPolicy
     THUMBNAIL_FRAME_SECOND: float
     INSTAGRAM_ENCODE_TO_H264: bool
     FACEBOOK_ENCODE_TO_H264: bool
     MAX_DOWNLOAD_THREADS: str
+    ENCODE_CPU_THREADS: PositiveInt
+    ENCODE_STALL_TIMEOUT: PositiveInt
+    ENCODE_SEGMENT_MIN_DURATION: PositiveInt
+    ENCODE_SEGMENT_DURATION: PositiveInt
+    FIT_TO_SIZE_ENABLED: bool
+    PROCESS_POLICIES: dict[ProcessKind, ProcessPolicy]
+    POST_PROCESS_CONCURRENCY: dict[ResourceClass, PositiveInt]
 
     @field_validator('MAX_DOWNLOAD_THREADS')
     @classmethod
@@ -0,0 +1,173 @@
+import asyncio
+import logging
+import multiprocessing
+import resource
+import uuid
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Final
+
+from yt_shared.enums import DownMediaType
+from yt_shared.schemas.media import DownMedia, InbMediaPayload
+
+from worker.core.config import settings
+from worker.core.downloader import MediaDownloader
+from worker.core.exceptions import MediaDownloaderError
+from worker.core.host_scheduler import host_scheduler
+from worker.core.log import setup_logging
+from worker.enums import ProcessKind
+from ytdl_opts.per_host._base import AbstractHostConfig
+from ytdl_opts.per_host._compiler import YtdlOptsCompiler
+from ytdl_opts.per_host._registry import HostConfRegistry
+
+_BYTES_IN_MB: Final[int] = 1024 * 1024
+
+# Modules imported once by the fork server so every pool process starts warm.
+_PRELOAD_MODULES: Final[list[str]] = ['yt_dlp', 'worker.core.downloader']
+
+_process_downloader: MediaDownloader | None = None
+
+
+def _init_pool_process() -> None:
+    """Initialize pool process: logging, process policy, yt-dlp options, downloader.
+
+    The download process policy is inherited by yt-dlp's ffmpeg postprocessors.
+    """
+    global _process_downloader  # noqa: PLW0603
+    setup_logging()
+    policy = settings.PROCESS_POLICIES.get(ProcessKind.DOWNLOAD)
+    if policy:
+        policy.apply_to_current_process()
+    YtdlOptsCompiler.compile_all(HostConfRegistry.get_registry().values())
+    _process_downloader = MediaDownloader()
+
+
+def _get_max_rss() -> int:
+    """Return peak resident set size of the current process in bytes."""
+    # On Linux `ru_maxrss` is in kilobytes.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _download_in_pool_process(
+    host_conf: AbstractHostConfig, media_payload: InbMediaPayload, task_id: uuid.UUID
+) -> tuple[DownMedia, int]:
+    """Download media inside the pool process and report its peak RSS.
+
+    Any exception is re-raised as `MediaDownloaderError` with the original message,
+    since third-party exceptions are not guaranteed to survive pickling.
+    """
+    try:
+        media = _process_downloader.download(
+            host_conf=host_conf, media_payload=media_payload, task_id=task_id
+        )
+    except Exception as err:
+        raise MediaDownloaderError(str(err)) from None
+    return media, _get_max_rss()
+
+
+def _extract_playlist_in_pool_process(
+    host_conf: AbstractHostConfig, media_type: DownMediaType
+) -> tuple[list[str] | None, int]:
+    """Extract playlist entry URLs inside the pool process and report its peak RSS."""
+    try:
+        entries = _process_downloader.extract_playlist_entries(
+            host_conf=host_conf, media_type=media_type
+        )
+    except Exception as err:
+        raise MediaDownloaderError(str(err)) from None
+    return entries, _get_max_rss()
+
+
+class DownloadEngine:
+    """Run yt-dlp downloads in a bounded pool of warm, recyclable processes.
+
+    Every process is recycled after `DOWNLOAD_WORKER_MAX_TASKS` downloads.
+    When any process reports peak RSS above `DOWNLOAD_WORKER_MAX_RSS_MB`, the whole
+    pool is replaced: running downloads finish in the old pool, new ones go to
+    the fresh one. Host budgets are acquired before pool slots, so downloads of
+    over-budget hosts don't occupy the pool while waiting.
+    """
+
+    _MP_START_METHOD = 'forkserver'
+
+    def __init__(self) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._max_workers = settings.MAX_SIMULTANEOUS_DOWNLOADS
+        self._max_rss = settings.DOWNLOAD_WORKER_MAX_RSS_MB * _BYTES_IN_MB
+        self._semaphore = asyncio.Semaphore(self._max_workers)
+        self._mp_context = multiprocessing.get_context(self._MP_START_METHOD)
+        self._mp_context.set_forkserver_preload(_PRELOAD_MODULES)
+        self._executor: ProcessPoolExecutor | None = None
+
+    def start(self) -> None:
+        self._log.info(
+            'Starting download process pool with %d workers', self._max_workers
+        )
+        self._executor = self._create_executor()
+
+    def shutdown(self) -> None:
+        if self._executor:
+            self._log.info('Shutting down download process pool')
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def download(
+        self,
+        host_conf: AbstractHostConfig,
+        media_payload: InbMediaPayload,
+        task_id: uuid.UUID,
+    ) -> DownMedia:
+        async with host_scheduler.acquire(host_conf.__class__):
+            return await self._run(
+                _download_in_pool_process, host_conf, media_payload, task_id
+            )
+
+    async def extract_playlist_entries(
+        self, host_conf: AbstractHostConfig, media_type: DownMediaType
+    ) -> list[str] | None:
+        """Return playlist entry URLs or `None` if URL is not a playlist."""
+        async with host_scheduler.acquire(host_conf.__class__):
+            return await self._run(
+                _extract_playlist_in_pool_process, host_conf, media_type
+            )
+
+    async def _run(self, func: Callable[..., tuple[Any, int]], *args: Any) -> Any:
+        async with self._semaphore:
+            executor = self._executor
+            try:
+                result, max_rss = await asyncio.get_running_loop().run_in_executor(
+                    executor, func, *args
+                )
+            except BrokenProcessPool:
+                self._log.exception('Download process pool is broken, recreating')
+                self._replace_executor(executor)
+                raise
+
+        if max_rss > self._max_rss:
+            self._log.warning(
+                'Download process peak RSS %d MB exceeded %d MB, recycling pool',
+                max_rss // _BYTES_IN_MB,
+                self._max_rss // _BYTES_IN_MB,
+            )
+            self._replace_executor(executor)
+        return result
+
+    def _create_executor(self) -> ProcessPoolExecutor:
+        return ProcessPoolExecutor(
+            max_workers=self._max_workers,
+            mp_context=self._mp_context,
+            initializer=_init_pool_process,
+            max_tasks_per_child=settings.DOWNLOAD_WORKER_MAX_TASKS,
+        )
+
+    def _replace_executor(self, executor: ProcessPoolExecutor) -> None:
+        """Replace the given executor unless it was already replaced."""
+        if executor is not self._executor:
+            return
+        self._executor = self._create_executor()
+        executor.shutdown(wait=False)
+        self._log.info('Download process pool recycled')
+
+
+download_engine = DownloadEngine()
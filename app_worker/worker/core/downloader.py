@@ -1,20 +1,30 @@
 import glob
 import logging
-import shutil
+import uuid
 from collections.abc import Callable
 from pathlib import Path
-from tempfile import TemporaryDirectory
 from typing import ClassVar
 
 import yt_dlp
 from yt_shared.enums import DownMediaType
 from yt_shared.schemas.media import Audio, DownMedia, InbMediaPayload, Video
 from yt_shared.utils.common import format_bytes, gen_random_str
-from yt_shared.utils.file import file_size, list_files_human, remove_dir
-
+from yt_shared.utils.file import (
+    file_size,
+    list_files_human,
+    remove_dir,
+    transfer_file,
+)
+
+from worker.core.cancellation import CancellationProbe
 from worker.core.config import settings
 from worker.core.exceptions import MediaDownloaderError
+from worker.core.media_cache import media_cache
+from worker.core.preflight import SizePreflight
+from worker.core.thumbnail_strategy import ThumbnailStrategy
+from worker.core.workspace import get_workspace_path, get_workspaces_root
 from ytdl_opts.per_host._base import AbstractHostConfig
+from ytdl_opts.per_host._compiler import YtdlOptsCompiler
 
 try:
     from ytdl_opts.user import FINAL_AUDIO_FORMAT, FINAL_THUMBNAIL_FORMAT
@@ -39,79 +49,193 @@ class MediaDownloader:
         )
 
     def download(
-        self, host_conf: AbstractHostConfig, media_payload: InbMediaPayload
+        self,
+        host_conf: AbstractHostConfig,
+        media_payload: InbMediaPayload,
+        task_id: uuid.UUID,
     ) -> DownMedia:
         try:
-            return self._download(host_conf=host_conf, media_payload=media_payload)
+            cache_key = self._get_cache_key(
+                host_conf=host_conf, media_payload=media_payload
+            )
+            if cache_key:
+                media = self._get_cached(cache_key, media_payload)
+                if media:
+                    return media
+
+            return self._download(
+                host_conf=host_conf,
+                media_payload=media_payload,
+                task_id=task_id,
+                cache_key=cache_key,
+            )
         except Exception:
             self._log.error('Failed to download %s', host_conf.url)
             raise
 
-    def _download(
+    def extract_playlist_entries(
+        self, host_conf: AbstractHostConfig, media_type: DownMediaType
+    ) -> list[str] | None:
+        """Flat-extract entry URLs if URL is a playlist, without downloading media."""
+        ytdl_opts = host_conf.build_config(
+            media_type=media_type, curr_tmp_dir=get_workspaces_root()
+        ).ytdl_opts
+        ytdl_opts.update(
+            noplaylist=False,
+            playlist_items=f'1:{settings.PLAYLIST_MAX_ENTRIES}',
+            extract_flat='in_playlist',
+        )
+        with yt_dlp.YoutubeDL(ytdl_opts) as ytdl:
+            info: dict | None = ytdl.extract_info(host_conf.url, download=False)
+
+        if not info or info.get('_type') != self._PLAYLIST_TYPE:
+            return None
+        entries = [
+            entry['url'] for entry in info['entries'] if entry and entry.get('url')
+        ]
+        self._log.info('Extracted %d entries of playlist %s', len(entries), info['id'])
+        return entries
+
+    def _get_cache_key(
         self, host_conf: AbstractHostConfig, media_payload: InbMediaPayload
-    ) -> DownMedia:
+    ) -> str | None:
+        # Cached files are stored under their original names.
+        if not settings.MEDIA_CACHE_ENABLED or media_payload.custom_filename:
+            return None
         media_type = media_payload.download_media_type
-        url = host_conf.url
-        self._log.info('Downloading %s, media_type %s', url, media_type)
-        tmp_down_path = settings.TMP_DOWNLOAD_ROOT_PATH / settings.TMP_DOWNLOAD_DIR
-        with TemporaryDirectory(prefix='tmp_media_dir-', dir=tmp_down_path) as tmp_dir:
-            curr_tmp_dir = tmp_down_path / tmp_dir
-
-            ytdl_opts_model = host_conf.build_config(
-                media_type=media_type, curr_tmp_dir=curr_tmp_dir
-            )
+        return media_cache.make_key(
+            url=host_conf.url,
+            format_selector=YtdlOptsCompiler.get_format_selector(
+                host_cls=host_conf.__class__, media_type=media_type
+            ),
+            media_type=media_type,
+        )
 
-            with yt_dlp.YoutubeDL(ytdl_opts_model.ytdl_opts) as ytdl:
-                self._log.info('Downloading "%s" to "%s"', url, curr_tmp_dir)
+    def _get_cached(
+        self, cache_key: str, media_payload: InbMediaPayload
+    ) -> DownMedia | None:
+        media = media_cache.get(cache_key, self._make_destination_dir())
+        max_file_size = media_payload.max_file_size
+        if media and max_file_size:
+            size = sum(obj.file_size for obj in media.get_media_objects())
+            if size > max_file_size:
                 self._log.info(
-                    'Downloading with options: %s', ytdl_opts_model.ytdl_opts
+                    'Cached media is bigger than allowed %s, downloading',
+                    format_bytes(max_file_size),
                 )
+                remove_dir(media.root_path)
+                return None
+        return media
 
-                meta: dict | None = ytdl.extract_info(url, download=True)
-                if not meta:
-                    err_msg = 'Error during media download. Check logs.'
-                    self._log.error('%s. Meta: %s', err_msg, meta)
-                    raise MediaDownloaderError(err_msg)
-
-                current_files = list(curr_tmp_dir.iterdir())
-                if not current_files:
-                    err_msg = 'Nothing downloaded. Is URL valid?'
-                    self._log.error(err_msg)
-                    raise MediaDownloaderError(err_msg)
-
-                meta_sanitized = ytdl.sanitize_info(meta)
-
-            self._log.info('Finished downloading %s', url)
-            self._log.debug('Downloaded "%s" meta: %s', url, meta_sanitized)
-            self._log.info(
-                'Content of "%s": %s', curr_tmp_dir, list_files_human(curr_tmp_dir)
-            )
+    def _make_destination_dir(self) -> Path:
+        return self._tmp_downloaded_dest_dir / gen_random_str(
+            length=self._DESTINATION_TMP_DIR_NAME_LEN
+        )
 
-            destination_dir = self._tmp_downloaded_dest_dir / gen_random_str(
-                length=self._DESTINATION_TMP_DIR_NAME_LEN
-            )
-            destination_dir.mkdir()
-
-            audio, video = self._create_media_dtos(
-                media_type=media_type,
-                meta=meta,
-                curr_tmp_dir=curr_tmp_dir,
-                destination_dir=destination_dir,
-                custom_video_filename=media_payload.custom_filename,
-            )
+    def _download(
+        self,
+        host_conf: AbstractHostConfig,
+        media_payload: InbMediaPayload,
+        task_id: uuid.UUID,
+        cache_key: str | None = None,
+    ) -> DownMedia:
+        media_type = media_payload.download_media_type
+        url = host_conf.url
+        self._log.info('Downloading %s, media_type %s', url, media_type)
+        # Persistent workspace lets yt-dlp continue `.part` files of the task
+        # downloaded before worker restart. Kept on errors, removed by the janitor.
+        curr_tmp_dir = get_workspace_path(task_id)
+        if curr_tmp_dir.is_dir():
             self._log.info(
-                'Removing temporary download directory "%s" with leftover files %s',
+                'Resuming download in "%s" with files %s',
                 curr_tmp_dir,
                 list_files_human(curr_tmp_dir),
             )
+        curr_tmp_dir.mkdir(parents=True, exist_ok=True)
 
-        return DownMedia(
+        ytdl_opts_model = host_conf.build_config(
+            media_type=media_type, curr_tmp_dir=curr_tmp_dir
+        )
+        cancellation_probe = CancellationProbe(task_id)
+        cancellation_probe.raise_if_cancelled()
+        self._add_cancellation_hooks(ytdl_opts_model.ytdl_opts, cancellation_probe)
+
+        with yt_dlp.YoutubeDL(ytdl_opts_model.ytdl_opts) as ytdl:
+            self._log.info('Downloading "%s" to "%s"', url, curr_tmp_dir)
+            self._log.info('Downloading with options: %s', ytdl_opts_model.ytdl_opts)
+
+            # Extract first to decide what to download before fetching any data.
+            meta: dict | None = ytdl.extract_info(url, download=False)
+            if meta:
+                ThumbnailStrategy.apply_to_download(ytdl.params, meta)
+            if meta and media_payload.max_file_size:
+                preflight = SizePreflight(
+                    ytdl_opts=ytdl_opts_model.ytdl_opts,
+                    max_file_size=media_payload.max_file_size,
+                    # Oversize video is transcoded to fit after the download.
+                    allow_oversize=settings.FIT_TO_SIZE_ENABLED
+                    and media_payload.download_media_type is not DownMediaType.AUDIO,
+                )
+                meta = preflight.download(ytdl, meta, url)
+                # Downsized media must not be served to tasks without size limit.
+                if preflight.is_format_changed:
+                    cache_key = None
+            elif meta:
+                meta = ytdl.process_ie_result(meta, download=True)
+            # Errors raised from hooks are swallowed with `ignoreerrors` option.
+            cancellation_probe.raise_if_cancelled()
+            if not meta:
+                err_msg = 'Error during media download. Check logs.'
+                self._log.error('%s. Meta: %s', err_msg, meta)
+                raise MediaDownloaderError(err_msg)
+
+            current_files = list(curr_tmp_dir.iterdir())
+            if not current_files:
+                err_msg = 'Nothing downloaded. Is URL valid?'
+                self._log.error(err_msg)
+                raise MediaDownloaderError(err_msg)
+
+            meta_sanitized = ytdl.sanitize_info(meta)
+
+        self._log.info('Finished downloading %s', url)
+        self._log.debug('Downloaded "%s" meta: %s', url, meta_sanitized)
+        self._log.info(
+            'Content of "%s": %s', curr_tmp_dir, list_files_human(curr_tmp_dir)
+        )
+
+        destination_dir = self._make_destination_dir()
+        destination_dir.mkdir()
+
+        audio, video = self._create_media_dtos(
+            media_type=media_type,
+            meta=meta,
+            curr_tmp_dir=curr_tmp_dir,
+            destination_dir=destination_dir,
+            custom_video_filename=media_payload.custom_filename,
+        )
+        self._log.info(
+            'Removing download workspace "%s" with leftover files %s',
+            curr_tmp_dir,
+            list_files_human(curr_tmp_dir),
+        )
+        remove_dir(curr_tmp_dir)
+
+        media = DownMedia(
             media_type=media_type,
             audio=audio,
             video=video,
             meta=meta_sanitized,
             root_path=destination_dir,
         )
+        if cache_key:
+            media_cache.put(cache_key, media)
+        return media
+
+    @staticmethod
+    def _add_cancellation_hooks(ytdl_opts: dict, probe: CancellationProbe) -> None:
+        """Abort download and ffmpeg post-processing of the cancelled task."""
+        for hook_type in ('progress_hooks', 'postprocessor_hooks'):
+            ytdl_opts[hook_type] = [*ytdl_opts.get(hook_type, []), probe]
 
     def _create_media_dtos(
         self,
@@ -161,8 +285,7 @@ class MediaDownloader:
         else:
             dest_path = destination_dir / video_filename
 
-        self._log.info('Moving "%s" to "%s"', video_filepath, dest_path)
-        shutil.move(video_filepath, dest_path)
+        transfer_file(video_filepath, dest_path, move=True)
 
         thumb_path: Path | None = None
         thumb_name = self._find_downloaded_file(
@@ -170,7 +293,7 @@ class MediaDownloader:
         )
         if thumb_name:
             _thumb_path = curr_tmp_dir / thumb_name
-            shutil.move(_thumb_path, destination_dir)
+            transfer_file(_thumb_path, destination_dir, move=True)
             thumb_path = destination_dir / thumb_name
 
         duration, width, height = self._get_video_context(meta)
@@ -198,8 +321,7 @@ class MediaDownloader:
             root_path=curr_tmp_dir, extension=FINAL_AUDIO_FORMAT
         )
         audio_filepath = curr_tmp_dir / audio_filename
-        self._log.info('Moving "%s" to "%s"', audio_filepath, destination_dir)
-        shutil.move(audio_filepath, destination_dir)
+        transfer_file(audio_filepath, destination_dir, move=True)
         return Audio(
             title=meta['title'],
             original_filename=audio_filename,
@@ -0,0 +1,78 @@
+import logging
+from pathlib import Path
+
+from yt_shared.enums import EncodeDecision
+
+from worker.core.media_probe import is_faststart
+from worker.enums import VideoCodecName, VideoCodecType
+
+
+class EncodeDecisionEngine:
+    """Choose the cheapest way to bring video to the final format.
+
+    The final format is MP4 with H.264 8-bit 4:2:0 video, AAC or MP3 audio and
+    moov box in front of media data, so Telegram can stream it. Only incompatible
+    video is fully re-encoded, otherwise streams are copied and at most audio is
+    transcoded.
+    """
+
+    _log = logging.getLogger('EncodeDecisionEngine')
+
+    _VIDEO_CODECS = frozenset((VideoCodecName.H264.value,))
+    _PIX_FMTS = frozenset(('yuv420p', 'yuvj420p'))
+    _AUDIO_CODECS = frozenset(('aac', 'mp3'))
+    _MP4_FORMAT_NAME = 'mp4'
+    _MP4_SUFFIX = '.mp4'
+
+    @classmethod
+    def decide(cls, probe_ctx: dict, file_path: Path) -> EncodeDecision:
+        """Return encode decision for the probed file, reads MP4 box order."""
+        decision = cls._decide(probe_ctx, file_path)
+        cls._log.info('Encode decision for "%s": %s', file_path, decision)
+        return decision
+
+    @classmethod
+    def _decide(cls, probe_ctx: dict, file_path: Path) -> EncodeDecision:
+        streams: list[dict] = probe_ctx['streams']
+        video_streams = [
+            stream
+            for stream in streams
+            if stream['codec_type'] == VideoCodecType.VIDEO.value
+            and not cls._is_attached_pic(stream)
+        ]
+        audio_streams = [
+            stream
+            for stream in streams
+            if stream['codec_type'] == VideoCodecType.AUDIO.value
+        ]
+
+        if not video_streams or not all(map(cls._is_video_compatible, video_streams)):
+            return EncodeDecision.FULL_ENCODE
+        if not all(
+            stream.get('codec_name') in cls._AUDIO_CODECS for stream in audio_streams
+        ):
+            return EncodeDecision.TRANSCODE_AUDIO
+        if not cls._is_mp4(probe_ctx, file_path) or not is_faststart(file_path):
+            return EncodeDecision.REMUX
+        return EncodeDecision.NOOP
+
+    @classmethod
+    def _is_video_compatible(cls, stream: dict) -> bool:
+        return (
+            stream.get('codec_name') in cls._VIDEO_CODECS
+            and stream.get('pix_fmt') in cls._PIX_FMTS
+        )
+
+    @classmethod
+    def _is_mp4(cls, probe_ctx: dict, file_path: Path) -> bool:
+        # QuickTime and MP4 share the format name, so check the extension too.
+        format_names = probe_ctx['format']['format_name'].split(',')
+        return (
+            cls._MP4_FORMAT_NAME in format_names
+            and file_path.suffix.lower() == cls._MP4_SUFFIX
+        )
+
+    @staticmethod
+    def _is_attached_pic(stream: dict) -> bool:
+        """Embedded cover art is reported by ffprobe as a video stream."""
+        return bool(stream.get('disposition', {}).get('attached_pic'))
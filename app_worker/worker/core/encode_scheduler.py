@@ -0,0 +1,82 @@
+import asyncio
+import logging
+import re
+from collections import deque
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
+from worker.core.config import settings
+
+
+class EncodeScheduler:
+    """Admit ffmpeg encodes within the worker-wide CPU thread budget.
+
+    Every encode reserves the number of threads from its `-threads` option, or
+    the whole budget if it isn't limited. Encodes over the budget are queued and
+    admitted in FIFO order, so large encodes aren't starved by smaller ones.
+    """
+
+    _THREADS_RE = re.compile(r'-threads\s+(\d+)')
+
+    def __init__(self) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._budget = settings.ENCODE_CPU_THREADS
+        self._used = 0
+        self._waiters: deque[tuple[int, asyncio.Future[None]]] = deque()
+
+    def get_threads(self, cmd: str) -> int:
+        """Return number of threads reserved for the ffmpeg command."""
+        match = self._THREADS_RE.search(cmd)
+        threads = int(match.group(1)) if match else 0
+        # Zero means all cores, more than the budget would never be admitted.
+        return min(threads, self._budget) if threads else self._budget
+
+    @asynccontextmanager
+    async def acquire(self, threads: int) -> AsyncIterator[None]:
+        if self._waiters or self._used + threads > self._budget:
+            await self._wait(threads)
+        else:
+            self._used += threads
+        try:
+            yield
+        finally:
+            self._release(threads)
+
+    async def _wait(self, threads: int) -> None:
+        self._log.info(
+            'Queueing encode of %d threads, %d of %d used, %d queued',
+            threads,
+            self._used,
+            self._budget,
+            len(self._waiters),
+        )
+        admission = asyncio.get_running_loop().create_future()
+        self._waiters.append((threads, admission))
+        try:
+            await admission
+        except asyncio.CancelledError:
+            if admission.done() and not admission.cancelled():
+                # Admitted right before being cancelled.
+                self._release(threads)
+            else:
+                self._admit_waiters()
+            raise
+
+    def _release(self, threads: int) -> None:
+        self._used -= threads
+        self._admit_waiters()
+
+    def _admit_waiters(self) -> None:
+        while self._waiters:
+            threads, admission = self._waiters[0]
+            if admission.done():
+                self._waiters.popleft()
+                continue
+            if self._used + threads > self._budget:
+                return
+            self._waiters.popleft()
+            self._used += threads
+            admission.set_result(None)
+
+
+encode_scheduler = EncodeScheduler()
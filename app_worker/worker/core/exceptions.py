@@ -17,3 +17,23 @@ class DownloadVideoServiceError(BaseVideoServiceError):
 
 class MediaDownloaderError(Exception):
     pass
+
+
+class TaskCancelledError(Exception):
+    pass
+
+
+class EncodeError(Exception):
+    pass
+
+
+class CancelledVideoServiceError(BaseVideoServiceError):
+    pass
+
+
+class FinishedVideoServiceError(BaseVideoServiceError):
+    pass
+
+
+class TransientProcessingError(Exception):
+    """Processing failed on an infrastructure error and may succeed later."""
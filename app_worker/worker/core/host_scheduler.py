@@ -0,0 +1,95 @@
+import asyncio
+import logging
+import time
+from collections.abc import AsyncIterator
+from contextlib import AsyncExitStack, asynccontextmanager
+
+from ytdl_opts.per_host._base import AbstractHostConfig
+
+_SECONDS_IN_MINUTE = 60
+
+
+class TokenBucket:
+    """Async token bucket refilled at a constant rate."""
+
+    def __init__(self, rate_per_minute: int, capacity: int) -> None:
+        self._rate = rate_per_minute / _SECONDS_IN_MINUTE
+        self._capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        # Lock makes waiters take tokens in arrival order.
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self._rate)
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self._capacity, self._tokens + (now - self._updated) * self._rate
+        )
+        self._updated = now
+
+
+class HostScheduler:
+    """Hold back downloads of hosts which are over their budget.
+
+    Budgets are set per host config class with `MAX_CONCURRENT_DOWNLOADS` and
+    `REQUESTS_PER_MINUTE` attributes and apply to a single worker instance.
+    Downloads of other hosts are not affected by hosts waiting for their budget
+    while the waiting, still unacknowledged, messages fit into the input prefetch
+    headroom (`INPUT_PREFETCH_HEADROOM`).
+    """
+
+    def __init__(self) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._semaphores: dict[type[AbstractHostConfig], asyncio.Semaphore] = {}
+        self._buckets: dict[type[AbstractHostConfig], TokenBucket] = {}
+
+    @asynccontextmanager
+    async def acquire(self, host_cls: type[AbstractHostConfig]) -> AsyncIterator[None]:
+        async with AsyncExitStack() as stack:
+            if semaphore := self._get_semaphore(host_cls):
+                if semaphore.locked():
+                    self._log.info(
+                        'Host "%s" reached max concurrent downloads, waiting',
+                        host_cls.__name__,
+                    )
+                await stack.enter_async_context(semaphore)
+            if bucket := self._get_bucket(host_cls):
+                await bucket.acquire()
+            yield
+
+    def _get_semaphore(
+        self, host_cls: type[AbstractHostConfig]
+    ) -> asyncio.Semaphore | None:
+        if not host_cls.MAX_CONCURRENT_DOWNLOADS:
+            return None
+        try:
+            return self._semaphores[host_cls]
+        except KeyError:
+            semaphore = asyncio.Semaphore(host_cls.MAX_CONCURRENT_DOWNLOADS)
+            self._semaphores[host_cls] = semaphore
+            return semaphore
+
+    def _get_bucket(self, host_cls: type[AbstractHostConfig]) -> TokenBucket | None:
+        if not host_cls.REQUESTS_PER_MINUTE:
+            return None
+        try:
+            return self._buckets[host_cls]
+        except KeyError:
+            bucket = TokenBucket(
+                rate_per_minute=host_cls.REQUESTS_PER_MINUTE,
+                capacity=host_cls.MAX_CONCURRENT_DOWNLOADS or 1,
+            )
+            self._buckets[host_cls] = bucket
+            return bucket
+
+
+host_scheduler = HostScheduler()
@@ -4,12 +4,15 @@ import logging
 from yt_dlp import version as ytdlp_version
 from yt_shared.db.session import get_db
 from yt_shared.rabbit import get_rabbitmq
-from yt_shared.rabbit.rabbit_config import INPUT_QUEUE
+from yt_shared.rabbit.rabbit_config import CONTROL_EXCHANGE, INPUT_QUEUE
 from yt_shared.repositories.ytdlp import YtdlpRepository
 from yt_shared.utils.common import register_shutdown
+from yt_shared.utils.tasks.tasks import create_task
 
 from worker.core.callbacks import rmq_callbacks as cb
 from worker.core.config import settings
+from worker.core.download_engine import download_engine
+from worker.core.tasks.workspace_janitor import WorkspaceJanitorTask
 
 
 class WorkerLauncher:
@@ -32,6 +35,7 @@ class WorkerLauncher:
             await asyncio.sleep(self._RUN_FOREVER_SLEEP_SECONDS)
 
     async def _perform_setup(self) -> None:
+        download_engine.start()
         await asyncio.gather(
             *(
                 self._setup_rabbit(),
@@ -39,16 +43,36 @@ class WorkerLauncher:
                 self._create_intermediate_directories(),
             )
         )
+        self._start_tasks()
         self._register_shutdown()
 
+    def _start_tasks(self) -> None:
+        task_name = WorkspaceJanitorTask.__name__
+        create_task(
+            WorkspaceJanitorTask().run(),
+            task_name=task_name,
+            logger=self._log,
+            exception_message='Task "%s" raised an exception',
+            exception_message_args=(task_name,),
+        )
+
     async def _setup_rabbit(self) -> None:
         self._log.info('Setting up RabbitMQ connection')
         await self._rabbit_mq.register()
+        # Inbound messages stay unacknowledged until processed, including while
+        # waiting for an over-budget host, a single-flight leader or an encode.
+        # The headroom keeps those from taking every slot from ready downloads.
         await self._rabbit_mq.channel.set_qos(
             prefetch_count=settings.MAX_SIMULTANEOUS_DOWNLOADS
+            + settings.INPUT_PREFETCH_HEADROOM
         )
         await self._rabbit_mq.queues[INPUT_QUEUE].consume(cb.on_input_message)
 
+        # Every worker instance gets all control messages in its own queue.
+        control_queue = await self._rabbit_mq.channel.declare_queue(exclusive=True)
+        await control_queue.bind(self._rabbit_mq.exchanges[CONTROL_EXCHANGE])
+        await control_queue.consume(cb.on_control_message)
+
     async def _set_yt_dlp_version(self) -> None:
         curr_version = ytdlp_version.__version__
         self._log.info(
@@ -76,5 +100,6 @@ class WorkerLauncher:
 
     def stop(self, *args) -> None:  # noqa: ARG002
         self._log.info('Shutting down %s', self.__class__.__name__)
+        download_engine.shutdown()
         loop = asyncio.get_running_loop()
         loop.create_task(self._rabbit_mq.close())  # noqa: RUF006
@@ -0,0 +1,230 @@
+import hashlib
+import json
+import logging
+import sqlite3
+import time
+from functools import cache
+from pathlib import Path
+
+import yt_dlp
+from yt_shared.enums import DownMediaType
+from yt_shared.schemas.media import DownMedia
+from yt_shared.utils.common import format_bytes, gen_random_str
+from yt_shared.utils.file import remove_dir
+
+from worker.core.config import settings
+from worker.core.media_files import materialize_media, relocate_media
+
+_GENERIC_IE_KEY = 'Generic'
+
+
+@cache
+def _get_extractor_classes() -> tuple[type, ...]:
+    return tuple(
+        ie
+        for ie in yt_dlp.extractor.gen_extractor_classes()
+        if ie.ie_key() != _GENERIC_IE_KEY
+    )
+
+
+def get_media_id(url: str) -> tuple[str, str] | None:
+    """Resolve extractor key and media id from URL without network requests.
+
+    Uses the same extractor matching order as yt-dlp. Returns `None` for URLs
+    handled by the generic extractor or without a media id in them.
+    """
+    for ie in _get_extractor_classes():
+        if ie.suitable(url):
+            media_id = ie.get_temp_id(url)
+            return (ie.ie_key(), media_id) if media_id else None
+    return None
+
+
+class MediaCache:
+    """Content-addressed on-disk cache of downloaded media.
+
+    Entries are keyed by extractor, media id, yt-dlp format selector and media type
+    and stored in `MEDIA_CACHE_PATH`. The SQLite index is shared by all download
+    processes and keeps entry sizes, file fingerprints and last access time used
+    for LRU eviction once the cache grows over `MEDIA_CACHE_MAX_SIZE_BYTES`.
+
+    The file fingerprint is the size and hash of the file's head and tail, so
+    integrity is checked on every hit without reading whole media files.
+    """
+
+    _INDEX_FILENAME = 'index.sqlite3'
+    _MEDIA_FILENAME = 'media.json'
+    _INDEX_TIMEOUT = 30.0
+    _FINGERPRINT_CHUNK_SIZE = 1024 * 1024
+
+    def __init__(self) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._root_path = settings.MEDIA_CACHE_PATH
+        self._max_size = settings.MEDIA_CACHE_MAX_SIZE_BYTES
+        self._conn: sqlite3.Connection | None = None
+
+    @staticmethod
+    def make_key(
+        url: str, format_selector: str, media_type: DownMediaType
+    ) -> str | None:
+        media_id = get_media_id(url)
+        if not media_id:
+            return None
+        extractor, id_ = media_id
+        return f'{extractor}|{id_}|{format_selector}|{media_type.value}'
+
+    def get(self, key: str, destination_dir: Path) -> DownMedia | None:
+        """Materialize cached media into the destination dir, `None` on miss."""
+        try:
+            return self._get(key, destination_dir)
+        except Exception:
+            self._log.exception('Failed to get "%s" from media cache', key)
+            if destination_dir.exists():
+                remove_dir(destination_dir)
+            return None
+
+    def put(self, key: str, media: DownMedia) -> None:
+        """Store downloaded media in cache. Errors are logged and never raised."""
+        try:
+            self._put(key, media)
+        except Exception:
+            self._log.exception('Failed to put "%s" to media cache', key)
+
+    def _get(self, key: str, destination_dir: Path) -> DownMedia | None:
+        conn = self._get_index()
+        row = conn.execute('SELECT files FROM entries WHERE key = ?', (key,)).fetchone()
+        if not row:
+            self._log.info('Media cache miss for "%s"', key)
+            return None
+
+        entry_path = self._get_entry_path(key)
+        if not self._is_intact(entry_path, files=json.loads(row[0])):
+            self._log.warning('Media cache entry "%s" is corrupted, removing', key)
+            self._remove_entries([key])
+            return None
+
+        media = DownMedia.model_validate_json(
+            (entry_path / self._MEDIA_FILENAME).read_bytes()
+        )
+        media = materialize_media(media, destination_dir)
+        with self._get_index() as conn:
+            conn.execute(
+                'UPDATE entries SET last_access = ? WHERE key = ?', (time.time(), key)
+            )
+        self._log.info('Media cache hit for "%s"', key)
+        return media
+
+    def _put(self, key: str, media: DownMedia) -> None:
+        files = {
+            path.name: self._make_fingerprint(path)
+            for path in media.root_path.iterdir()
+            if path.is_file()
+        }
+        size = sum(size for size, _ in files.values())
+        if size > self._max_size:
+            self._log.info(
+                'Media "%s" is too big for media cache: %s', key, format_bytes(size)
+            )
+            return
+
+        entry_path = self._get_entry_path(key)
+        tmp_path = entry_path.with_name(f'{entry_path.name}-{gen_random_str()}')
+        try:
+            materialize_media(media, tmp_path)
+            (tmp_path / self._MEDIA_FILENAME).write_text(
+                relocate_media(media, entry_path).model_dump_json()
+            )
+            with self._get_index() as conn:
+                conn.execute('BEGIN IMMEDIATE')
+                if entry_path.exists():
+                    remove_dir(entry_path)
+                tmp_path.rename(entry_path)
+                conn.execute(
+                    'INSERT OR REPLACE INTO entries (key, size, files, last_access) '
+                    'VALUES (?, ?, ?, ?)',
+                    (key, size, json.dumps(files), time.time()),
+                )
+        except Exception:
+            if tmp_path.exists():
+                remove_dir(tmp_path)
+            raise
+        self._log.info('Stored "%s" in media cache [%s]', key, format_bytes(size))
+        self._evict()
+
+    def _evict(self) -> None:
+        """Remove least recently used entries until the cache fits its size limit."""
+        conn = self._get_index()
+        total_size = conn.execute('SELECT TOTAL(size) FROM entries').fetchone()[0]
+        if total_size <= self._max_size:
+            return
+
+        to_remove: list[str] = []
+        for key, size in conn.execute(
+            'SELECT key, size FROM entries ORDER BY last_access'
+        ):
+            if total_size <= self._max_size:
+                break
+            to_remove.append(key)
+            total_size -= size
+        self._log.info('Evicting %d entries from media cache', len(to_remove))
+        self._remove_entries(to_remove)
+
+    def _remove_entries(self, keys: list[str]) -> None:
+        with self._get_index() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            conn.executemany(
+                'DELETE FROM entries WHERE key = ?', [(key,) for key in keys]
+            )
+            for key in keys:
+                entry_path = self._get_entry_path(key)
+                if entry_path.exists():
+                    remove_dir(entry_path)
+
+    def _is_intact(self, entry_path: Path, files: dict[str, list]) -> bool:
+        for filename, fingerprint in files.items():
+            path = entry_path / filename
+            if not path.is_file():
+                return False
+            if self._make_fingerprint(path) != tuple(fingerprint):
+                return False
+        return True
+
+    def _make_fingerprint(self, path: Path) -> tuple[int, str]:
+        size = path.stat().st_size
+        digest = hashlib.blake2b(digest_size=16)
+        with path.open('rb') as fd:
+            digest.update(fd.read(self._FINGERPRINT_CHUNK_SIZE))
+            if size > self._FINGERPRINT_CHUNK_SIZE:
+                tail_offset = size - self._FINGERPRINT_CHUNK_SIZE
+                fd.seek(max(self._FINGERPRINT_CHUNK_SIZE, tail_offset))
+                digest.update(fd.read())
+        return size, digest.hexdigest()
+
+    def _get_entry_path(self, key: str) -> Path:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).hexdigest()
+        return self._root_path / digest
+
+    def _get_index(self) -> sqlite3.Connection:
+        """Open index lazily, since the instance is created before process fork."""
+        if self._conn is None:
+            self._root_path.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(
+                self._root_path / self._INDEX_FILENAME,
+                timeout=self._INDEX_TIMEOUT,
+                isolation_level=None,
+            )
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, size INTEGER NOT NULL, files TEXT NOT NULL, '
+                'last_access REAL NOT NULL)'
+            )
+            conn.execute(
+                'CREATE INDEX IF NOT EXISTS entries_last_access '
+                'ON entries (last_access)'
+            )
+            self._conn = conn
+        return self._conn
+
+
+media_cache = MediaCache()
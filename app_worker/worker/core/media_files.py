@@ -0,0 +1,32 @@
+from pathlib import Path
+
+from yt_shared.schemas.media import DownMedia
+from yt_shared.utils.file import transfer_file
+
+
+def materialize_media(media: DownMedia, destination_dir: Path) -> DownMedia:
+    """Place media files into the destination directory and return relocated media.
+
+    All files from the media root path are reflinked or copied, never hardlinked:
+    post-processing writes files in place, which must not change the source.
+    """
+    destination_dir.mkdir(parents=True, exist_ok=True)
+    for path in media.root_path.iterdir():
+        if path.is_file():
+            transfer_file(path, destination_dir / path.name, allow_hardlink=False)
+    return relocate_media(media, destination_dir)
+
+
+def relocate_media(media: DownMedia, destination_dir: Path) -> DownMedia:
+    """Return copy of media with all file paths pointing to the destination dir."""
+    updates: dict = {'root_path': destination_dir}
+    if media.audio:
+        updates['audio'] = media.audio.model_copy(
+            update={'directory_path': destination_dir}
+        )
+    if media.video:
+        video_updates: dict = {'directory_path': destination_dir}
+        if media.video.thumb_path:
+            video_updates['thumb_path'] = destination_dir / media.video.thumb_path.name
+        updates['video'] = media.video.model_copy(update=video_updates)
+    return media.model_copy(update=updates)
@@ -0,0 +1,443 @@
+"""In-process MP4 and WebM/Matroska header parser.
+
+Reads only container headers through mmap and returns the subset of ffprobe
+context used by the worker: format duration and stream codec names, types,
+video dimensions and H.264 pixel format. Anything not understood is reported
+as unsupported so the caller falls back to ffprobe.
+"""
+
+import logging
+import mmap
+import struct
+from collections.abc import Iterator
+from pathlib import Path
+from typing import Final
+
+_log = logging.getLogger(__name__)
+
+_MP4_FORMAT_NAME: Final[str] = 'mov,mp4,m4a,3gp,3g2,mj2'
+_MATROSKA_FORMAT_NAME: Final[str] = 'matroska,webm'
+_EBML_MAGIC: Final[bytes] = b'\x1a\x45\xdf\xa3'
+
+_MP4_VIDEO_CODECS: Final[dict[bytes, str]] = {
+    b'avc1': 'h264',
+    b'avc3': 'h264',
+    b'hvc1': 'hevc',
+    b'hev1': 'hevc',
+    b'av01': 'av1',
+    b'vp09': 'vp9',
+    b'vp08': 'vp8',
+}
+_MP4_AUDIO_CODECS: Final[dict[bytes, str]] = {
+    b'Opus': 'opus',
+    b'fLaC': 'flac',
+    b'ac-3': 'ac3',
+    b'ec-3': 'eac3',
+    b'.mp3': 'mp3',
+}
+# MPEG-4 `objectTypeIndication` values of `mp4a` sample entries.
+_MP4A_OBJECT_TYPES: Final[dict[int, str]] = {
+    0x40: 'aac',
+    0x66: 'aac',
+    0x67: 'aac',
+    0x68: 'aac',
+    0x69: 'mp3',
+    0x6B: 'mp3',
+}
+_ES_DESCRIPTOR_TAG: Final[int] = 0x03
+_DECODER_CONFIG_DESCRIPTOR_TAG: Final[int] = 0x04
+_MP4_HANDLER_TYPES: Final[dict[bytes, str]] = {b'vide': 'video', b'soun': 'audio'}
+# H.264 profiles which are always 8-bit 4:2:0: Baseline, Main, Extended and High.
+_H264_YUV420P_PROFILES: Final[frozenset[int]] = frozenset((66, 77, 88, 100))
+_H264_CODEC_NAME: Final[str] = 'h264'
+_H264_PIX_FMT: Final[str] = 'yuv420p'
+
+_MATROSKA_CODECS: Final[dict[str, str]] = {
+    'V_VP8': 'vp8',
+    'V_VP9': 'vp9',
+    'V_AV1': 'av1',
+    'V_MPEG4/ISO/AVC': 'h264',
+    'V_MPEGH/ISO/HEVC': 'hevc',
+    'A_OPUS': 'opus',
+    'A_VORBIS': 'vorbis',
+    'A_AAC': 'aac',
+    'A_MPEG/L3': 'mp3',
+    'A_FLAC': 'flac',
+    'A_AC3': 'ac3',
+    'A_EAC3': 'eac3',
+}
+_MATROSKA_TRACK_TYPES: Final[dict[int, str]] = {1: 'video', 2: 'audio'}
+
+# Matroska element ids.
+_SEGMENT = 0x18538067
+_DOC_TYPE = 0x4282
+_INFO = 0x1549A966
+_TIMECODE_SCALE = 0x2AD7B1
+_DURATION = 0x4489
+_TRACKS = 0x1654AE6B
+_TRACK_ENTRY = 0xAE
+_TRACK_TYPE = 0x83
+_CODEC_ID = 0x86
+_VIDEO = 0xE0
+_PIXEL_WIDTH = 0xB0
+_PIXEL_HEIGHT = 0xBA
+_CODEC_PRIVATE = 0x63A2
+_AUDIO = 0xE1
+_SAMPLING_FREQUENCY = 0xB5
+_CHANNELS = 0x9F
+_CLUSTER = 0x1F43B675
+_DEFAULT_TIMECODE_SCALE = 1_000_000
+
+
+class UnsupportedMediaError(Exception):
+    """Media can't be parsed in-process and must be probed with ffprobe."""
+
+
+def probe_media(file_path: Path) -> dict | None:
+    """Return ffprobe-like context of MP4 or WebM file, `None` if not supported."""
+    try:
+        with (
+            file_path.open('rb') as fd,
+            mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as buf,
+        ):
+            format_name, (duration, streams) = _parse_container(buf)
+            size = len(buf)
+    except (UnsupportedMediaError, ValueError, LookupError, struct.error) as err:
+        _log.debug('Failed to parse "%s" in-process: %s', file_path, err)
+        return None
+
+    for index, stream in enumerate(streams):
+        stream['index'] = index
+    return {
+        'streams': streams,
+        'format': {
+            'filename': str(file_path),
+            'nb_streams': len(streams),
+            'format_name': format_name,
+            'duration': _format_duration(duration),
+            'size': str(size),
+        },
+    }
+
+
+def _parse_container(buf: mmap.mmap) -> tuple[str, tuple[float, list[dict]]]:
+    if buf[:4] == _EBML_MAGIC:
+        return _MATROSKA_FORMAT_NAME, _MatroskaParser(buf).parse()
+    if buf[4:8] == b'ftyp':
+        return _MP4_FORMAT_NAME, _Mp4Parser(buf).parse()
+    raise UnsupportedMediaError('Unknown container')
+
+
+def is_faststart(file_path: Path) -> bool | None:
+    """Return whether MP4 moov box precedes media data, `None` if it's not MP4."""
+    try:
+        with (
+            file_path.open('rb') as fd,
+            mmap.mmap(fd.fileno(), 0, access=mmap.ACCESS_READ) as buf,
+        ):
+            if buf[4:8] != b'ftyp':
+                return None
+            return _Mp4Parser(buf).is_faststart()
+    except (UnsupportedMediaError, ValueError, LookupError, struct.error) as err:
+        _log.debug('Failed to find moov position of "%s": %s', file_path, err)
+    return None
+
+
+def _format_duration(duration: float) -> str:
+    return f'{duration:.6f}'
+
+
+def _get_h264_pix_fmt(avc_config: bytes) -> str:
+    """Return pixel format of H.264 stream from its decoder configuration record.
+
+    Pixel format of other profiles depends on SPS, leave it to ffprobe.
+    """
+    profile = avc_config[1]
+    if profile not in _H264_YUV420P_PROFILES:
+        raise UnsupportedMediaError(f'H.264 profile {profile}')
+    return _H264_PIX_FMT
+
+
+class _Mp4Parser:
+    _MVHD_V0_FMT = '>II'
+    _MVHD_V1_FMT = '>IQ'
+    _UNKNOWN_DURATIONS = frozenset((0, 0xFFFFFFFF, 0xFFFFFFFFFFFFFFFF))
+
+    def __init__(self, buf: mmap.mmap) -> None:
+        self._buf = buf
+
+    def parse(self) -> tuple[float, list[dict]]:
+        moov = self._find_box(0, len(self._buf), b'moov')
+        if not moov:
+            raise UnsupportedMediaError('No moov box')
+
+        duration: float | None = None
+        streams: list[dict] = []
+        for type_, start, end in self._iter_boxes(*moov):
+            if type_ == b'mvhd':
+                duration = self._parse_duration(start)
+            elif type_ == b'mvex':
+                raise UnsupportedMediaError('Fragmented MP4')
+            elif type_ == b'trak':
+                stream = self._parse_trak(start, end)
+                if stream:
+                    streams.append(stream)
+        if duration is None:
+            raise UnsupportedMediaError('No movie duration')
+        return duration, streams
+
+    def is_faststart(self) -> bool | None:
+        for type_, _, _ in self._iter_boxes(0, len(self._buf)):
+            if type_ in (b'moov', b'mdat'):
+                return type_ == b'moov'
+        return None
+
+    def _parse_trak(self, start: int, end: int) -> dict | None:
+        mdia = self._find_box(start, end, b'mdia')
+        hdlr = mdia and self._find_box(*mdia, b'hdlr')
+        if not hdlr:
+            raise UnsupportedMediaError('No track handler')
+        codec_type = _MP4_HANDLER_TYPES.get(self._buf[hdlr[0] + 8 : hdlr[0] + 12])
+        if not codec_type:
+            return None
+
+        mdhd = self._find_box(*mdia, b'mdhd')
+        stsd = self._find_path(mdia, b'minf', b'stbl', b'stsd')
+        if not mdhd or not stsd:
+            raise UnsupportedMediaError('No track media header or sample description')
+
+        # Only the first sample description is used, as ffprobe does.
+        entry_start = stsd[0] + 8
+        entry_size, fourcc = struct.unpack_from('>I4s', self._buf, entry_start)
+        entry = (entry_start + 8, entry_start + entry_size)
+        stream: dict = {
+            'codec_type': codec_type,
+            'duration': _format_duration(self._parse_duration(mdhd[0])),
+        }
+        if codec_type == 'video':
+            stream['codec_name'] = _MP4_VIDEO_CODECS.get(fourcc)
+            stream['width'], stream['height'] = struct.unpack_from(
+                '>HH', self._buf, entry[0] + 24
+            )
+            if stream['codec_name'] == _H264_CODEC_NAME:
+                # Visual sample entry fields take 78 bytes before child boxes.
+                avcc = self._find_box(entry[0] + 78, entry[1], b'avcC')
+                if not avcc:
+                    raise UnsupportedMediaError('No H.264 decoder configuration')
+                stream['pix_fmt'] = _get_h264_pix_fmt(self._buf[avcc[0] : avcc[1]])
+        else:
+            stream.update(self._parse_audio_entry(fourcc, *entry))
+        if not stream['codec_name']:
+            raise UnsupportedMediaError(f'Unknown codec {fourcc!r}')
+        return stream
+
+    def _parse_audio_entry(self, fourcc: bytes, start: int, end: int) -> dict:
+        version, channels = struct.unpack_from('>H6xH', self._buf, start + 8)
+        if version not in (0, 1):
+            raise UnsupportedMediaError(f'Audio sample entry version {version}')
+        sample_rate = struct.unpack_from('>I', self._buf, start + 24)[0] >> 16
+        codec_name = _MP4_AUDIO_CODECS.get(fourcc)
+        if fourcc == b'mp4a':
+            # Version 1 entry has 16 more bytes of QuickTime sound fields.
+            children_start = start + (44 if version else 28)
+            esds = self._find_box(children_start, end, b'esds')
+            codec_name = esds and self._parse_esds_codec(esds[0])
+        return {
+            'codec_name': codec_name,
+            'channels': channels,
+            'sample_rate': str(sample_rate),
+        }
+
+    def _parse_esds_codec(self, start: int) -> str | None:
+        offset = start + 4
+        if self._buf[offset] != _ES_DESCRIPTOR_TAG:
+            return None
+        offset = self._skip_descriptor_length(offset + 1)
+        flags = self._buf[offset + 2]
+        offset += 3
+        if flags & 0x80:
+            offset += 2
+        if flags & 0x40:
+            offset += 1 + self._buf[offset]
+        if flags & 0x20:
+            offset += 2
+        if self._buf[offset] != _DECODER_CONFIG_DESCRIPTOR_TAG:
+            return None
+        offset = self._skip_descriptor_length(offset + 1)
+        return _MP4A_OBJECT_TYPES.get(self._buf[offset])
+
+    def _skip_descriptor_length(self, offset: int) -> int:
+        for _ in range(4):
+            offset += 1
+            if not self._buf[offset - 1] & 0x80:
+                break
+        return offset
+
+    def _parse_duration(self, start: int) -> float:
+        """Return duration in seconds of `mvhd` or `mdhd` box."""
+        if self._buf[start] == 1:
+            timescale, duration = struct.unpack_from(
+                self._MVHD_V1_FMT, self._buf, start + 20
+            )
+        else:
+            timescale, duration = struct.unpack_from(
+                self._MVHD_V0_FMT, self._buf, start + 12
+            )
+        if not timescale or duration in self._UNKNOWN_DURATIONS:
+            raise UnsupportedMediaError('Unknown duration')
+        return duration / timescale
+
+    def _find_path(
+        self, parent: tuple[int, int], *types: bytes
+    ) -> tuple[int, int] | None:
+        box: tuple[int, int] | None = parent
+        for type_ in types:
+            box = box and self._find_box(*box, type_)
+        return box
+
+    def _find_box(self, start: int, end: int, type_: bytes) -> tuple[int, int] | None:
+        for box_type, box_start, box_end in self._iter_boxes(start, end):
+            if box_type == type_:
+                return box_start, box_end
+        return None
+
+    def _iter_boxes(self, start: int, end: int) -> Iterator[tuple[bytes, int, int]]:
+        """Yield type, payload start and end offsets of boxes in the range."""
+        offset = start
+        while offset + 8 <= end:
+            size, type_ = struct.unpack_from('>I4s', self._buf, offset)
+            header_size = 8
+            if size == 1:
+                size = struct.unpack_from('>Q', self._buf, offset + 8)[0]
+                header_size = 16
+            elif size == 0:
+                size = end - offset
+            if size < header_size or offset + size > end:
+                raise UnsupportedMediaError(f'Invalid size of box {type_!r}')
+            yield type_, offset + header_size, offset + size
+            offset += size
+
+
+class _MatroskaParser:
+    def __init__(self, buf: mmap.mmap) -> None:
+        self._buf = buf
+
+    def parse(self) -> tuple[float, list[dict]]:
+        elements = self._iter_elements(0, len(self._buf))
+        _, header_start, header_end = next(elements)
+        header = self._read_children(header_start, header_end)
+        doc_type = self._read_string(*header[_DOC_TYPE])
+        if doc_type not in ('webm', 'matroska'):
+            raise UnsupportedMediaError(f'Unknown document type {doc_type}')
+        segment = next((el for el in elements if el[0] == _SEGMENT), None)
+        if not segment:
+            raise UnsupportedMediaError('No segment')
+
+        duration: float | None = None
+        streams: list[dict] | None = None
+        for id_, start, end in self._iter_elements(segment[1], segment[2]):
+            if id_ == _INFO:
+                duration = self._parse_info(start, end)
+            elif id_ == _TRACKS:
+                streams = self._parse_tracks(start, end)
+            elif id_ == _CLUSTER:
+                break
+            if duration is not None and streams is not None:
+                return duration, streams
+        raise UnsupportedMediaError('No segment info or tracks before clusters')
+
+    def _parse_info(self, start: int, end: int) -> float:
+        values = self._read_children(start, end)
+        duration = values.get(_DURATION)
+        if not duration:
+            raise UnsupportedMediaError('Unknown duration')
+        timecode_scale = _DEFAULT_TIMECODE_SCALE
+        if _TIMECODE_SCALE in values:
+            timecode_scale = self._read_uint(*values[_TIMECODE_SCALE])
+        return self._read_float(*duration) * timecode_scale / 1e9
+
+    def _parse_tracks(self, start: int, end: int) -> list[dict]:
+        streams = []
+        for id_, entry_start, entry_end in self._iter_elements(start, end):
+            if id_ != _TRACK_ENTRY:
+                continue
+            values = self._read_children(entry_start, entry_end)
+            track_type = self._read_uint(*values[_TRACK_TYPE])
+            codec_type = _MATROSKA_TRACK_TYPES.get(track_type)
+            if not codec_type:
+                continue
+
+            codec_id = self._read_string(*values[_CODEC_ID])
+            # AAC may have a profile suffix, e.g. `A_AAC/MPEG4/LC`.
+            codec_name = _MATROSKA_CODECS.get(codec_id) or (
+                'aac' if codec_id.startswith('A_AAC') else None
+            )
+            if not codec_name:
+                raise UnsupportedMediaError(f'Unknown codec {codec_id}')
+            stream: dict = {'codec_type': codec_type, 'codec_name': codec_name}
+            if codec_type == 'video':
+                video = self._read_children(*values[_VIDEO])
+                stream['width'] = self._read_uint(*video[_PIXEL_WIDTH])
+                stream['height'] = self._read_uint(*video[_PIXEL_HEIGHT])
+                if codec_name == _H264_CODEC_NAME:
+                    codec_private = values[_CODEC_PRIVATE]
+                    stream['pix_fmt'] = _get_h264_pix_fmt(
+                        self._buf[codec_private[0] : codec_private[1]]
+                    )
+            elif _AUDIO in values:
+                audio = self._read_children(*values[_AUDIO])
+                if _CHANNELS in audio:
+                    stream['channels'] = self._read_uint(*audio[_CHANNELS])
+                if _SAMPLING_FREQUENCY in audio:
+                    sample_rate = self._read_float(*audio[_SAMPLING_FREQUENCY])
+                    stream['sample_rate'] = str(int(sample_rate))
+            streams.append(stream)
+        return streams
+
+    def _read_children(self, start: int, end: int) -> dict[int, tuple[int, int]]:
+        return {
+            id_: (el_start, el_end)
+            for id_, el_start, el_end in self._iter_elements(start, end)
+        }
+
+    def _iter_elements(self, start: int, end: int) -> Iterator[tuple[int, int, int]]:
+        """Yield id, data start and end offsets of elements in the range."""
+        offset = start
+        while offset < end:
+            id_, offset = self._read_vint(offset, keep_marker=True)
+            size_length = self._get_vint_length(offset)
+            size, offset = self._read_vint(offset, keep_marker=False)
+            # All size bits set means unknown size, e.g. of live stream segment.
+            is_unknown_size = size == (1 << (7 * size_length)) - 1
+            data_end = end if is_unknown_size else offset + size
+            if data_end > end:
+                raise UnsupportedMediaError(f'Invalid size of element {id_:#x}')
+            yield id_, offset, data_end
+            offset = data_end
+
+    def _get_vint_length(self, offset: int) -> int:
+        first = self._buf[offset]
+        if not first:
+            raise UnsupportedMediaError('Invalid variable size integer')
+        return 9 - first.bit_length()
+
+    def _read_vint(self, offset: int, keep_marker: bool) -> tuple[int, int]:
+        length = self._get_vint_length(offset)
+        value = self._buf[offset]
+        if not keep_marker:
+            value &= 0xFF >> length
+        for byte in self._buf[offset + 1 : offset + length]:
+            value = value << 8 | byte
+        return value, offset + length
+
+    def _read_uint(self, start: int, end: int) -> int:
+        return int.from_bytes(self._buf[start:end], byteorder='big')
+
+    def _read_float(self, start: int, end: int) -> float:
+        fmt = {4: '>f', 8: '>d'}.get(end - start)
+        if not fmt:
+            raise UnsupportedMediaError('Invalid float size')
+        return struct.unpack_from(fmt, self._buf, start)[0]
+
+    def _read_string(self, start: int, end: int) -> str:
+        return self._buf[start:end].rstrip(b'\x00').decode('ascii')
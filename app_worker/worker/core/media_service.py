@@ -1,80 +1,113 @@
 import asyncio
 import logging
-import shutil
 import time
 from collections.abc import Coroutine
 from pathlib import Path
 from typing import Any
-from urllib.parse import urlsplit
 
+from sqlalchemy.exc import NoResultFound
 from yt_shared.enums import DownMediaType, TaskStatus
 from yt_shared.models import Task
 from yt_shared.repositories.task import TaskRepository
 from yt_shared.schemas.media import BaseMedia, DownMedia, InbMediaPayload, Video
 from yt_shared.utils.common import gen_random_str
-from yt_shared.utils.file import remove_dir
+from yt_shared.utils.file import remove_dir, transfer_file
 from yt_shared.utils.tasks.tasks import create_task
 
+from worker.core.cancellation import CancellationToken, cancellation_registry
 from worker.core.config import settings
-from worker.core.downloader import MediaDownloader
-from worker.core.exceptions import DownloadVideoServiceError
+from worker.core.download_engine import DownloadEngine
+from worker.core.exceptions import (
+    CancelledVideoServiceError,
+    DownloadVideoServiceError,
+    FinishedVideoServiceError,
+)
+from worker.core.post_process_dag import DagStep, PostProcessDag
+from worker.core.single_flight import single_flight
 from worker.core.tasks.encode import EncodeToH264Task
-from worker.core.tasks.ffprobe_context import GetFfprobeContextTask
+from worker.core.tasks.ffprobe_service import FfprobeService
+from worker.core.tasks.fit_to_size import FitToSizeTask
 from worker.core.tasks.thumbnail import MakeThumbnailTask
+from worker.core.thumbnail_strategy import ThumbnailStrategy
+from worker.enums import PostProcessArtifact, ResourceClass
 from ytdl_opts.per_host._base import AbstractHostConfig
 from ytdl_opts.per_host._registry import HostConfRegistry
 
 
 class MediaService:
+    _PROCESSABLE_STATUSES = frozenset((TaskStatus.PENDING, TaskStatus.PROCESSING))
+
     def __init__(
         self,
         media_payload: InbMediaPayload,
-        downloader: MediaDownloader,
+        download_engine: DownloadEngine,
         task_repository: TaskRepository,
     ) -> None:
         self._log = logging.getLogger(self.__class__.__name__)
-        self._downloader = downloader
+        self._download_engine = download_engine
         self._repository = task_repository
         self._media_payload = media_payload
 
         self._task: Task | None = None
+        self._cancellation_token: CancellationToken | None = None
+        self._probe_service: FfprobeService | None = None
 
-    async def process(self) -> tuple[DownMedia | None, Task | None]:
+    async def process(self) -> tuple[DownMedia, Task]:
         self._task = await self._repository.get_or_create_task(self._media_payload)
-        if self._task.status != TaskStatus.PENDING.value:
-            return None, None
-        return (await self._process(), self._task)
+        if self._task.status is TaskStatus.CANCELLED:
+            raise CancelledVideoServiceError(
+                message='Task was cancelled', task=self._task
+            )
+        # Processing task is redelivered after worker restart, resume it.
+        if self._task.status not in self._PROCESSABLE_STATUSES:
+            raise FinishedVideoServiceError(
+                message=f'Task is already {self._task.status}', task=self._task
+            )
+        with cancellation_registry.track(self._task.id) as token:
+            self._cancellation_token = token
+            self._probe_service = FfprobeService(cancellation_token=token)
+            try:
+                return (await self._process(), self._task)
+            except NoResultFound:
+                self._log.info('Task "%s" was deleted', self._task.id)
+                raise CancelledVideoServiceError(
+                    message='Task was deleted', task=self._task
+                ) from None
 
     async def _process(self) -> DownMedia:
         host_conf = self._get_host_conf()
         await self._repository.save_as_processing(self._task)
         media = await self._start_download(host_conf=host_conf)
         try:
+            self._cancellation_token.raise_if_cancelled()
             await self._post_process_media(media=media, host_conf=host_conf)
         except Exception:
             self._log.exception('Failed to post-process media %s', media)
             self._err_file_cleanup(media)
+            await self._handle_cancellation()
             raise
         return media
 
     def _get_host_conf(self) -> AbstractHostConfig:
         url = self._task.url
-        host_to_cls_map = HostConfRegistry.get_host_to_cls_map()
-        host_cls = host_to_cls_map.get(urlsplit(url).netloc, host_to_cls_map[None])
-        return host_cls(url=url)
+        return HostConfRegistry.get_host_cls(url)(url=url)
 
     async def _start_download(self, host_conf: AbstractHostConfig) -> DownMedia:
         try:
-            return await asyncio.get_running_loop().run_in_executor(
-                None,
-                lambda: self._downloader.download(
-                    host_conf=host_conf, media_payload=self._media_payload
+            return await single_flight.run(
+                media_payload=self._media_payload,
+                download=lambda: self._download_engine.download(
+                    host_conf=host_conf,
+                    media_payload=self._media_payload,
+                    task_id=self._task.id,
                 ),
+                cancellation_token=self._cancellation_token,
             )
         except Exception as err:
             self._log.exception(
                 'Failed to download media. Context: %s', self._media_payload
             )
+            await self._handle_cancellation()
             await self._handle_download_exception(err)
             raise DownloadVideoServiceError(message=str(err), task=self._task) from None
 
@@ -100,54 +133,106 @@ class MediaService:
     async def _post_process_video(
         self, media: DownMedia, host_conf: AbstractHostConfig
     ) -> None:
-        """Post-process downloaded media files, e.g. make thumbnail and copy to storage."""
+        """Encode, fit to the size limit, thumbnail and copy video to storage."""
         video = media.video
-        # yt-dlp's 'info-meta' may not contain all needed video metadata.
-        if not all([video.duration, video.height, video.width]):
-            # TODO: Move to higher level and re-raise as DownloadVideoServiceError with task,
-            # TODO: or create new exception type.
-            try:
-                await self._set_probe_ctx(video)
-            except RuntimeError as err:
-                raise DownloadVideoServiceError(
-                    message=str(err), task=self._task
-                ) from None
-
-        coro_tasks = []
-
-        video_ar = video.aspect_ratio
-        thumb_ar = video.thumb_aspect_ratio
-        if not video.thumb_path or all([video_ar, thumb_ar, video_ar != thumb_ar]):
-            thumb_path = Path(media.root_path) / Path(video.thumb_name)
-            coro_tasks.append(
-                self._create_thumb_task(
-                    file_path=video.current_filepath,
-                    thumb_path=thumb_path,
-                    duration=video.duration,
-                    video_ctx=video,
+        steps = [
+            DagStep(
+                name='probe',
+                run=lambda: self._fill_video_ctx(video),
+                provides=(PostProcessArtifact.PROBE,),
+                resource=ResourceClass.IO,
+            ),
+            DagStep(
+                name='fit_to_size',
+                run=lambda: self._fit_to_size(media),
+                requires=(PostProcessArtifact.PROBE,),
+                optional_requires=(PostProcessArtifact.ENCODED_FILE,),
+                provides=(PostProcessArtifact.FINAL_FILE,),
+                resource=ResourceClass.CPU,
+            ),
+            DagStep(
+                name='thumbnail',
+                run=lambda: self._make_thumbnail(media),
+                requires=(PostProcessArtifact.PROBE, PostProcessArtifact.FINAL_FILE),
+                provides=(PostProcessArtifact.THUMBNAIL,),
+                resource=ResourceClass.CPU,
+            ),
+            DagStep(
+                name='save_file',
+                run=lambda: self._save_file(media),
+                requires=(
+                    PostProcessArtifact.FINAL_FILE,
+                    PostProcessArtifact.THUMBNAIL,
+                ),
+                optional_requires=(PostProcessArtifact.STORAGE_COPY,),
+            ),
+        ]
+        if host_conf.ENCODE_VIDEO:
+            encode_task = EncodeToH264Task(
+                media=media,
+                cmd_tpl=host_conf.FFMPEG_VIDEO_OPTS,
+                probe_service=self._probe_service,
+                cancellation_token=self._cancellation_token,
+            )
+            steps.append(
+                DagStep(
+                    name='encode',
+                    run=encode_task.run,
+                    requires=(PostProcessArtifact.PROBE,),
+                    provides=(PostProcessArtifact.ENCODED_FILE,),
+                    resource=ResourceClass.CPU,
                 )
             )
-
         if self._media_payload.save_to_storage:
-            coro_tasks.append(self._create_copy_file_task(video))
-
-        if host_conf.ENCODE_VIDEO:
-            coro_tasks.append(
-                create_task(
-                    EncodeToH264Task(
-                        media=media, cmd_tpl=host_conf.FFMPEG_VIDEO_OPTS
-                    ).run(),
-                    task_name=EncodeToH264Task.__class__.__name__,
-                    logger=self._log,
-                    exception_message='Task "%s" raised an exception',
-                    exception_message_args=(EncodeToH264Task.__class__.__name__,),
+            steps.append(
+                DagStep(
+                    name='copy_to_storage',
+                    run=lambda: self._copy_file_to_storage(video),
+                    requires=(PostProcessArtifact.FINAL_FILE,),
+                    provides=(PostProcessArtifact.STORAGE_COPY,),
+                    resource=ResourceClass.IO,
                 )
             )
 
-        await asyncio.gather(*coro_tasks)
+        await PostProcessDag(steps).run()
 
+    async def _fill_video_ctx(self, video: Video) -> None:
+        # yt-dlp's 'info-meta' may not contain all needed video metadata.
+        if all([video.duration, video.height, video.width]):
+            return
+        # TODO: Move to higher level and re-raise as DownloadVideoServiceError with task,
+        # TODO: or create new exception type.
+        try:
+            await self._set_probe_ctx(video)
+        except RuntimeError as err:
+            raise DownloadVideoServiceError(message=str(err), task=self._task) from None
+
+    async def _fit_to_size(self, media: DownMedia) -> None:
+        max_file_size = self._media_payload.max_file_size
+        if not settings.FIT_TO_SIZE_ENABLED or not max_file_size:
+            return
+        await FitToSizeTask(
+            media=media,
+            max_file_size=max_file_size,
+            probe_service=self._probe_service,
+            cancellation_token=self._cancellation_token,
+        ).run()
+
+    async def _make_thumbnail(self, media: DownMedia) -> None:
+        video = media.video
+        if not ThumbnailStrategy.needs_generation(video):
+            return
+        await MakeThumbnailTask(
+            Path(media.root_path) / Path(video.thumb_name),
+            video.current_filepath,
+            duration=video.duration,
+            video_ctx=video,
+            cancellation_token=self._cancellation_token,
+        ).run()
+
+    async def _save_file(self, media: DownMedia) -> None:
         file = await self._repository.save_file(self._task, media.video, media.meta)
-        video.orm_file_id = file.id
+        media.video.orm_file_id = file.id
 
     async def _post_process_audio(
         self,
@@ -162,7 +247,7 @@ class MediaService:
         media.audio.orm_file_id = file.id
 
     async def _set_probe_ctx(self, video: Video) -> None:
-        probe_ctx = await GetFfprobeContextTask(video.current_filepath).run()
+        probe_ctx = await self._probe_service.get_context(video.current_filepath)
         if not probe_ctx:
             return
 
@@ -189,19 +274,6 @@ class MediaService:
             exception_message_args=(task_name,),
         )
 
-    def _create_thumb_task(
-        self, file_path: Path, thumb_path: Path, duration: float, video_ctx: Video
-    ) -> asyncio.Task:
-        return create_task(
-            MakeThumbnailTask(
-                thumb_path, file_path, duration=duration, video_ctx=video_ctx
-            ).run(),
-            task_name=MakeThumbnailTask.__class__.__name__,
-            logger=self._log,
-            exception_message='Task "%s" raised an exception',
-            exception_message_args=(MakeThumbnailTask.__class__.__name__,),
-        )
-
     async def _copy_file_to_storage(self, file: BaseMedia) -> None:
         dst = settings.STORAGE_PATH / file.current_filename
         if dst.is_file():
@@ -213,7 +285,12 @@ class MediaService:
             self._log.warning('Adding current timestamp to filename: %s', dst)
 
         self._log.info('Copying "%s" to storage "%s"', file.current_filepath, dst)
-        await asyncio.to_thread(shutil.copy2, file.current_filepath, dst)
+        await asyncio.to_thread(
+            transfer_file,
+            file.current_filepath,
+            dst,
+            fsync=settings.STORAGE_FSYNC_POLICY,
+        )
         file.mark_as_saved_to_storage(storage_path=dst)
 
     def _err_file_cleanup(self, video: DownMedia) -> None:
@@ -221,5 +298,15 @@ class MediaService:
         self._log.info('Performing error cleanup: removing %s', video.root_path)
         remove_dir(video.root_path)
 
+    async def _handle_cancellation(self) -> None:
+        """Save task as cancelled and stop processing if it was cancelled."""
+        if not self._cancellation_token.is_cancelled:
+            return
+        self._log.info('Task "%s" was cancelled', self._task.id)
+        await self._repository.save_as_cancelled(self._task)
+        raise CancelledVideoServiceError(
+            message='Task was cancelled', task=self._task
+        ) from None
+
     async def _handle_download_exception(self, err: Exception) -> None:
         await self._repository.save_as_failed(task=self._task, error_message=str(err))
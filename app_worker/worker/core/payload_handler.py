@@ -1,6 +1,8 @@
 import logging
 import traceback
 
+from aio_pika.exceptions import AMQPConnectionError
+from sqlalchemy import exc as sa_exc
 from yt_dlp import version as ytdlp_version
 from yt_shared.db.session import get_db
 from yt_shared.models import Task
@@ -10,9 +12,27 @@ from yt_shared.schemas.error import ErrorDownloadGeneralPayload, ErrorDownloadPa
 from yt_shared.schemas.media import DownMedia, InbMediaPayload
 from yt_shared.schemas.success import SuccessDownloadPayload
 
-from worker.core.downloader import MediaDownloader
-from worker.core.exceptions import DownloadVideoServiceError, GeneralVideoServiceError
+from worker.core.download_engine import download_engine
+from worker.core.exceptions import (
+    CancelledVideoServiceError,
+    DownloadVideoServiceError,
+    FinishedVideoServiceError,
+    GeneralVideoServiceError,
+    TransientProcessingError,
+)
 from worker.core.media_service import MediaService
+from worker.core.playlist_service import PlaylistService
+from worker.core.result_store import result_store
+
+# Failures of the infrastructure rather than of the media, worth retrying later.
+_TRANSIENT_ERRORS = (
+    sa_exc.OperationalError,
+    sa_exc.InterfaceError,
+    sa_exc.TimeoutError,
+    AMQPConnectionError,
+    ConnectionError,
+    TimeoutError,
+)
 
 
 class InboundPayloadHandler:
@@ -21,15 +41,30 @@ class InboundPayloadHandler:
         self._log = logging.getLogger(self.__class__.__name__)
         self._rmq_publisher = RmqPublisher()
 
-    async def handle(self, media_payload: InbMediaPayload) -> None:
+    async def handle(
+        self, media_payload: InbMediaPayload, is_last_attempt: bool = True
+    ) -> None:
         """Handle the inbound media payload.
 
         Args:
             media_payload (InbMediaPayload): The inbound media payload to handle.
+            is_last_attempt (bool): Whether transient failures are reported to the
+                user, as they won't be retried.
+
+        Raises:
+            TransientProcessingError: If processing failed on an infrastructure
+                error, which may be gone on the next attempt.
 
         """
         try:
             await self._handle(media_payload)
+        except _TRANSIENT_ERRORS as err:
+            self._log.warning(
+                'Transient failure processing "%s": %r', media_payload.url, err
+            )
+            if is_last_attempt:
+                await self._send_general_error(err, media_payload)
+            raise TransientProcessingError from err
         except Exception as err:
             await self._send_general_error(err, media_payload)
 
@@ -41,26 +76,53 @@ class InboundPayloadHandler:
 
         """
         async for session in get_db():
+            if media_payload.fan_out_playlist:
+                playlist_service = PlaylistService(
+                    media_payload=media_payload,
+                    download_engine=download_engine,
+                    task_repository=TaskRepository(db=session),
+                    publisher=self._rmq_publisher,
+                )
+                try:
+                    if await playlist_service.process():
+                        return
+                except DownloadVideoServiceError as err:
+                    await self._send_failed_video_download_task(err, media_payload)
+                    return
+
             media_service = MediaService(
                 media_payload=media_payload,
-                downloader=MediaDownloader(),
+                download_engine=download_engine,
                 task_repository=TaskRepository(db=session),
             )
             try:
                 media, task = await media_service.process()
+            except CancelledVideoServiceError as err:
+                self._log.info('Stopped processing of cancelled task "%s"', err.task.id)
+                return
+            except FinishedVideoServiceError as err:
+                await self._handle_redelivered_task(err.task)
+                return
             except DownloadVideoServiceError as err:
                 await self._send_failed_video_download_task(err, media_payload)
                 return
 
-            if not media or not task:
-                err_msg = (
-                    f'Media or task is None, cannot proceed: '
-                    f'media - {media}, task - {task}'
-                )
-                self._log.error(err_msg)
-                raise RuntimeError(err_msg)
             await self._send_finished_task(task, media, media_payload)
 
+    async def _handle_redelivered_task(self, task: Task) -> None:
+        """Re-send result of the finished task if it may not have been published.
+
+        Args:
+            task (Task): The task finished before its message was acknowledged.
+
+        """
+        success_payload = result_store.load(task.id)
+        if not success_payload:
+            self._log.info('Skipping redelivered %s task "%s"', task.status, task.id)
+            return
+        self._log.info('Re-sending result of redelivered task "%s"', task.id)
+        await self._publish_finished_task(success_payload)
+
     async def _send_finished_task(
         self, task: Task, media: DownMedia, media_payload: InbMediaPayload
     ) -> None:
@@ -82,7 +144,16 @@ class InboundPayloadHandler:
             context=media_payload,
             yt_dlp_version=ytdlp_version.__version__,
         )
-        await self._rmq_publisher.send_download_finished(success_payload)
+        # Kept until published, in case the message is redelivered meanwhile.
+        result_store.save(success_payload)
+        await self._publish_finished_task(success_payload)
+
+    async def _publish_finished_task(
+        self, success_payload: SuccessDownloadPayload
+    ) -> None:
+        if not await self._rmq_publisher.send_download_finished(success_payload):
+            raise ConnectionError('Broker did not confirm the finished task message')
+        result_store.remove(success_payload.task_id)
 
     async def _send_failed_video_download_task(
         self, err: DownloadVideoServiceError, media_payload: InbMediaPayload
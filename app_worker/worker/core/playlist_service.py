@@ -0,0 +1,116 @@
+import logging
+import uuid
+from typing import TYPE_CHECKING
+
+from yt_shared.enums import TaskStatus
+from yt_shared.rabbit.publisher import RmqPublisher
+from yt_shared.repositories.task import TaskRepository
+from yt_shared.schemas.media import InbMediaPayload
+
+from worker.core.download_engine import DownloadEngine
+from worker.core.exceptions import DownloadVideoServiceError
+from ytdl_opts.per_host._base import AbstractHostConfig
+from ytdl_opts.per_host._registry import HostConfRegistry
+
+if TYPE_CHECKING:
+    from yt_shared.models import Task
+
+
+class PlaylistService:
+    """Fan out playlist entries to child tasks downloaded by any worker in parallel.
+
+    Child task ids are derived from the parent task id and entry URL, so a
+    redelivered parent payload doesn't create duplicate children. The parent task
+    stays in processing status until all children are finished.
+    """
+
+    def __init__(
+        self,
+        media_payload: InbMediaPayload,
+        download_engine: DownloadEngine,
+        task_repository: TaskRepository,
+        publisher: RmqPublisher,
+    ) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._media_payload = media_payload
+        self._download_engine = download_engine
+        self._repository = task_repository
+        self._publisher = publisher
+
+        self._task: Task | None = None
+
+    async def process(self) -> bool:
+        """Fan out playlist, return `False` if URL is not a playlist."""
+        self._task = await self._repository.get_or_create_task(self._media_payload)
+        if self._task.status not in (TaskStatus.PENDING, TaskStatus.PROCESSING):
+            return True
+
+        try:
+            entries = await self._download_engine.extract_playlist_entries(
+                host_conf=self._get_host_conf(),
+                media_type=self._media_payload.download_media_type,
+            )
+        except Exception as err:
+            self._log.exception('Failed to extract playlist %s', self._task.url)
+            await self._repository.save_as_failed(self._task, error_message=str(err))
+            raise DownloadVideoServiceError(message=str(err), task=self._task) from None
+
+        if entries is None:
+            return False
+        if not entries:
+            err_msg = 'Playlist has no entries'
+            await self._repository.save_as_failed(self._task, error_message=err_msg)
+            raise DownloadVideoServiceError(message=err_msg, task=self._task)
+
+        await self._repository.save_as_processing(self._task)
+        await self._fan_out(entries)
+        return True
+
+    async def _fan_out(self, entries: list[str]) -> None:
+        child_payloads = [
+            self._create_child_payload(url) for url in dict.fromkeys(entries)
+        ]
+        statuses = await self._repository.get_task_statuses(
+            ids=[payload.id for payload in child_payloads]
+        )
+        await self._repository.create_tasks(
+            [payload for payload in child_payloads if payload.id not in statuses]
+        )
+
+        # Children are published at least once: pending ones are re-published
+        # when the parent payload is redelivered.
+        to_publish = [
+            payload
+            for payload in child_payloads
+            if statuses.get(payload.id, TaskStatus.PENDING) is TaskStatus.PENDING
+        ]
+        self._log.info(
+            'Publishing %d of %d entries of playlist task "%s"',
+            len(to_publish),
+            len(child_payloads),
+            self._task.id,
+        )
+        results = await self._publisher.send_many_for_download(to_publish)
+        for payload, is_sent in zip(to_publish, results, strict=True):
+            if not is_sent:
+                self._log.error('Failed to publish playlist entry %s', payload.url)
+                child = await self._repository.get_or_create_task(payload)
+                await self._repository.save_as_failed(
+                    child, error_message='Failed to publish to message broker'
+                )
+
+    def _create_child_payload(self, url: str) -> InbMediaPayload:
+        return self._media_payload.model_copy(
+            update={
+                'id': uuid.uuid5(self._task.id, url),
+                'url': url,
+                'original_url': url,
+                'custom_filename': None,
+                'fan_out_playlist': False,
+                'parent_id': self._task.id,
+            }
+        )
+
+    def _get_host_conf(self) -> AbstractHostConfig:
+        url = self._task.url
+        return HostConfRegistry.get_host_cls(url)(url=url)
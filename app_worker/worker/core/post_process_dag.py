@@ -0,0 +1,197 @@
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from collections.abc import AsyncIterator, Awaitable, Callable, Sequence
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from graphlib import TopologicalSorter
+from typing import Any
+
+from worker.core.config import settings
+from worker.enums import PostProcessArtifact, ResourceClass, StepStatus
+
+
+@dataclass
+class DagStep:
+    """Post-processing step.
+
+    `optional_requires` are waited for only if some step provides them, e.g. the
+    encoded file when encoding is disabled for the host.
+    """
+
+    name: str
+    run: Callable[[], Awaitable[Any]]
+    requires: tuple[PostProcessArtifact, ...] = ()
+    optional_requires: tuple[PostProcessArtifact, ...] = ()
+    provides: tuple[PostProcessArtifact, ...] = ()
+    resource: ResourceClass | None = None
+
+    @property
+    def dependencies(self) -> tuple[PostProcessArtifact, ...]:
+        return self.requires + self.optional_requires
+
+
+@dataclass
+class StepTiming:
+    """Step timings in seconds since the DAG start."""
+
+    name: str
+    resource: ResourceClass | None
+    ready_at: float | None = None
+    started_at: float | None = None
+    finished_at: float | None = None
+    status: StepStatus | None = None
+
+    def __str__(self) -> str:
+        if self.started_at is None:
+            return f'{self.name} {self.status or "not started"}'
+        finished = '...' if self.finished_at is None else f'{self.finished_at:.2f}'
+        status = '' if self.status is StepStatus.DONE else f' {self.status}'
+        return (
+            f'{self.name} [{self.resource or "-"}] ready {self.ready_at:.2f}, '
+            f'ran {self.started_at:.2f}-{finished}{status}'
+        )
+
+
+class ResourceLimiter:
+    """Limit steps running concurrently per resource class across the worker."""
+
+    def __init__(self) -> None:
+        self._semaphores = {
+            resource: asyncio.Semaphore(limit)
+            for resource, limit in settings.POST_PROCESS_CONCURRENCY.items()
+        }
+
+    @asynccontextmanager
+    async def acquire(self, resource: ResourceClass | None) -> AsyncIterator[None]:
+        semaphore = self._semaphores.get(resource)
+        if not semaphore:
+            yield
+            return
+        async with semaphore:
+            yield
+
+
+resource_limiter = ResourceLimiter()
+
+
+class PostProcessDag:
+    """Run post-processing steps concurrently in the order of their dependencies.
+
+    A step starts once all artifacts it requires are provided. Every required
+    artifact must be provided by some step, optional ones no step provides are
+    available from the start. The first failed step cancels the others and its
+    exception is re-raised as is. Other steps are reported as cancelled if they
+    were running at that moment, or skipped if they hadn't started yet. Step
+    timings are logged when the DAG ends.
+    """
+
+    def __init__(self, steps: Sequence[DagStep]) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._steps = steps
+        self._producers = self._get_producers(steps)
+        self._validate_requirements()
+        self._validate_acyclic()
+
+    async def run(self) -> list[StepTiming]:
+        dag_run = _DagRun(self._steps, self._producers)
+        try:
+            async with asyncio.TaskGroup() as group:
+                for step, timing in zip(self._steps, dag_run.timings, strict=True):
+                    group.create_task(dag_run.run_step(step, timing), name=step.name)
+        except ExceptionGroup:
+            raise dag_run.failures[0] from None
+        finally:
+            self._log.info(
+                'Post-processing trace: %s', '; '.join(map(str, dag_run.timings))
+            )
+        return dag_run.timings
+
+    @staticmethod
+    def _get_producers(
+        steps: Sequence[DagStep],
+    ) -> dict[PostProcessArtifact, list[DagStep]]:
+        producers: dict[PostProcessArtifact, list[DagStep]] = defaultdict(list)
+        for step in steps:
+            for artifact in step.provides:
+                producers[artifact].append(step)
+        return dict(producers)
+
+    def _validate_requirements(self) -> None:
+        for step in self._steps:
+            missing = [a for a in step.requires if a not in self._producers]
+            if missing:
+                err_msg = (
+                    f'Post-processing step "{step.name}" requires artifacts no '
+                    f'step provides: {", ".join(missing)}'
+                )
+                raise ValueError(err_msg)
+
+    def _validate_acyclic(self) -> None:
+        """Raise `graphlib.CycleError` if steps depend on each other in a cycle."""
+        dependencies = {
+            step.name: {
+                producer.name
+                for artifact in step.dependencies
+                for producer in self._producers.get(artifact, ())
+            }
+            for step in self._steps
+        }
+        if len(dependencies) != len(self._steps):
+            raise ValueError('Post-processing step names must be unique')
+        TopologicalSorter(dependencies).prepare()
+
+
+class _DagRun:
+    """State of a single `PostProcessDag.run()` call."""
+
+    def __init__(
+        self,
+        steps: Sequence[DagStep],
+        producers: dict[PostProcessArtifact, list[DagStep]],
+    ) -> None:
+        self._start_time = time.monotonic()
+        self._events = {artifact: asyncio.Event() for artifact in producers}
+        self._pending_producers = {
+            artifact: len(producer_steps)
+            for artifact, producer_steps in producers.items()
+        }
+        self.timings = [StepTiming(step.name, step.resource) for step in steps]
+        self.failures: list[Exception] = []
+
+    async def run_step(self, step: DagStep, timing: StepTiming) -> None:
+        try:
+            await self._wait_and_run_step(step, timing)
+        except asyncio.CancelledError:
+            timing.status = (
+                StepStatus.SKIPPED
+                if timing.started_at is None
+                else StepStatus.CANCELLED
+            )
+            raise
+        except Exception as err:
+            # Steps failing while being cancelled come after the root failure.
+            timing.status = StepStatus.CANCELLED if self.failures else StepStatus.FAILED
+            self.failures.append(err)
+            raise
+        timing.status = StepStatus.DONE
+
+    async def _wait_and_run_step(self, step: DagStep, timing: StepTiming) -> None:
+        for artifact in step.dependencies:
+            if artifact in self._events:
+                await self._events[artifact].wait()
+        timing.ready_at = self._elapsed()
+        async with resource_limiter.acquire(step.resource):
+            timing.started_at = self._elapsed()
+            try:
+                await step.run()
+            finally:
+                timing.finished_at = self._elapsed()
+        for artifact in step.provides:
+            self._pending_producers[artifact] -= 1
+            if not self._pending_producers[artifact]:
+                self._events[artifact].set()
+
+    def _elapsed(self) -> float:
+        return time.monotonic() - self._start_time
@@ -0,0 +1,100 @@
+import logging
+from copy import deepcopy
+
+import yt_dlp
+from yt_shared.utils.common import format_bytes
+
+from worker.core.exceptions import MediaDownloaderError
+
+
+class SizePreflight:
+    """Check estimated media size before downloading it.
+
+    Media info is extracted without downloading and the size of the selected
+    formats is estimated from `filesize` or `filesize_approx`. When it exceeds
+    the allowed size, formats are re-selected with the `size` format sort limit,
+    shrinking the limit by the overshoot on every attempt. If no format fits,
+    the download fails before any media data is fetched, unless oversize media
+    is allowed to be shrunk after the download. Then the smallest format is
+    downloaded. Media of unknown size is downloaded as is.
+    """
+
+    _PLAYLIST_TYPE = 'playlist'
+    _SIZE_SORT_FIELD = 'size'
+    _MAX_ATTEMPTS = 3
+
+    def __init__(
+        self, ytdl_opts: dict, max_file_size: int, allow_oversize: bool = False
+    ) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._ytdl_opts = ytdl_opts
+        self._max_file_size = max_file_size
+        self._allow_oversize = allow_oversize
+        self.is_format_changed = False
+
+    def download(self, ytdl: yt_dlp.YoutubeDL, info: dict, url: str) -> dict | None:
+        """Download media of the extracted info within the allowed size."""
+        size = self.estimate_size(info)
+        if size is None or size <= self._max_file_size:
+            self._log.info(
+                'Estimated size of "%s" is %s, allowed %s',
+                url,
+                format_bytes(size) if size is not None else 'unknown',
+                format_bytes(self._max_file_size),
+            )
+            return ytdl.process_ie_result(info, download=True)
+        return self._download_smaller(info=info, size=size, url=url)
+
+    def estimate_size(self, info: dict) -> int | None:
+        """Return estimated size of the selected formats, `None` if unknown."""
+        if info.get('_type') == self._PLAYLIST_TYPE:
+            return None
+        sizes = [
+            fmt.get('filesize') or fmt.get('filesize_approx')
+            for fmt in info.get('requested_formats') or [info]
+        ]
+        if not all(sizes):
+            return None
+        return sum(sizes)
+
+    def _download_smaller(self, info: dict, size: int, url: str) -> dict | None:
+        size_limit = self._max_file_size
+        for _ in range(self._MAX_ATTEMPTS):
+            size_limit -= size - self._max_file_size
+            if size_limit <= 0:
+                break
+
+            with yt_dlp.YoutubeDL(self._build_opts(size_limit)) as ytdl:
+                selected = ytdl.process_ie_result(deepcopy(info), download=False)
+                size = self.estimate_size(selected)
+                self._log.info(
+                    'Re-selected format "%s" of "%s" with size limit %s: %s',
+                    selected.get('format_id'),
+                    url,
+                    format_bytes(size_limit),
+                    format_bytes(size) if size is not None else 'unknown',
+                )
+                if size is None or size <= self._max_file_size:
+                    self.is_format_changed = True
+                    return ytdl.process_ie_result(info, download=True)
+
+        err_msg = (
+            f'Estimated media size {format_bytes(size)} exceeds allowed '
+            f'{format_bytes(self._max_file_size)} and no smaller format found'
+        )
+        if not self._allow_oversize:
+            self._log.error(err_msg)
+            raise MediaDownloaderError(err_msg)
+
+        # Size sort limit falls back to the smallest format when none fits.
+        self._log.warning('%s, downloading the smallest to shrink it', err_msg)
+        self.is_format_changed = True
+        with yt_dlp.YoutubeDL(self._build_opts(self._max_file_size)) as ytdl:
+            return ytdl.process_ie_result(info, download=True)
+
+    def _build_opts(self, size_limit: int) -> dict:
+        format_sort = [
+            f'{self._SIZE_SORT_FIELD}:{size_limit}',
+            *(self._ytdl_opts.get('format_sort') or []),
+        ]
+        return {**self._ytdl_opts, 'format_sort': format_sort}
@@ -0,0 +1,98 @@
+import ctypes
+import logging
+import os
+import platform
+import resource
+from pathlib import Path
+from typing import Final, Self
+
+from pydantic import BaseModel, ConfigDict, Field, PositiveInt, model_validator
+
+from worker.enums import IoClass
+
+_log = logging.getLogger(__name__)
+
+_BYTES_IN_MB: Final[int] = 1024 * 1024
+# Python doesn't expose `ioprio_set`, so it's called by syscall number.
+_IOPRIO_SET_SYSCALLS: Final[dict[str, int]] = {'x86_64': 251, 'aarch64': 30}
+_IOPRIO_WHO_PROCESS: Final[int] = 1
+_IOPRIO_WHO_PGRP: Final[int] = 2
+_IOPRIO_CLASS_SHIFT: Final[int] = 13
+_IOPRIO_CLASSES: Final[dict[IoClass, int]] = {
+    IoClass.BEST_EFFORT: 2,
+    IoClass.IDLE: 3,
+}
+_CGROUP_PROCS_FILENAME: Final[str] = 'cgroup.procs'
+
+_IOPRIO_SET_SYSCALL = _IOPRIO_SET_SYSCALLS.get(platform.machine())
+_libc = ctypes.CDLL(None, use_errno=True)
+
+
+class ProcessPolicy(BaseModel):
+    """CPU and IO priority, rlimits and cgroup v2 placement of child processes.
+
+    Applied by the worker right after spawn, since the child of the threaded
+    worker must not run Python code between fork and exec. Priorities are set
+    for the whole process group of the child, so all its threads are covered,
+    and everything it spawns afterwards inherits the policy.
+    """
+
+    model_config = ConfigDict(extra='forbid', frozen=True)
+
+    nice: int = Field(default=0, ge=0, le=19)
+    io_class: IoClass | None = None
+    io_priority: int = Field(default=4, ge=0, le=7)
+    memory_limit_mb: PositiveInt | None = None
+    cpu_time_limit: PositiveInt | None = None
+    cgroup: Path | None = None
+
+    @model_validator(mode='after')
+    def _warn_unsupported_io_class(self) -> Self:
+        if self.io_class and not _IOPRIO_SET_SYSCALL:
+            _log.warning(
+                'Setting IO priority is not supported on %s', platform.machine()
+            )
+        return self
+
+    def apply_to_process_group(self, pid: int) -> None:
+        """Apply policy to the spawned process leading its own process group."""
+        try:
+            self._apply(pid, is_group_leader=True)
+        except ProcessLookupError:
+            _log.debug('Process %d exited before applying policy', pid)
+        except OSError:
+            _log.exception('Failed to apply process policy %s to %d', self, pid)
+
+    def apply_to_current_process(self) -> None:
+        """Apply policy to this process, inherited by every process it spawns."""
+        try:
+            # Zero pid means the calling process.
+            self._apply(0, is_group_leader=False)
+        except OSError:
+            _log.exception('Failed to apply process policy %s', self)
+
+    def _apply(self, pid: int, is_group_leader: bool) -> None:
+        if self.nice:
+            which = os.PRIO_PGRP if is_group_leader else os.PRIO_PROCESS
+            os.setpriority(which, pid, self.nice)
+        if self.io_class:
+            who = _IOPRIO_WHO_PGRP if is_group_leader else _IOPRIO_WHO_PROCESS
+            _set_io_priority(who, pid, self.io_class, self.io_priority)
+        if self.memory_limit_mb:
+            limit = self.memory_limit_mb * _BYTES_IN_MB
+            resource.prlimit(pid, resource.RLIMIT_AS, (limit, limit))
+        if self.cpu_time_limit:
+            limit = self.cpu_time_limit
+            resource.prlimit(pid, resource.RLIMIT_CPU, (limit, limit))
+        if self.cgroup:
+            (self.cgroup / _CGROUP_PROCS_FILENAME).write_text(str(pid))
+
+
+def _set_io_priority(who: int, id_: int, io_class: IoClass, level: int) -> None:
+    """Set IO priority of the process or process group."""
+    if not _IOPRIO_SET_SYSCALL:
+        return
+    ioprio = _IOPRIO_CLASSES[io_class] << _IOPRIO_CLASS_SHIFT | level
+    if _libc.syscall(_IOPRIO_SET_SYSCALL, who, id_, ioprio):
+        errno = ctypes.get_errno()
+        raise OSError(errno, os.strerror(errno))
@@ -0,0 +1,51 @@
+import logging
+import uuid
+from pathlib import Path
+
+from pydantic import ValidationError
+from yt_shared.schemas.success import SuccessDownloadPayload
+
+from worker.core.config import settings
+
+
+class ResultStore:
+    """Keep success payloads of finished tasks until they are published.
+
+    Inbound messages are acknowledged after the result is published, so a task
+    can be redelivered when it's already done. Its stored payload means the
+    result may not have been published and is re-sent, as long as the media it
+    refers to wasn't taken by the bot yet.
+    """
+
+    _DIR_NAME = 'results'
+
+    def __init__(self) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._root_path = settings.TMP_DOWNLOAD_ROOT_PATH / self._DIR_NAME
+
+    def save(self, payload: SuccessDownloadPayload) -> None:
+        self._root_path.mkdir(parents=True, exist_ok=True)
+        self._get_path(payload.task_id).write_text(
+            payload.model_dump_json(exclude={'media': {'meta'}})
+        )
+
+    def load(self, task_id: uuid.UUID) -> SuccessDownloadPayload | None:
+        path = self._get_path(task_id)
+        try:
+            return SuccessDownloadPayload.model_validate_json(path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except ValidationError:
+            # Media directory is gone once the bot handled the published result.
+            self._log.info('Stored result of task "%s" is outdated', task_id)
+            self.remove(task_id)
+            return None
+
+    def remove(self, task_id: uuid.UUID) -> None:
+        self._get_path(task_id).unlink(missing_ok=True)
+
+    def _get_path(self, task_id: uuid.UUID) -> Path:
+        return self._root_path / f'{task_id}.json'
+
+
+result_store = ResultStore()
@@ -0,0 +1,195 @@
+import asyncio
+import hashlib
+import logging
+import time
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from sqlalchemy import NullPool, text
+from sqlalchemy.ext.asyncio import AsyncConnection, create_async_engine
+from yt_shared.config import settings as shared_settings
+from yt_shared.schemas.media import DownMedia, InbMediaPayload
+from yt_shared.utils.common import gen_random_str
+from yt_shared.utils.file import remove_dir
+
+from worker.core.cancellation import CancellationToken
+from worker.core.config import settings
+from worker.core.media_files import materialize_media, relocate_media
+
+
+def normalize_url(url: str) -> str:
+    """Normalize URL so trivially different links to the same media match."""
+    parts = urlsplit(url.strip())
+    query = urlencode(sorted(parse_qsl(parts.query, keep_blank_values=True)))
+    return urlunsplit(
+        (
+            parts.scheme.lower(),
+            parts.netloc.lower().removeprefix('www.'),
+            parts.path.rstrip('/') or '/',
+            query,
+            '',
+        )
+    )
+
+
+class SingleFlight:
+    """Coalesce identical in-flight downloads across all worker containers.
+
+    Downloads are keyed by normalized URL, media type, custom filename and max file
+    size. The worker holding the Postgres advisory lock for the key is the leader:
+    it downloads the media and publishes a copy of the downloaded files in the
+    shared temporary directory. Followers wait for the lock and get their own
+    reflinks or copies of the published result instead of downloading the same
+    media again, so post-processing of one task never changes files of another.
+    If the leader failed, the next lock holder downloads the media itself.
+
+    Lock connections are held for the whole download or wait, so they come from
+    a separate engine without a pool instead of the one shared with repositories.
+    Each follower polls the lock on its own single connection with a growing
+    interval and stops waiting when its task is cancelled.
+    """
+
+    _DIR_NAME = 'single_flight'
+    _RESULT_FILENAME = 'media.json'
+    _LOCK_POLL_MIN_INTERVAL = 0.5
+    _LOCK_POLL_MAX_INTERVAL = 8.0
+    _DESTINATION_DIR_NAME_LEN = 4
+
+    def __init__(self) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._root_path = settings.TMP_DOWNLOAD_ROOT_PATH / self._DIR_NAME
+        self._downloaded_path = (
+            settings.TMP_DOWNLOAD_ROOT_PATH / settings.TMP_DOWNLOADED_DIR
+        )
+        self._lock_engine = create_async_engine(
+            shared_settings.SQLALCHEMY_DATABASE_URI_ASYNC,
+            echo=shared_settings.SQLALCHEMY_ECHO,
+            poolclass=NullPool,
+            isolation_level='AUTOCOMMIT',
+            connect_args={
+                'server_settings': {
+                    'application_name': shared_settings.APPLICATION_NAME
+                }
+            },
+        )
+
+    async def run(
+        self,
+        media_payload: InbMediaPayload,
+        download: Callable[[], Awaitable[DownMedia]],
+        cancellation_token: CancellationToken,
+    ) -> DownMedia:
+        if not settings.SINGLE_FLIGHT_ENABLED:
+            return await download()
+
+        key = self._make_key(media_payload)
+        conn = await self._acquire_lock(key, cancellation_token)
+        try:
+            media = await asyncio.to_thread(self._take_published_result, key)
+            if media:
+                self._log.info('Reusing in-flight download result for "%s"', key)
+                return media
+
+            media = await download()
+            await asyncio.to_thread(self._publish_result, key, media)
+            return media
+        finally:
+            await self._release_lock(conn, key)
+
+    @staticmethod
+    def _make_key(media_payload: InbMediaPayload) -> str:
+        return '|'.join(
+            (
+                normalize_url(media_payload.url),
+                media_payload.download_media_type.value,
+                media_payload.custom_filename or '',
+                str(media_payload.max_file_size or ''),
+            )
+        )
+
+    @staticmethod
+    def _get_digest(key: str) -> bytes:
+        return hashlib.blake2b(key.encode(), digest_size=8).digest()
+
+    def _get_lock_id(self, key: str) -> int:
+        return int.from_bytes(self._get_digest(key), byteorder='big', signed=True)
+
+    def _get_result_path(self, key: str) -> Path:
+        return self._root_path / self._get_digest(key).hex()
+
+    async def _acquire_lock(
+        self, key: str, cancellation_token: CancellationToken
+    ) -> AsyncConnection:
+        """Take advisory lock, polling it with backoff while it's taken."""
+        lock_id = self._get_lock_id(key)
+        poll_interval = self._LOCK_POLL_MIN_INTERVAL
+        conn = await self._lock_engine.connect()
+        try:
+            while not await conn.scalar(
+                text('SELECT pg_try_advisory_lock(:lock_id)'), {'lock_id': lock_id}
+            ):
+                if poll_interval == self._LOCK_POLL_MIN_INTERVAL:
+                    self._log.info('Waiting for in-flight download of "%s"', key)
+                cancellation_token.raise_if_cancelled()
+                await asyncio.sleep(poll_interval)
+                poll_interval = min(poll_interval * 2, self._LOCK_POLL_MAX_INTERVAL)
+        except BaseException:
+            await conn.close()
+            raise
+        return conn
+
+    async def _release_lock(self, conn: AsyncConnection, key: str) -> None:
+        try:
+            await conn.scalar(
+                text('SELECT pg_advisory_unlock(:lock_id)'),
+                {'lock_id': self._get_lock_id(key)},
+            )
+        except Exception:
+            # Session lock is released by Postgres when the connection is dropped.
+            self._log.exception('Failed to release advisory lock for "%s"', key)
+            await conn.invalidate()
+        finally:
+            await conn.close()
+
+    def _take_published_result(self, key: str) -> DownMedia | None:
+        result_path = self._get_result_path(key)
+        result_file = result_path / self._RESULT_FILENAME
+        if not result_file.is_file() or self._is_expired(result_file):
+            return None
+
+        media = DownMedia.model_validate_json(result_file.read_bytes())
+        destination_dir = self._downloaded_path / gen_random_str(
+            length=self._DESTINATION_DIR_NAME_LEN
+        )
+        return materialize_media(media, destination_dir)
+
+    def _publish_result(self, key: str, media: DownMedia) -> None:
+        self._remove_expired_results()
+        result_path = self._get_result_path(key)
+        tmp_path = result_path.with_name(f'{result_path.name}-{gen_random_str()}')
+        materialize_media(media, tmp_path)
+        (tmp_path / self._RESULT_FILENAME).write_text(
+            relocate_media(media, result_path).model_dump_json()
+        )
+        if result_path.exists():
+            remove_dir(result_path)
+        tmp_path.rename(result_path)
+        self._log.info('Published download result of "%s" to "%s"', key, result_path)
+
+    def _remove_expired_results(self) -> None:
+        if not self._root_path.is_dir():
+            return
+        for path in self._root_path.iterdir():
+            # Keep a margin so results being taken by followers aren't removed.
+            if path.is_dir() and self._is_expired(path, ttl_factor=2):
+                self._log.info('Removing expired download result "%s"', path)
+                remove_dir(path)
+
+    @staticmethod
+    def _is_expired(path: Path, ttl_factor: int = 1) -> bool:
+        age = time.time() - path.stat().st_mtime
+        return age > settings.SINGLE_FLIGHT_RESULT_TTL * ttl_factor
+
+
+single_flight = SingleFlight()
@@ -0,0 +1,214 @@
+import asyncio
+import logging
+import os
+import shlex
+import signal
+import time
+from collections import deque
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+
+from worker.core.cancellation import CancellationToken
+from worker.core.process_policy import ProcessPolicy
+
+LineCallback = Callable[[str], bool | None]
+
+_READ_SIZE = 64 * 1024
+_DEFAULT_BUFFER_SIZE = 64 * 1024
+
+
+def build_args(cmd_tpl: str, **kwargs) -> list[str]:
+    """Split command template to exec arguments and fill in the values.
+
+    Values are substituted after splitting, so paths with spaces or quotes
+    stay single arguments.
+    """
+    return [arg.format(**kwargs) for arg in shlex.split(cmd_tpl)]
+
+
+class RingBuffer:
+    """Bytes buffer keeping only the last `max_size` bytes written."""
+
+    def __init__(self, max_size: int) -> None:
+        self._max_size = max_size
+        self._chunks: deque[bytes] = deque()
+        self._size = 0
+        self.is_truncated = False
+
+    def write(self, data: bytes) -> None:
+        self._chunks.append(data)
+        self._size += len(data)
+        while self._size > self._max_size:
+            excess = self._size - self._max_size
+            oldest = self._chunks.popleft()
+            if len(oldest) > excess:
+                self._chunks.appendleft(oldest[excess:])
+                self._size -= excess
+            else:
+                self._size -= len(oldest)
+            self.is_truncated = True
+
+    def getvalue(self) -> bytes:
+        return b''.join(self._chunks)
+
+
+class Deadline:
+    """Deadline of a process run limited in total and without progress."""
+
+    def __init__(self, timeout: float | None, stall_timeout: float | None) -> None:
+        self._timeout = timeout
+        self._stall_timeout = stall_timeout
+        self._started_at = self._progressed_at = time.monotonic()
+
+    def mark_progress(self) -> None:
+        self._progressed_at = time.monotonic()
+
+    def get(self) -> float | None:
+        deadlines = []
+        if self._timeout is not None:
+            deadlines.append(self._started_at + self._timeout)
+        if self._stall_timeout is not None:
+            deadlines.append(self._progressed_at + self._stall_timeout)
+        return min(deadlines, default=None)
+
+
+@dataclass
+class ProcessResult:
+    args: list[str]
+    returncode: int
+    stdout: str
+    stderr: str
+    is_timed_out: bool = False
+
+    @property
+    def cmd(self) -> str:
+        return shlex.join(self.args)
+
+
+class SubprocessRunner:
+    """Run binaries without a shell, each in its own process group.
+
+    Stdout and stderr are drained concurrently while the process runs, so a
+    chatty child never blocks on a full pipe, and only the last bytes of each
+    are kept. Timeouts, cancellation of the caller and of the task kill the whole
+    process group. The optional process policy is applied right after spawn.
+    """
+
+    def __init__(
+        self,
+        cancellation_token: CancellationToken | None = None,
+        policy: ProcessPolicy | None = None,
+    ) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._cancellation_token = cancellation_token
+        self._policy = policy
+
+    async def run(  # noqa: PLR0913
+        self,
+        args: Sequence[str],
+        # Process group is killed on timeout, not just the awaiting coroutine.
+        timeout: float | None = None,  # noqa: ASYNC109
+        stall_timeout: float | None = None,
+        on_stdout_line: LineCallback | None = None,
+        on_stderr_line: LineCallback | None = None,
+        stdout_limit: int = _DEFAULT_BUFFER_SIZE,
+        stderr_limit: int = _DEFAULT_BUFFER_SIZE,
+    ) -> ProcessResult:
+        """Run process until it exits or is killed on timeout.
+
+        `timeout` limits the whole run, `stall_timeout` limits the time without
+        progress, which is reported by a line callback returning `True`.
+        """
+        token = self._cancellation_token
+        if token:
+            token.raise_if_cancelled()
+        proc = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.DEVNULL,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            start_new_session=True,
+        )
+        if self._policy:
+            self._policy.apply_to_process_group(proc.pid)
+        if token:
+            token.add_process_group(proc.pid)
+
+        deadline = Deadline(timeout, stall_timeout)
+        stdout, stderr = RingBuffer(stdout_limit), RingBuffer(stderr_limit)
+        drains = asyncio.gather(
+            self._drain(proc.stdout, stdout, on_stdout_line, deadline.mark_progress),
+            self._drain(proc.stderr, stderr, on_stderr_line, deadline.mark_progress),
+        )
+        try:
+            is_timed_out = not await self._wait_for_drains(drains, deadline)
+            if is_timed_out:
+                self._kill_process_group(proc.pid)
+                await drains
+            await proc.wait()
+        except BaseException:
+            self._kill_process_group(proc.pid)
+            drains.cancel()
+            raise
+        finally:
+            if token:
+                token.remove_process_group(proc.pid)
+
+        if token:
+            token.raise_if_cancelled()
+        if stdout.is_truncated or stderr.is_truncated:
+            self._log.warning('Output of %s was truncated', shlex.join(args))
+        return ProcessResult(
+            args=list(args),
+            returncode=proc.returncode,
+            stdout=stdout.getvalue().decode(errors='replace').strip(),
+            stderr=stderr.getvalue().decode(errors='replace').strip(),
+            is_timed_out=is_timed_out,
+        )
+
+    @staticmethod
+    async def _wait_for_drains(drains: asyncio.Future, deadline: Deadline) -> bool:
+        """Wait for the output to end, `False` if the deadline passed first."""
+        while True:
+            deadline_at = deadline.get()
+            if deadline_at is None:
+                await drains
+                return True
+            remaining = deadline_at - time.monotonic()
+            if remaining <= 0:
+                return False
+            try:
+                # Deadline may move on progress, so wait for it and check again.
+                await asyncio.wait_for(asyncio.shield(drains), timeout=remaining)
+            except TimeoutError:
+                continue
+            return True
+
+    @staticmethod
+    async def _drain(
+        stream: asyncio.StreamReader,
+        buffer: RingBuffer,
+        on_line: LineCallback | None,
+        mark_progress: Callable[[], None],
+    ) -> None:
+        pending = b''
+        while chunk := await stream.read(_READ_SIZE):
+            buffer.write(chunk)
+            if not on_line:
+                continue
+            *lines, pending = (pending + chunk).split(b'\n')
+            for line in lines:
+                if on_line(line.decode(errors='replace').rstrip('\r')):
+                    mark_progress()
+            # Don't grow on output without line breaks.
+            pending = pending[-_READ_SIZE:]
+        if on_line and pending and on_line(pending.decode(errors='replace')):
+            mark_progress()
+
+    def _kill_process_group(self, pgid: int) -> None:
+        try:
+            os.killpg(pgid, signal.SIGKILL)
+        except ProcessLookupError:
+            pass
+        else:
+            self._log.info('Killed process group %d', pgid)
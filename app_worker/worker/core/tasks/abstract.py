@@ -1,39 +1,37 @@
-import asyncio
-import os
-import signal
 from abc import ABC
+from collections.abc import Sequence
 from pathlib import Path
 
-from yt_shared.utils.common import wrap
 from yt_shared.utils.tasks.abstract import AbstractTask
 
+from worker.core.cancellation import CancellationToken
+from worker.core.config import settings
+from worker.core.subprocess_runner import ProcessResult, SubprocessRunner
+from worker.enums import ProcessKind
+
 
 class AbstractFfBinaryTask(AbstractTask, ABC):
     _CMD: str | None = None
     _CMD_TIMEOUT = 60
+    _PROCESS_KIND: ProcessKind
 
-    def __init__(self, file_path: Path) -> None:
+    def __init__(
+        self, file_path: Path, cancellation_token: CancellationToken | None = None
+    ) -> None:
         super().__init__()
         self._file_path = file_path
-        self._killpg = wrap(os.killpg)
-
-    async def _run_proc(self, cmd: str) -> asyncio.subprocess.Process | None:
-        proc = await asyncio.create_subprocess_shell(
-            cmd=cmd, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        self._cancellation_token = cancellation_token
+        self._runner = SubprocessRunner(
+            cancellation_token, policy=settings.PROCESS_POLICIES.get(self._PROCESS_KIND)
         )
-        try:
-            await asyncio.wait_for(proc.wait(), timeout=self._CMD_TIMEOUT)
-        except TimeoutError:
+
+    async def _run_proc(self, args: Sequence[str], **kwargs) -> ProcessResult | None:
+        """Run binary, `None` if it ran longer than `_CMD_TIMEOUT` and was killed."""
+        result = await self._runner.run(args, timeout=self._CMD_TIMEOUT, **kwargs)
+        if result.is_timed_out:
             self._log.error(
                 'Failed to execute %s: process ran longer than expected and was killed',
-                cmd,
+                result.cmd,
             )
-            await self._killpg(os.getpgid(proc.pid), signal.SIGINT)
             return None
-
-        return proc
-
-    @staticmethod
-    async def _get_stdout_stderr(proc: asyncio.subprocess.Process) -> tuple[str, str]:
-        stdout, stderr = await proc.stdout.read(), await proc.stderr.read()
-        return stdout.decode().strip(), stderr.decode().strip()
+        return result
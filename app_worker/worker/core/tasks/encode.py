@@ -1,21 +1,79 @@
+import asyncio
+import shlex
+import shutil
+import time
+from collections import deque
+from pathlib import Path
+
+from yt_shared.enums import EncodeDecision
 from yt_shared.schemas.media import DownMedia
 
+from worker.core.cancellation import CancellationToken
+from worker.core.config import settings
+from worker.core.encode_decision import EncodeDecisionEngine
+from worker.core.encode_scheduler import encode_scheduler
+from worker.core.exceptions import EncodeError
+from worker.core.subprocess_runner import build_args
 from worker.core.tasks.abstract import AbstractFfBinaryTask
-from worker.core.tasks.ffprobe_context import GetFfprobeContextTask
-from worker.enums import VideoCodecName, VideoCodecType
+from worker.core.tasks.ffmpeg_progress import FfmpegProgress
+from worker.core.tasks.ffprobe_service import FfprobeService
+from worker.enums import ProcessKind
 
 
 class EncodeToH264Task(AbstractFfBinaryTask):
+    """Bring video to H.264 MP4 within the worker CPU budget.
+
+    `EncodeDecisionEngine` picks between leaving the file as is, stream copy
+    remux, audio-only transcode and full encode with the host command. Videos
+    longer than `ENCODE_SEGMENT_MIN_DURATION` are fully encoded in segments in
+    parallel.
+    Instead of a fixed timeout, ffmpeg is killed when its `-progress` output time
+    doesn't advance for `ENCODE_STALL_TIMEOUT` seconds, so long encodes which
+    keep progressing are never lost. A killed or failed ffmpeg run raises
+    `EncodeError`.
+    """
+
     _EXT = 'mp4'
-    _CMD_TIMEOUT = 300
+    _PROCESS_KIND = ProcessKind.ENCODE
+    _PROGRESS_OPTS = ('-progress', 'pipe:1', '-nostats')
+    # `0:V` skips embedded cover art, MP4 can't hold e.g. WebVTT subtitles.
+    _REMUX_CMD = (
+        'ffmpeg -y -loglevel error -i "{filepath}" -map 0:V -map "0:a?" -c copy '
+        '-threads 1 -movflags +faststart "{output}"'
+    )
+    _TRANSCODE_AUDIO_CMD = (
+        'ffmpeg -y -loglevel error -i "{filepath}" -map 0:V -map "0:a?" -c:v copy '
+        '-c:a aac -b:a 192k -threads 1 -movflags +faststart "{output}"'
+    )
+    # Stream copy of video split at the first keyframes after segment time.
+    _SPLIT_CMD = (
+        'ffmpeg -y -loglevel error -i "{filepath}" -map 0:V:0 -c copy -threads 1 '
+        '-f segment -segment_time {segment_time} -reset_timestamps 1 "{output}"'
+    )
+    _CONCAT_CMD = (
+        'ffmpeg -y -loglevel error -f concat -safe 0 -i "{filepath}" '
+        '-i "{source}" -map 0:v -map "1:a?" -c copy -threads 1 '
+        '-movflags +faststart "{output}"'
+    )
+    _SOURCE_SEGMENT_TPL = 'source-%04d.mp4'
+    _SOURCE_SEGMENT_GLOB = 'source-*.mp4'
 
     def __init__(
-        self, media: DownMedia, cmd_tpl: str, check_if_in_final_format: bool = True
+        self,
+        media: DownMedia,
+        cmd_tpl: str,
+        probe_service: FfprobeService,
+        check_if_in_final_format: bool = True,
+        cancellation_token: CancellationToken | None = None,
     ) -> None:
-        super().__init__(file_path=media.video.current_filepath)
+        super().__init__(
+            file_path=media.video.current_filepath,
+            cancellation_token=cancellation_token,
+        )
         self._media = media
         self._video = media.video
         self._CMD = cmd_tpl  # lol
+        self._probe_service = probe_service
 
         self._check_if_in_final_format = check_if_in_final_format
 
@@ -23,45 +81,167 @@ class EncodeToH264Task(AbstractFfBinaryTask):
         await self._run()
 
     async def _run(self) -> None:
-        if self._check_if_in_final_format:
-            if not await self._is_already_h264():
-                await self._encode_video()
+        decision = await self._get_decision()
+        cmd_tpl = {
+            EncodeDecision.REMUX: self._REMUX_CMD,
+            EncodeDecision.TRANSCODE_AUDIO: self._TRANSCODE_AUDIO_CMD,
+            EncodeDecision.FULL_ENCODE: self._CMD,
+        }.get(decision)
+        if cmd_tpl:
+            await self._encode_video(cmd_tpl, decision)
         else:
-            await self._encode_video()
-
-    async def _is_already_h264(self) -> bool:
-        probe_ctx = await GetFfprobeContextTask(self._file_path).run()
-        stream: dict
-        for stream in probe_ctx['streams']:
-            if (
-                stream['codec_type'] == VideoCodecType.VIDEO.value
-                and stream['codec_name'] == VideoCodecName.H264.value
-            ):
-                return True
-        return False
-
-    def _get_output_path(self) -> str:
+            self._video.encode_decision = decision
+
+    async def _get_decision(self) -> EncodeDecision:
+        if not self._check_if_in_final_format:
+            return EncodeDecision.FULL_ENCODE
+        probe_ctx = await self._probe_service.get_context(self._file_path)
+        if not probe_ctx:
+            self._log.warning(
+                'Failed to probe "%s", falling back to full encode', self._file_path
+            )
+            return EncodeDecision.FULL_ENCODE
+        return await asyncio.to_thread(
+            EncodeDecisionEngine.decide, probe_ctx, self._file_path
+        )
+
+    def _get_output_path(self) -> Path:
         filename = f'{self._video.current_filename.rsplit(".", 1)[0]}-h264.{self._EXT}'
         return self._media.root_path / filename
 
-    async def _encode_video(self) -> None:
+    def _build_args(
+        self, cmd_tpl: str, output: Path, filepath: Path | None = None, **kwargs
+    ) -> list[str]:
+        binary, *args = build_args(
+            cmd_tpl, filepath=filepath or self._file_path, output=output, **kwargs
+        )
+        # Global progress options go right after the binary name.
+        return [binary, *self._PROGRESS_OPTS, *args]
+
+    async def _encode_video(self, cmd_tpl: str, decision: EncodeDecision) -> None:
         output = self._get_output_path()
-        cmd = self._CMD.format(filepath=self._file_path, output=output)
-        self._log.info('Encoding: %s', cmd)
+        start_time = time.monotonic()
+        if decision is EncodeDecision.FULL_ENCODE and await self._is_long_video():
+            out_time = await self._encode_segmented(cmd_tpl, output)
+        else:
+            out_time = await self._run_ffmpeg(self._build_args(cmd_tpl, output))
+        encode_duration = time.monotonic() - start_time
+        self._video.mark_as_converted(filepath=output)
+        self._video.encode_decision = decision
+        self._video.encode_duration = round(encode_duration, 3)
+        if encode_duration:
+            self._video.encode_speed = round(out_time / encode_duration, 3)
+        self._log.info(
+            'Finished %s of "%s" in %.1f seconds at %sx speed',
+            decision,
+            self._file_path,
+            encode_duration,
+            self._video.encode_speed,
+        )
+
+    async def _is_long_video(self) -> bool:
+        probe_ctx = await self._probe_service.get_context(self._file_path)
+        if not probe_ctx:
+            return False
+        duration = float(probe_ctx['format'].get('duration') or 0)
+        return duration >= settings.ENCODE_SEGMENT_MIN_DURATION
 
-        proc = await self._run_proc(cmd)
-        if not proc:
-            return
+    async def _encode_segmented(self, cmd_tpl: str, output: Path) -> float:
+        """Encode video split at keyframes in parallel, return output time.
+
+        Segments are encoded with the host command by a pool of workers, each
+        admitted by the scheduler, then joined with the concat demuxer and muxed
+        with the stream copied source audio.
+        """
+        segments_dir = self._media.root_path / f'{output.stem}-segments'
+        segments_dir.mkdir(exist_ok=True)
+        try:
+            split_args = self._build_args(
+                self._SPLIT_CMD,
+                output=segments_dir / self._SOURCE_SEGMENT_TPL,
+                segment_time=settings.ENCODE_SEGMENT_DURATION,
+            )
+            await self._run_ffmpeg(split_args)
+
+            sources = sorted(segments_dir.glob(self._SOURCE_SEGMENT_GLOB))
+            encoded = [
+                segments_dir / f'encoded-{index:04d}.{self._EXT}'
+                for index in range(len(sources))
+            ]
+            self._log.info('Encoding "%s" in %d segments', output, len(sources))
+            out_times = await self._encode_segments(cmd_tpl, sources, encoded)
+
+            concat_list = segments_dir / 'segments.txt'
+            concat_list.write_text(''.join(f"file '{p.name}'\n" for p in encoded))
+            concat_args = self._build_args(
+                self._CONCAT_CMD,
+                output=output,
+                filepath=concat_list,
+                source=self._file_path,
+            )
+            await self._run_ffmpeg(concat_args)
+            return sum(out_times)
+        finally:
+            shutil.rmtree(segments_dir, ignore_errors=True)
+
+    async def _encode_segments(
+        self, cmd_tpl: str, sources: list[Path], outputs: list[Path]
+    ) -> list[float]:
+        """Encode segments in parallel, the first failed one cancels the others."""
+        if not sources:
+            raise RuntimeError(f'No segments were split from {self._file_path}')
+        pending = deque(enumerate(zip(sources, outputs, strict=True)))
+        out_times = [0.0] * len(sources)
+
+        async def encode_pending() -> None:
+            while pending:
+                index, (source, segment_output) = pending.popleft()
+                args = self._build_args(cmd_tpl, output=segment_output, filepath=source)
+                out_times[index] = await self._run_ffmpeg(args)
+
+        threads = encode_scheduler.get_threads(cmd_tpl)
+        workers = min(len(sources), max(1, settings.ENCODE_CPU_THREADS // threads))
+        try:
+            async with asyncio.TaskGroup() as group:
+                for _ in range(workers):
+                    group.create_task(encode_pending())
+        except ExceptionGroup as err:
+            # Surface the failure as is, like for a single process encode.
+            raise err.exceptions[0] from err
+        return out_times
+
+    async def _run_ffmpeg(self, args: list[str]) -> float:
+        """Run ffmpeg within CPU budget, return output time."""
+        cmd = shlex.join(args)
+        threads = encode_scheduler.get_threads(cmd)
+        progress = FfmpegProgress()
+        async with encode_scheduler.acquire(threads):
+            self._log.info('Running with %d threads: %s', threads, cmd)
+            result = await self._runner.run(
+                args,
+                stall_timeout=settings.ENCODE_STALL_TIMEOUT,
+                on_stdout_line=progress.update,
+            )
+        if result.is_timed_out:
+            err_msg = (
+                f'Encode of {self._file_path} made no progress for '
+                f'{settings.ENCODE_STALL_TIMEOUT} seconds at '
+                f'{progress.out_time:.1f} seconds of output and was killed'
+            )
+            self._log.error('%s: %s', err_msg, cmd)
+            raise EncodeError(err_msg)
 
-        stdout, stderr = await self._get_stdout_stderr(proc)
         self._log.info(
-            'Process %s returncode: %d, stderr: %s', cmd, proc.returncode, stderr
+            'Process %s returncode: %d, stderr: %s',
+            cmd,
+            result.returncode,
+            result.stderr,
         )
-        if proc.returncode:
+        if result.returncode:
             err_msg = (
-                f'Failed to make video context. Is file broken? {self._file_path}?'
+                f'Failed to encode {self._file_path}, ffmpeg exited with code '
+                f'{result.returncode}. Is file broken?'
             )
             self._log.error(err_msg)
-            raise RuntimeError(err_msg)
-
-        self._video.mark_as_converted(filepath=output)
+            raise EncodeError(err_msg)
+        return progress.out_time
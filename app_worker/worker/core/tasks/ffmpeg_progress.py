@@ -0,0 +1,17 @@
+class FfmpegProgress:
+    """State of ffmpeg run parsed from its `-progress` key=value output."""
+
+    _US_IN_SECOND = 1_000_000
+
+    def __init__(self) -> None:
+        self.out_time = 0.0
+
+    def update(self, line: str) -> bool:
+        """Apply progress output line, return whether the output time advanced."""
+        key, _, value = line.strip().partition('=')
+        if key == 'out_time_us' and value.isdigit():
+            out_time = int(value) / self._US_IN_SECOND
+            if out_time > self.out_time:
+                self.out_time = out_time
+                return True
+        return False
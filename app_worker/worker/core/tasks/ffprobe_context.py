@@ -1,25 +1,33 @@
 import json
 
+from worker.core.subprocess_runner import build_args
 from worker.core.tasks.abstract import AbstractFfBinaryTask
+from worker.enums import ProcessKind
 
 
 class GetFfprobeContextTask(AbstractFfBinaryTask):
     _CMD = 'ffprobe -loglevel error -show_format -show_streams -of json "{filepath}"'
+    # Keep whole JSON of files with many streams, truncated one fails to load.
+    _STDOUT_LIMIT = 16 * 1024 * 1024
+    _PROCESS_KIND = ProcessKind.PROBE
 
     async def run(self) -> dict | None:
         return await self._get_context()
 
     async def _get_context(self) -> dict | None:
-        cmd = self._CMD.format(filepath=self._file_path)
-        proc = await self._run_proc(cmd)
-        if not proc:
+        args = build_args(self._CMD, filepath=self._file_path)
+        result = await self._run_proc(args, stdout_limit=self._STDOUT_LIMIT)
+        if not result:
             return None
 
-        stdout, stderr = await self._get_stdout_stderr(proc)
+        stdout = result.stdout
         self._log.info(
-            'Process %s returncode: %d, stderr: %s', cmd, proc.returncode, stderr
+            'Process %s returncode: %d, stderr: %s',
+            result.cmd,
+            result.returncode,
+            result.stderr,
         )
-        if proc.returncode:
+        if result.returncode:
             err_msg = (
                 f'Failed to make video context. Is file broken? {self._file_path}?'
             )
@@ -0,0 +1,53 @@
+import asyncio
+import logging
+from pathlib import Path
+
+from worker.core.cancellation import CancellationToken
+from worker.core.media_probe import probe_media
+from worker.core.tasks.ffprobe_context import GetFfprobeContextTask
+
+_FileIdentity = tuple[str, int, int, int]
+
+
+class FfprobeService:
+    """Memoize ffprobe context of files for the lifetime of a task.
+
+    MP4 and WebM headers are parsed in-process, other files and anything the
+    parser doesn't understand are probed with ffprobe. Results are keyed by path,
+    inode, size and mtime, so a file replaced by encoding is probed again.
+    Concurrent callers await the same pending probe. Failed probes are not cached.
+    """
+
+    def __init__(self, cancellation_token: CancellationToken | None = None) -> None:
+        self._log = logging.getLogger(self.__class__.__name__)
+        self._cancellation_token = cancellation_token
+        self._probes: dict[_FileIdentity, asyncio.Future[dict | None]] = {}
+
+    async def get_context(self, file_path: Path) -> dict | None:
+        key = self._get_file_identity(file_path)
+        probe = self._probes.get(key)
+        if probe is None:
+            probe = asyncio.ensure_future(self._probe(key, file_path))
+            self._probes[key] = probe
+        else:
+            self._log.debug('Reusing ffprobe context of "%s"', file_path)
+        # One caller being cancelled must not cancel the probe for others.
+        return await asyncio.shield(probe)
+
+    async def _probe(self, key: _FileIdentity, file_path: Path) -> dict | None:
+        try:
+            context = await asyncio.to_thread(probe_media, file_path)
+            if context:
+                self._log.info('Probed "%s" in-process', file_path)
+                return context
+            return await GetFfprobeContextTask(
+                file_path, cancellation_token=self._cancellation_token
+            ).run()
+        except BaseException:
+            del self._probes[key]
+            raise
+
+    @staticmethod
+    def _get_file_identity(file_path: Path) -> _FileIdentity:
+        stat = file_path.stat()
+        return str(file_path), stat.st_ino, stat.st_size, stat.st_mtime_ns
@@ -0,0 +1,146 @@
+from pathlib import Path
+
+from yt_shared.schemas.media import DownMedia
+from yt_shared.utils.common import format_bytes
+from yt_shared.utils.file import file_size
+
+from worker.core.cancellation import CancellationToken
+from worker.core.tasks.encode import EncodeToH264Task
+from worker.core.tasks.ffprobe_service import FfprobeService
+from worker.enums import VideoCodecType
+
+
+class FitToSizeTask(EncodeToH264Task):
+    """Transcode video bigger than the upload size limit to fit it.
+
+    Video bitrate is computed from the duration and the size limit left after
+    audio, and x264 is constrained to it. When the bitrate is too low for a
+    resolution rung or the output still doesn't fit, the next lower rung is
+    tried. Rungs apply to the shorter side, so portrait videos are scaled alike.
+    """
+
+    _FIT_CMD = (
+        'ffmpeg -y -loglevel error -i "{filepath}" -map 0:V:0 -map "0:a?" '
+        '-vf scale={scale} -c:v libx264 -preset veryfast -pix_fmt yuv420p '
+        '-b:v {video_bitrate}k -maxrate {video_bitrate}k -bufsize {buffer_size}k '
+        '-c:a aac -b:a {audio_bitrate}k -ac 2 -movflags +faststart "{output}"'
+    )
+    # Shorter side and the lowest video bitrate in kbps acceptable for it.
+    _LADDER = ((1080, 1500), (720, 800), (480, 400), (360, 250), (240, 120))
+    _AUDIO_BITRATE = 128
+    # Room for container overhead and encoder overshoot.
+    _SIZE_MARGIN = 0.95
+
+    def __init__(
+        self,
+        media: DownMedia,
+        max_file_size: int,
+        probe_service: FfprobeService,
+        cancellation_token: CancellationToken | None = None,
+    ) -> None:
+        super().__init__(
+            media=media,
+            cmd_tpl=self._FIT_CMD,
+            probe_service=probe_service,
+            check_if_in_final_format=False,
+            cancellation_token=cancellation_token,
+        )
+        self._max_file_size = max_file_size
+
+    async def _run(self) -> None:
+        # Runs after the encode, which may have replaced the file.
+        self._file_path = self._video.current_filepath
+        size = self._video.current_file_size()
+        if size <= self._max_file_size:
+            return
+
+        probe_ctx = await self._probe_service.get_context(self._file_path)
+        if not probe_ctx:
+            self._log.warning('Can\'t fit "%s", failed to probe it', self._file_path)
+            return
+        duration = float(probe_ctx['format'].get('duration') or 0)
+        streams = probe_ctx['streams']
+        video_stream = next(
+            (s for s in streams if s['codec_type'] == VideoCodecType.VIDEO.value),
+            None,
+        )
+        if not duration or not video_stream:
+            self._log.warning('Can\'t fit "%s" of unknown duration', self._file_path)
+            return
+        has_audio = any(s['codec_type'] == VideoCodecType.AUDIO.value for s in streams)
+        self._log.info(
+            'Fitting "%s" of %s to %s',
+            self._file_path,
+            format_bytes(size),
+            format_bytes(self._max_file_size),
+        )
+        await self._fit(video_stream, duration, has_audio)
+
+    async def _fit(self, video_stream: dict, duration: float, has_audio: bool) -> None:
+        width, height = video_stream['width'], video_stream['height']
+        audio_bitrate = self._AUDIO_BITRATE if has_audio else 0
+        margin = self._SIZE_MARGIN
+        rungs = self._get_rungs(min(width, height))
+        for index, (side, min_bitrate) in enumerate(rungs):
+            total_bitrate = self._max_file_size * 8 * margin / duration / 1000
+            video_bitrate = int(total_bitrate) - audio_bitrate
+            if video_bitrate <= 0:
+                break
+            if video_bitrate < min_bitrate and index < len(rungs) - 1:
+                self._log.info(
+                    'Bitrate %dk is too low for %dp, trying lower', video_bitrate, side
+                )
+                continue
+
+            output = self._get_rung_path(side)
+            scale = f'-2:{side}' if width >= height else f'{side}:-2'
+            args = self._build_args(
+                self._CMD,
+                output=output,
+                scale=scale,
+                video_bitrate=video_bitrate,
+                buffer_size=video_bitrate * 2,
+                audio_bitrate=self._AUDIO_BITRATE,
+            )
+            await self._run_ffmpeg(args)
+
+            output_size = file_size(output)
+            if output_size <= self._max_file_size:
+                self._mark_as_fitted(output, side, width, height)
+                return
+            self._log.warning(
+                'Output of %dp at %dk is %s, still too big',
+                side,
+                video_bitrate,
+                format_bytes(output_size),
+            )
+            output.unlink()
+            margin *= self._max_file_size / output_size
+
+        self._log.warning(
+            'Failed to fit "%s" to %s',
+            self._file_path,
+            format_bytes(self._max_file_size),
+        )
+
+    def _get_rungs(self, source_side: int) -> list[tuple[int, int]]:
+        """Return rungs from the source resolution down to the lowest."""
+        source_side = source_side // 2 * 2
+        above = [rung for rung in self._LADDER if rung[0] >= source_side]
+        below = [rung for rung in self._LADDER if rung[0] < source_side]
+        min_bitrate = above[-1][1] if above else self._LADDER[0][1]
+        return [(source_side, min_bitrate), *below]
+
+    def _get_rung_path(self, side: int) -> Path:
+        stem = self._video.current_filename.rsplit('.', 1)[0]
+        return self._media.root_path / f'{stem}-{side}p.{self._EXT}'
+
+    def _mark_as_fitted(self, output: Path, side: int, width: int, height: int) -> None:
+        self._video.mark_as_converted(filepath=output)
+        self._video.fit_to_size_rung = side
+        scale = side / min(width, height)
+        self._video.width = round(width * scale / 2) * 2
+        self._video.height = round(height * scale / 2) * 2
+        self._log.info(
+            'Fitted "%s" to %s at %dp', output, format_bytes(file_size(output)), side
+        )
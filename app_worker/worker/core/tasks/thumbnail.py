@@ -3,11 +3,31 @@ from pathlib import Path
 from yt_shared.schemas.media import Video
 
 from worker.core.config import settings
+from worker.core.subprocess_runner import build_args
 from worker.core.tasks.abstract import AbstractFfBinaryTask
+from worker.enums import ProcessKind
 
 
 class MakeThumbnailTask(AbstractFfBinaryTask):
-    _CMD = 'ffmpeg -y -loglevel error -ss {time_point} -i "{filepath}" -vframes 1 -q:v 7 "{thumbpath}"'
+    """Generate Telegram video thumbnail from the keyframe nearest to time point.
+
+    Only keyframes are decoded and the one before the time point is taken, instead
+    of decoding all frames up to the time point. Output fits Telegram's thumbnail
+    limits.
+    """
+
+    _CMD = (
+        'ffmpeg -y -loglevel error -skip_frame nokey -noaccurate_seek '
+        '-ss {time_point} -i "{filepath}" -frames:v 1 '
+        '-vf "scale={max_side}:{max_side}:force_original_aspect_ratio=decrease" '
+        '-q:v {quality} "{thumbpath}"'
+    )
+    # Telegram thumbnail limits.
+    _MAX_SIDE = 320
+    _MAX_FILE_SIZE = 200 * 1024
+    # JPEG qscale values, the last one is used if thumbnail is still too big.
+    _QUALITIES = (5, 31)
+    _PROCESS_KIND = ProcessKind.THUMBNAIL
 
     def __init__(
         self, thumbnail_path: Path, *args, duration: float, video_ctx: Video, **kwargs
@@ -24,25 +44,42 @@ class MakeThumbnailTask(AbstractFfBinaryTask):
         return is_created
 
     async def _make_thumbnail(self) -> bool:
-        cmd = self._CMD.format(
+        for quality in self._QUALITIES:
+            if not await self._run_ffmpeg(quality):
+                return False
+            thumb_size = self._thumbnail_path.stat().st_size
+            if thumb_size <= self._MAX_FILE_SIZE:
+                return True
+            self._log.warning(
+                'Thumbnail "%s" is too big (%d bytes) at quality %d',
+                self._thumbnail_path,
+                thumb_size,
+                quality,
+            )
+        return False
+
+    async def _run_ffmpeg(self, quality: int) -> bool:
+        args = build_args(
+            self._CMD,
             filepath=self._file_path,
             time_point=self._get_thumb_time_point(),
+            max_side=self._MAX_SIDE,
+            quality=quality,
             thumbpath=self._thumbnail_path,
         )
-        self._log.info('Creating thumbnail with command "%s"', cmd)
-        proc = await self._run_proc(cmd)
-        if not proc:
+        self._log.info('Creating thumbnail with args %s', args)
+        result = await self._run_proc(args)
+        if not result:
             return False
 
-        stdout, stderr = await self._get_stdout_stderr(proc)
         self._log.info(
             'Process %s returncode: %d, stdout: %s, stderr: %s',
-            cmd,
-            proc.returncode,
-            stdout,
-            stderr,
+            result.cmd,
+            result.returncode,
+            result.stdout,
+            result.stderr,
         )
-        if proc.returncode:
+        if result.returncode or not self._thumbnail_path.is_file():
             self._log.error('Failed to make thumbnail for "%s"', self._file_path)
             return False
         return True
@@ -0,0 +1,91 @@
+import asyncio
+import time
+import uuid
+from pathlib import Path
+
+from yt_shared.db.session import get_db
+from yt_shared.enums import TaskStatus
+from yt_shared.repositories.task import TaskRepository
+from yt_shared.utils.file import list_files_human, remove_dir
+from yt_shared.utils.tasks.abstract import AbstractTask
+
+from worker.core.cancellation import cancellation_registry
+from worker.core.config import settings
+from worker.core.workspace import get_workspace_task_id, get_workspaces_root
+
+
+class WorkspaceJanitorTask(AbstractTask):
+    """Remove partial download workspaces which will never be resumed.
+
+    A workspace is removed when its task is finished, doesn't exist or when nothing
+    was written to it for `DOWNLOAD_WORKSPACE_MAX_AGE` seconds. Workspaces of tasks
+    processed by this worker are kept until they are stopped.
+    """
+
+    _SLEEP_TIME: int = 600
+    _FINISHED_STATUSES = frozenset(
+        (TaskStatus.DONE, TaskStatus.FAILED, TaskStatus.CANCELLED)
+    )
+
+    async def run(self) -> None:
+        await self._run()
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self._cleanup()
+            except Exception:
+                self._log.exception('Failed to clean up download workspaces')
+            await asyncio.sleep(self._SLEEP_TIME)
+
+    async def _cleanup(self) -> None:
+        workspaces = await asyncio.to_thread(self._find_workspaces)
+        if not workspaces:
+            return
+
+        async for db in get_db():
+            statuses = await TaskRepository(db=db).get_task_statuses(
+                ids=list(workspaces)
+            )
+
+        for task_id, path in workspaces.items():
+            # Row of the running task may be deleted before the task is stopped.
+            if cancellation_registry.is_tracked(task_id):
+                continue
+            # Files of an active download are renamed and removed concurrently.
+            try:
+                await self._cleanup_workspace(path, statuses.get(task_id))
+            except OSError:
+                self._log.exception('Failed to clean up workspace "%s"', path)
+
+    async def _cleanup_workspace(self, path: Path, status: TaskStatus | None) -> None:
+        if status is None or status in self._FINISHED_STATUSES:
+            reason = f'task status is {status}'
+        elif await asyncio.to_thread(self._is_expired, path):
+            reason = 'workspace expired'
+        else:
+            return
+        self._log.info(
+            'Removing download workspace "%s" (%s) with files %s',
+            path,
+            reason,
+            list_files_human(path),
+        )
+        await asyncio.to_thread(remove_dir, path)
+
+    @staticmethod
+    def _find_workspaces() -> dict[uuid.UUID, Path]:
+        workspaces: dict[uuid.UUID, Path] = {}
+        for path in get_workspaces_root().iterdir():
+            task_id = get_workspace_task_id(path)
+            if task_id and path.is_dir():
+                workspaces[task_id] = path
+        return workspaces
+
+    @staticmethod
+    def _is_expired(path: Path) -> bool:
+        # Directory mtime doesn't change while `.part` files are being written.
+        last_modified = max(
+            (p.stat().st_mtime for p in path.iterdir()), default=path.stat().st_mtime
+        )
+        return time.time() - last_modified > settings.DOWNLOAD_WORKSPACE_MAX_AGE
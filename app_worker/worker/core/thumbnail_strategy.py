@@ -0,0 +1,44 @@
+import logging
+
+from yt_shared.schemas.media import Video
+from yt_shared.utils.common import calculate_aspect_ratio
+
+
+class ThumbnailStrategy:
+    """Decide up front which thumbnail source is the cheapest.
+
+    yt-dlp downloads and converts the remote thumbnail only when it can be used,
+    i.e. its aspect ratio matches the video or isn't known before downloading.
+    Otherwise the download is skipped and the thumbnail is generated from the
+    video keyframe instead.
+    """
+
+    _log = logging.getLogger('ThumbnailStrategy')
+
+    @classmethod
+    def apply_to_download(cls, ytdl_params: dict, info: dict) -> None:
+        """Disable remote thumbnail download if it will be regenerated anyway."""
+        if not ytdl_params.get('writethumbnail') or cls._is_remote_usable(info):
+            return
+        cls._log.info('Skipping remote thumbnail of "%s", will generate', info['id'])
+        ytdl_params['writethumbnail'] = False
+
+    @staticmethod
+    def needs_generation(video: Video) -> bool:
+        video_ar = video.aspect_ratio
+        thumb_ar = video.thumb_aspect_ratio
+        return not video.thumb_path or all([video_ar, thumb_ar, video_ar != thumb_ar])
+
+    @staticmethod
+    def _is_remote_usable(info: dict) -> bool:
+        thumbnails = info.get('thumbnails')
+        if not thumbnails:
+            return False
+
+        # yt-dlp writes only the most preferred thumbnail, which is the last one.
+        thumb = thumbnails[-1]
+        sizes = (info.get('width'), info.get('height'))
+        thumb_sizes = (thumb.get('width'), thumb.get('height'))
+        if not all((*sizes, *thumb_sizes)):
+            return True
+        return calculate_aspect_ratio(*sizes) == calculate_aspect_ratio(*thumb_sizes)
@@ -0,0 +1,25 @@
+import uuid
+from pathlib import Path
+
+from worker.core.config import settings
+
+_WORKSPACE_PREFIX = 'task-'
+
+
+def get_workspaces_root() -> Path:
+    return settings.TMP_DOWNLOAD_ROOT_PATH / settings.TMP_DOWNLOAD_DIR
+
+
+def get_workspace_path(task_id: uuid.UUID) -> Path:
+    """Return persistent partial download directory of the task."""
+    return get_workspaces_root() / f'{_WORKSPACE_PREFIX}{task_id}'
+
+
+def get_workspace_task_id(path: Path) -> uuid.UUID | None:
+    """Return task id of the workspace path, `None` if path isn't a workspace."""
+    if not path.name.startswith(_WORKSPACE_PREFIX):
+        return None
+    try:
+        return uuid.UUID(path.name.removeprefix(_WORKSPACE_PREFIX))
+    except ValueError:
+        return None
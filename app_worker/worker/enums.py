@@ -13,3 +13,45 @@ class VideoCodecType(StrEnum):
 
     AUDIO = 'audio'
     VIDEO = 'video'
+
+
+class ProcessKind(StrEnum):
+    """Kind of child process with its own resource policy."""
+
+    PROBE = 'probe'
+    THUMBNAIL = 'thumbnail'
+    ENCODE = 'encode'
+    DOWNLOAD = 'download'
+
+
+class IoClass(StrEnum):
+    """Linux IO scheduling class of a process."""
+
+    BEST_EFFORT = 'BEST_EFFORT'
+    IDLE = 'IDLE'
+
+
+class ResourceClass(StrEnum):
+    """Resource mostly used by a post-processing step."""
+
+    CPU = 'cpu'
+    IO = 'io'
+
+
+class PostProcessArtifact(StrEnum):
+    """Result of a post-processing step other steps may depend on."""
+
+    PROBE = 'PROBE'
+    ENCODED_FILE = 'ENCODED_FILE'
+    FINAL_FILE = 'FINAL_FILE'
+    THUMBNAIL = 'THUMBNAIL'
+    STORAGE_COPY = 'STORAGE_COPY'
+
+
+class StepStatus(StrEnum):
+    """Outcome of a post-processing step."""
+
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+    SKIPPED = 'skipped'
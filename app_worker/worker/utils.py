@@ -1,3 +1,4 @@
+from functools import cache
 from pathlib import Path
 from typing import Final
 
@@ -8,9 +9,15 @@ _COOKIES_FILEPATH: Final[Path] = Path('/app/cookies/cookies.txt')
 _COOKIES_OPTION_NAME: Final[str] = '--cookies'
 
 
+@cache
+def _get_default_api_opts() -> dict:
+    """Return yt-dlp default API options. Must not be mutated."""
+    return yt_dlp.parse_options([]).ydl_opts
+
+
 def cli_to_api(opts: list) -> dict:
     """Convert yt-dlp CLI options to internal API ones."""
-    default = yt_dlp.parse_options([]).ydl_opts
+    default = _get_default_api_opts()
     diff = {
         k: v for k, v in yt_dlp.parse_options(opts).ydl_opts.items() if default[k] != v
     }
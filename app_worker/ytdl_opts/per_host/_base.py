@@ -1,12 +1,11 @@
 import logging
 from abc import abstractmethod
-from copy import deepcopy
 from pathlib import Path
 
 from pydantic import BaseModel, ConfigDict
 from yt_shared.enums import DownMediaType
 
-from worker.utils import cli_to_api
+from ytdl_opts.per_host._compiler import YtdlOptsCompiler
 
 try:
     from ytdl_opts.user import (
@@ -58,6 +57,10 @@ class AbstractHostConfig:
     ENCODE_AUDIO: bool | None = None
     ENCODE_VIDEO: bool | None = None
 
+    # Per worker download budget, `None` means unlimited.
+    MAX_CONCURRENT_DOWNLOADS: int | None = None
+    REQUESTS_PER_MINUTE: int | None = None
+
     KEEP_VIDEO_OPTION: str = '--keep-video'
 
     DEFAULT_YTDL_OPTS: tuple[str, ...] = DEFAULT_YTDL_OPTS
@@ -91,29 +94,34 @@ class AbstractHostConfig:
         pass
 
     def _build_ytdl_opts(self, media_type: DownMediaType, curr_tmp_dir: Path) -> dict:
+        return YtdlOptsCompiler.get_ytdl_opts(
+            host_cls=self.__class__, media_type=media_type, curr_tmp_dir=curr_tmp_dir
+        )
+
+    @classmethod
+    def build_cli_opts(cls, media_type: DownMediaType) -> list[str]:
+        """Build yt-dlp CLI options for the media type."""
+
         def _add_video_opts(ytdl_opts_: list[str]) -> None:
-            ytdl_opts_.extend(self.DEFAULT_VIDEO_YTDL_OPTS)
-            ytdl_opts_.extend(self._build_custom_ytdl_video_opts())
+            ytdl_opts_.extend(cls.DEFAULT_VIDEO_YTDL_OPTS)
+            ytdl_opts_.extend(cls._build_custom_ytdl_video_opts())
 
-        ytdl_opts = list(deepcopy(self.DEFAULT_YTDL_OPTS))
+        ytdl_opts = list(cls.DEFAULT_YTDL_OPTS)
 
         match media_type:
             case DownMediaType.AUDIO:
-                ytdl_opts.extend(self.AUDIO_YTDL_OPTS)
-                ytdl_opts.extend(self.AUDIO_FORMAT_YTDL_OPTS)
+                ytdl_opts.extend(cls.AUDIO_YTDL_OPTS)
+                ytdl_opts.extend(cls.AUDIO_FORMAT_YTDL_OPTS)
             case DownMediaType.VIDEO:
                 _add_video_opts(ytdl_opts)
             case DownMediaType.AUDIO_VIDEO:
-                ytdl_opts.extend(self.AUDIO_YTDL_OPTS)
+                ytdl_opts.extend(cls.AUDIO_YTDL_OPTS)
                 _add_video_opts(ytdl_opts)
-                ytdl_opts.append(self.KEEP_VIDEO_OPTION)
+                ytdl_opts.append(cls.KEEP_VIDEO_OPTION)
 
-        ytdl_opts = cli_to_api(ytdl_opts)
-        ytdl_opts['outtmpl']['default'] = str(
-            curr_tmp_dir / ytdl_opts['outtmpl']['default']
-        )
         return ytdl_opts
 
+    @classmethod
     @abstractmethod
-    def _build_custom_ytdl_video_opts(self) -> tuple[str, ...]:
+    def _build_custom_ytdl_video_opts(cls) -> tuple[str, ...]:
         pass
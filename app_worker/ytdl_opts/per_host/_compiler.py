@@ -0,0 +1,81 @@
+import json
+import logging
+from collections.abc import Iterable
+from copy import deepcopy
+from pathlib import Path
+from types import MappingProxyType
+from typing import TYPE_CHECKING, ClassVar
+
+from yt_shared.enums import DownMediaType
+
+from worker.utils import cli_to_api
+
+if TYPE_CHECKING:
+    from ytdl_opts.per_host._base import AbstractHostConfig
+
+type _CacheKey = tuple[type['AbstractHostConfig'], DownMediaType]
+
+
+class YtdlOptsCompiler:
+    """Compile host configs' yt-dlp CLI options to API options once per process.
+
+    Converting CLI options with `yt_dlp.parse_options` is pure CPU work which
+    doesn't depend on the task, so the result is cached per host config class and
+    media type. Only the output template is patched per task.
+    """
+
+    _CACHE: ClassVar[dict[_CacheKey, MappingProxyType]] = {}
+    _log = logging.getLogger('YtdlOptsCompiler')
+
+    _FORMAT_SELECTOR_OPTS: ClassVar[tuple[str, ...]] = (
+        'format',
+        'format_sort',
+        'format_sort_force',
+        'merge_output_format',
+        'final_ext',
+    )
+
+    @classmethod
+    def compile_all(cls, host_classes: Iterable[type['AbstractHostConfig']]) -> None:
+        for host_cls in host_classes:
+            for media_type in DownMediaType:
+                cls._get_compiled(host_cls=host_cls, media_type=media_type)
+        cls._log.info('Compiled %d yt-dlp option sets', len(cls._CACHE))
+
+    @classmethod
+    def get_ytdl_opts(
+        cls,
+        host_cls: type['AbstractHostConfig'],
+        media_type: DownMediaType,
+        curr_tmp_dir: Path,
+    ) -> dict:
+        """Return a mutable copy of compiled options with per-task output template."""
+        ytdl_opts = deepcopy(dict(cls._get_compiled(host_cls, media_type)))
+        ytdl_opts['outtmpl']['default'] = str(
+            curr_tmp_dir / ytdl_opts['outtmpl']['default']
+        )
+        return ytdl_opts
+
+    @classmethod
+    def get_format_selector(
+        cls, host_cls: type['AbstractHostConfig'], media_type: DownMediaType
+    ) -> str:
+        """Return serialized format selection options of the compiled options."""
+        compiled = cls._get_compiled(host_cls, media_type)
+        return json.dumps(
+            {opt: compiled.get(opt) for opt in cls._FORMAT_SELECTOR_OPTS},
+            sort_keys=True,
+            default=str,
+        )
+
+    @classmethod
+    def _get_compiled(
+        cls, host_cls: type['AbstractHostConfig'], media_type: DownMediaType
+    ) -> MappingProxyType:
+        key = (host_cls, media_type)
+        try:
+            return cls._CACHE[key]
+        except KeyError:
+            compiled = MappingProxyType(cli_to_api(host_cls.build_cli_opts(media_type)))
+            cls._CACHE[key] = compiled
+            return compiled
@@ -28,5 +28,6 @@ class DefaultHost(AbstractHostConfig, metaclass=HostConfRegistry):
             ytdl_opts=self._build_ytdl_opts(media_type, curr_tmp_dir),
         )
 
-    def _build_custom_ytdl_video_opts(self) -> tuple[str, ...]:
-        return self.DEFAULT_VIDEO_FORMAT_SORT_OPT
+    @classmethod
+    def _build_custom_ytdl_video_opts(cls) -> tuple[str, ...]:
+        return cls.DEFAULT_VIDEO_FORMAT_SORT_OPT
@@ -1,4 +1,5 @@
 from typing import ClassVar
+from urllib.parse import urlsplit
 
 from ytdl_opts.per_host._base import AbstractHostConfig
 
@@ -27,6 +28,11 @@ class HostConfRegistry(type):
     def get_host_to_cls_map(cls) -> dict[str | None, type[AbstractHostConfig]]:
         return cls.HOST_TO_CLS_MAP.copy()
 
+    @classmethod
+    def get_host_cls(cls, url: str) -> type[AbstractHostConfig]:
+        """Return host config class for URL, default one for unknown hosts."""
+        return cls.HOST_TO_CLS_MAP.get(urlsplit(url).netloc, cls.HOST_TO_CLS_MAP[None])
+
     @classmethod
     def _build_host_to_cls_map(
         cls, host_cls: type[AbstractHostConfig], hostnames: tuple[str, ...] | None
@@ -17,6 +17,8 @@ class FacebookHost(AbstractHostConfig, metaclass=HostConfRegistry):
     HOSTNAMES = FACEBOOK_HOSTS
     ENCODE_AUDIO = False
     ENCODE_VIDEO = settings.FACEBOOK_ENCODE_TO_H264
+    MAX_CONCURRENT_DOWNLOADS = 2
+    REQUESTS_PER_MINUTE = 30
 
     FFMPEG_AUDIO_OPTS = None
     # Facebook returns VP9+AAC in MP4 container for logged users and needs to be
@@ -35,5 +37,6 @@ class FacebookHost(AbstractHostConfig, metaclass=HostConfRegistry):
             ytdl_opts=self._build_ytdl_opts(media_type, curr_tmp_dir),
         )
 
-    def _build_custom_ytdl_video_opts(self) -> tuple[str, ...]:
-        return self.DEFAULT_VIDEO_FORMAT_SORT_OPT
+    @classmethod
+    def _build_custom_ytdl_video_opts(cls) -> tuple[str, ...]:
+        return cls.DEFAULT_VIDEO_FORMAT_SORT_OPT
@@ -17,6 +17,8 @@ class InstagramHost(AbstractHostConfig, metaclass=HostConfRegistry):
     HOSTNAMES = INSTAGRAM_HOSTS
     ENCODE_AUDIO = False
     ENCODE_VIDEO = settings.INSTAGRAM_ENCODE_TO_H264
+    MAX_CONCURRENT_DOWNLOADS = 1
+    REQUESTS_PER_MINUTE = 10
 
     FFMPEG_AUDIO_OPTS = None
     # Instagram returns VP9+AAC in MP4 container for logged users and needs to be
@@ -35,5 +37,6 @@ class InstagramHost(AbstractHostConfig, metaclass=HostConfRegistry):
             ytdl_opts=self._build_ytdl_opts(media_type, curr_tmp_dir),
         )
 
-    def _build_custom_ytdl_video_opts(self) -> tuple[str, ...]:
-        return self.DEFAULT_VIDEO_FORMAT_SORT_OPT
+    @classmethod
+    def _build_custom_ytdl_video_opts(cls) -> tuple[str, ...]:
+        return cls.DEFAULT_VIDEO_FORMAT_SORT_OPT
@@ -16,6 +16,8 @@ class TikTokHost(AbstractHostConfig, metaclass=HostConfRegistry):
     HOSTNAMES = TIKTOK_HOSTS
     ENCODE_AUDIO = False
     ENCODE_VIDEO = False
+    MAX_CONCURRENT_DOWNLOADS = 2
+    REQUESTS_PER_MINUTE = 20
 
     def build_config(
         self, media_type: DownMediaType, curr_tmp_dir: Path
@@ -29,5 +31,6 @@ class TikTokHost(AbstractHostConfig, metaclass=HostConfRegistry):
             ytdl_opts=self._build_ytdl_opts(media_type, curr_tmp_dir),
         )
 
-    def _build_custom_ytdl_video_opts(self) -> tuple[str, ...]:
-        return self.DEFAULT_VIDEO_FORMAT_SORT_OPT
+    @classmethod
+    def _build_custom_ytdl_video_opts(cls) -> tuple[str, ...]:
+        return cls.DEFAULT_VIDEO_FORMAT_SORT_OPT
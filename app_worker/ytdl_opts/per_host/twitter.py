@@ -16,6 +16,8 @@ class TwitterHost(AbstractHostConfig, metaclass=HostConfRegistry):
     HOSTNAMES = TWITTER_HOSTS
     ENCODE_AUDIO = False
     ENCODE_VIDEO = False
+    MAX_CONCURRENT_DOWNLOADS = 2
+    REQUESTS_PER_MINUTE = 30
 
     def build_config(
         self, media_type: DownMediaType, curr_tmp_dir: Path
@@ -29,5 +31,6 @@ class TwitterHost(AbstractHostConfig, metaclass=HostConfRegistry):
             ytdl_opts=self._build_ytdl_opts(media_type, curr_tmp_dir),
         )
 
-    def _build_custom_ytdl_video_opts(self) -> tuple[str, ...]:
+    @classmethod
+    def _build_custom_ytdl_video_opts(cls) -> tuple[str, ...]:
         return '--format-sort', 'res,proto:https,vcodec:h265,h264'
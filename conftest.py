@@ -0,0 +1,20 @@
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from dotenv import dotenv_values
+
+ENVS_PATH = Path(__file__).parent / 'envs'
+TMP_PATH = Path(tempfile.mkdtemp(prefix='yt_tests_'))
+
+# Settings are read on import, so the environment of the containers is set up
+# before test modules import the code, with paths moved to a temp dir.
+for _key, _value in dotenv_values(ENVS_PATH / 'common.env').items():
+    os.environ.setdefault(_key, _value)
+os.environ.setdefault('APPLICATION_NAME', 'yt_tests')
+os.environ.update(TMP_DOWNLOAD_ROOT_PATH=str(TMP_PATH / 'download'))
+
+
+def pytest_unconfigure() -> None:
+    shutil.rmtree(TMP_PATH, ignore_errors=True)
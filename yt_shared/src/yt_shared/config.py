@@ -44,6 +44,10 @@ class CommonSettings(BaseSettings):
     CONSUMER_NUMBER_OF_RETRY: PositiveInt = 2
     RESEND_DELAY_MS: PositiveInt = 60000
 
+    # Enable only once every consumer understands compressed messages.
+    RABBITMQ_COMPRESSION_ENABLED: bool = False
+    RABBITMQ_COMPRESSION_MIN_SIZE: PositiveInt = 4096
+
     LOG_LEVEL: str
     REDIS_HOST: str
 
@@ -13,6 +13,7 @@ class TaskStatus(StrChoiceEnum):
     PROCESSING = 'PROCESSING'
     FAILED = 'FAILED'
     DONE = 'DONE'
+    CANCELLED = 'CANCELLED'
 
 
 class TaskSource(StrChoiceEnum):
@@ -24,6 +25,7 @@ class RabbitPayloadType(StrChoiceEnum):
     DOWNLOAD_ERROR = 'DOWNLOAD_ERROR'
     GENERAL_ERROR = 'GENERAL_ERROR'
     SUCCESS = 'SUCCESS'
+    CANCEL_TASK = 'CANCEL_TASK'
 
 
 class TelegramChatType(StrChoiceEnum):
@@ -56,3 +58,40 @@ class YtdlpReleaseChannelType(StrChoiceEnum):
     STABLE = 'STABLE'
     NIGHTLY = 'NIGHTLY'
     MASTER = 'MASTER'
+
+
+class FileTransferMethod(StrChoiceEnum):
+    RENAME = 'RENAME'
+    REFLINK = 'REFLINK'
+    HARDLINK = 'HARDLINK'
+    COPY_FILE_RANGE = 'COPY_FILE_RANGE'
+    SENDFILE = 'SENDFILE'
+    COPY = 'COPY'
+
+
+class FsyncPolicy(StrChoiceEnum):
+    """When transferred file data is flushed to disk.
+
+    1. Never, leave it to the OS
+    2. Flush the destination file
+    3. Flush the destination file and its directory entry
+    """
+
+    NONE = 'NONE'
+    FILE = 'FILE'
+    FILE_AND_DIR = 'FILE_AND_DIR'
+
+
+class EncodeDecision(StrChoiceEnum):
+    """How video was brought to the final format.
+
+    1. Already in the final format, left as is
+    2. Stream copied to MP4 with moov box in front
+    3. Video stream copied, audio transcoded to AAC
+    4. Fully re-encoded with the host encode options
+    """
+
+    NOOP = 'NOOP'
+    REMUX = 'REMUX'
+    TRANSCODE_AUDIO = 'TRANSCODE_AUDIO'
+    FULL_ENCODE = 'FULL_ENCODE'
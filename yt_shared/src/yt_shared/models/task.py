@@ -29,6 +29,12 @@ class Task(Base, Timestamp):
     from_user_id = sa.Column(sa.BigInteger, nullable=True)
     message_id = sa.Column(sa.BigInteger, nullable=True)
     error = sa.Column(sa.String, nullable=True)
+    parent_id = sa.Column(
+        UUIDType(binary=False),
+        sa.ForeignKey('task.id', ondelete='CASCADE'),
+        nullable=True,
+        index=True,
+    )
     yt_dlp_version = sa.Column(
         sa.String, nullable=True, default=select(YTDLP.current_version)
     )
@@ -53,6 +59,8 @@ class File(Base, Timestamp):
     duration = sa.Column(sa.Integer, nullable=True)
     width = sa.Column(sa.Integer, nullable=True)
     height = sa.Column(sa.Integer, nullable=True)
+    encode_duration = sa.Column(sa.Float, nullable=True)
+    encode_speed = sa.Column(sa.Float, nullable=True)
     meta = sa.Column(JSONB, nullable=True)
     task_id = sa.Column(
         UUIDType(binary=False),
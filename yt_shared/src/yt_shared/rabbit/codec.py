@@ -0,0 +1,59 @@
+"""Encoding of RabbitMQ message bodies.
+
+Bodies above the size threshold are compressed with zstd and marked with the
+`content_encoding` property. Messages without it are plain JSON, so consumers
+read messages of publishers which don't compress.
+"""
+
+import logging
+
+from yt_shared.config import settings
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+CONTENT_TYPE_JSON = 'application/json'
+CONTENT_ENCODING_ZSTD = 'zstd'
+
+_COMPRESSION_LEVEL = 3
+
+_log = logging.getLogger(__name__)
+
+if settings.RABBITMQ_COMPRESSION_ENABLED and not zstandard:
+    _log.warning('"zstandard" is not installed, messages are sent uncompressed')
+
+
+class BodyDecodeError(Exception):
+    """Message body can't be restored from its content encoding."""
+
+
+class UnsupportedContentEncodingError(BodyDecodeError):
+    pass
+
+
+def encode_body(body: bytes) -> tuple[bytes, str | None]:
+    """Return body to publish and its content encoding, if compressed."""
+    if (
+        zstandard
+        and settings.RABBITMQ_COMPRESSION_ENABLED
+        and len(body) >= settings.RABBITMQ_COMPRESSION_MIN_SIZE
+    ):
+        compressed = zstandard.ZstdCompressor(level=_COMPRESSION_LEVEL).compress(body)
+        return compressed, CONTENT_ENCODING_ZSTD
+    return body, None
+
+
+def decode_body(body: bytes, content_encoding: str | None) -> bytes:
+    """Return original body of the message published with the content encoding."""
+    if not content_encoding:
+        return body
+    if content_encoding == CONTENT_ENCODING_ZSTD and zstandard:
+        try:
+            return zstandard.ZstdDecompressor().decompress(body)
+        except zstandard.ZstdError as err:
+            raise BodyDecodeError(f'Failed to decompress message body: {err}') from err
+    raise UnsupportedContentEncodingError(
+        f'Unsupported message content encoding "{content_encoding}"'
+    )
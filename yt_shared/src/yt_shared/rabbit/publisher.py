@@ -1,18 +1,28 @@
+import asyncio
 import logging
+from collections.abc import Sequence
 
 import aio_pika
 from aiormq.abc import ConfirmationFrameType
 from pamqp.commands import Basic
 
 from yt_shared.rabbit import get_rabbitmq
+from yt_shared.rabbit.codec import CONTENT_TYPE_JSON, encode_body
 from yt_shared.rabbit.rabbit_config import (
+    CONTROL_EXCHANGE,
+    DEAD_LETTER_EXCHANGE,
+    DEAD_LETTER_QUEUE,
     ERROR_EXCHANGE,
     ERROR_QUEUE,
     INPUT_EXCHANGE,
     INPUT_QUEUE,
+    RETRY_COUNT_HEADER,
+    RETRY_EXCHANGE,
     SUCCESS_EXCHANGE,
     SUCCESS_QUEUE,
+    get_retry_queue,
 )
+from yt_shared.schemas.control import CancelTaskPayload
 from yt_shared.schemas.error import ErrorDownloadGeneralPayload, ErrorDownloadPayload
 from yt_shared.schemas.media import InbMediaPayload
 from yt_shared.schemas.success import SuccessDownloadPayload
@@ -20,6 +30,9 @@ from yt_shared.utils.common import Singleton
 
 
 class RmqPublisher(metaclass=Singleton):
+    # Number of publishes pipelined before awaiting their confirms.
+    _PUBLISH_BATCH_SIZE = 100
+
     def __init__(self) -> None:
         self._log = logging.getLogger(self.__class__.__name__)
         self._rabbit_mq = get_rabbitmq()
@@ -28,19 +41,85 @@ class RmqPublisher(metaclass=Singleton):
     def _is_sent(confirm: ConfirmationFrameType | None) -> bool:
         return isinstance(confirm, Basic.Ack)
 
+    @staticmethod
+    def _make_message(body: bytes, **kwargs) -> aio_pika.Message:
+        body, content_encoding = encode_body(body)
+        return aio_pika.Message(
+            body=body,
+            content_type=CONTENT_TYPE_JSON,
+            content_encoding=content_encoding,
+            **kwargs,
+        )
+
     async def send_for_download(self, media_payload: InbMediaPayload) -> bool:
-        message = aio_pika.Message(body=media_payload.model_dump_json().encode())
-        exchange = self._rabbit_mq.exchanges[INPUT_EXCHANGE]
+        message = self._make_message(media_payload.model_dump_json().encode())
+        exchange = self._rabbit_mq.get_publish_exchange(INPUT_EXCHANGE)
         confirm = await exchange.publish(
             message, routing_key=INPUT_QUEUE, mandatory=True
         )
         return self._is_sent(confirm)
 
+    async def send_many_for_download(
+        self, media_payloads: Sequence[InbMediaPayload]
+    ) -> list[bool]:
+        messages = [
+            self._make_message(payload.model_dump_json().encode())
+            for payload in media_payloads
+        ]
+        return await self.publish_many(INPUT_EXCHANGE, INPUT_QUEUE, messages)
+
+    async def publish_many(
+        self,
+        exchange_name: str,
+        routing_key: str,
+        messages: Sequence[aio_pika.Message],
+    ) -> list[bool]:
+        """Publish messages in order, returning whether each one was confirmed.
+
+        Messages of a batch are published on one channel without waiting for
+        each confirm, so a batch costs a single round trip to the broker.
+        """
+        results: list[bool] = []
+        for start in range(0, len(messages), self._PUBLISH_BATCH_SIZE):
+            exchange = self._rabbit_mq.get_publish_exchange(exchange_name)
+            confirms = await asyncio.gather(
+                *(
+                    exchange.publish(message, routing_key=routing_key, mandatory=True)
+                    for message in messages[start : start + self._PUBLISH_BATCH_SIZE]
+                ),
+                return_exceptions=True,
+            )
+            for confirm in confirms:
+                if isinstance(confirm, BaseException):
+                    self._log.error('Failed to publish message: %r', confirm)
+                results.append(self._is_sent(confirm))
+        return results
+
+    async def send_for_retry(self, body: bytes, retry_count: int) -> bool:
+        """Park failed inbound message in the delay queue of the retry."""
+        message = self._make_message(body, headers={RETRY_COUNT_HEADER: retry_count})
+        exchange = self._rabbit_mq.get_publish_exchange(RETRY_EXCHANGE)
+        confirm = await exchange.publish(
+            message, routing_key=get_retry_queue(retry_count), mandatory=True
+        )
+        return self._is_sent(confirm)
+
+    async def send_to_dead_letter(self, body: bytes, retry_count: int) -> bool:
+        """Keep inbound message which failed all attempts for inspection."""
+        message = self._make_message(body, headers={RETRY_COUNT_HEADER: retry_count})
+        exchange = self._rabbit_mq.get_publish_exchange(DEAD_LETTER_EXCHANGE)
+        confirm = await exchange.publish(
+            message, routing_key=DEAD_LETTER_QUEUE, mandatory=True
+        )
+        return self._is_sent(confirm)
+
     async def send_download_error(
         self, error_payload: ErrorDownloadPayload | ErrorDownloadGeneralPayload
     ) -> bool:
-        err_exchange = self._rabbit_mq.exchanges[ERROR_EXCHANGE]
-        err_message = aio_pika.Message(body=error_payload.model_dump_json().encode())
+        err_exchange = self._rabbit_mq.get_publish_exchange(ERROR_EXCHANGE)
+        err_message = self._make_message(
+            error_payload.model_dump_json().encode(), type=error_payload.type.value
+        )
         confirm = await err_exchange.publish(
             err_message, routing_key=ERROR_QUEUE, mandatory=True
         )
@@ -49,9 +128,19 @@ class RmqPublisher(metaclass=Singleton):
     async def send_download_finished(
         self, success_payload: SuccessDownloadPayload
     ) -> bool:
-        message = aio_pika.Message(body=success_payload.model_dump_json().encode())
-        exchange = self._rabbit_mq.exchanges[SUCCESS_EXCHANGE]
+        body = success_payload.model_dump_json(exclude={'media': {'meta'}})
+        message = self._make_message(body.encode(), type=success_payload.type.value)
+        exchange = self._rabbit_mq.get_publish_exchange(SUCCESS_EXCHANGE)
         confirm = await exchange.publish(
             message, routing_key=SUCCESS_QUEUE, mandatory=True
         )
         return self._is_sent(confirm)
+
+    async def send_cancel_task(self, cancel_payload: CancelTaskPayload) -> bool:
+        message = self._make_message(
+            cancel_payload.model_dump_json().encode(), type=cancel_payload.type.value
+        )
+        exchange = self._rabbit_mq.get_publish_exchange(CONTROL_EXCHANGE)
+        # Not mandatory: no worker may be running to receive it.
+        confirm = await exchange.publish(message, routing_key='')
+        return self._is_sent(confirm)
@@ -15,6 +15,7 @@ if TYPE_CHECKING:
 class RabbitMQ:
     MAX_UNACK_MESSAGES_PER_CHANNEL: int = 10
     RABBITMQ_RECONNECT_INTERVAL: int = 2
+    PUBLISH_CHANNEL_POOL_SIZE: int = 4
 
     def __init__(self) -> None:
         self._log = logging.getLogger(self.__class__.__name__)
@@ -24,12 +25,16 @@ class RabbitMQ:
         self.channel: RobustChannel | None = None
         self.exchanges: dict[str, AbstractRobustExchange] = {}
         self.queues: dict[str, AbstractRobustQueue] = {}
+        self._publish_channels: list[RobustChannel] = []
+        self._publish_exchanges: list[dict[str, AbstractRobustExchange]] = []
+        self._publish_count = 0
 
     async def register(self) -> None:
         await self._set_connection()
         await self._set_channel()
         await self._set_exchanges()
         await self._set_queues()
+        await self._set_publish_pool()
 
     async def _set_connection(self) -> None:
         self.connection = await aio_pika.connect_robust(
@@ -56,8 +61,28 @@ class RabbitMQ:
                 await queue.bind(self.exchanges[_settings['exchange_name']])
             self.queues[queue_name] = queue
 
+    async def _set_publish_pool(self) -> None:
+        """Open confirm-mode channels for publishing, apart from the consumers."""
+        for _ in range(self.PUBLISH_CHANNEL_POOL_SIZE):
+            channel = await self.connection.channel(publisher_confirms=True)
+            self._publish_channels.append(channel)
+            self._publish_exchanges.append(
+                {
+                    name: await channel.get_exchange(name, ensure=False)
+                    for name in self.exchanges
+                }
+            )
+
+    def get_publish_exchange(self, name: str) -> 'AbstractRobustExchange':
+        """Return exchange on the next channel of the publish pool."""
+        index = self._publish_count % len(self._publish_exchanges)
+        self._publish_count += 1
+        return self._publish_exchanges[index][name]
+
     async def close(self) -> None:
         self._log.debug('[RabbitMQ] Closing connection')
+        for channel in self._publish_channels:
+            await channel.close()
         await self.channel.close()
         await self.connection.close()
         self._log.debug('[RabbitMQ] Connection closed')
@@ -2,21 +2,63 @@ from typing import Any
 
 from aio_pika import ExchangeType
 
+from yt_shared.config import settings
+
 INPUT_QUEUE = 'input.q'
+# Inbound messages which failed all processing attempts.
+DEAD_LETTER_QUEUE = 'input.dead.q'
 ERROR_QUEUE = 'error.q'
 SUCCESS_QUEUE = 'success.q'
 
 INPUT_EXCHANGE = 'input.dx'
 SUCCESS_EXCHANGE = 'success.dx'
 ERROR_EXCHANGE = 'error.dx'
+# Fanout exchange consumed by every worker through its own exclusive queue.
+CONTROL_EXCHANGE = 'control.fx'
+# Routes failed inbound messages to the delay queue of the next attempt.
+RETRY_EXCHANGE = 'input.retry.dx'
+DEAD_LETTER_EXCHANGE = 'input.dead.dx'
+
+# Number of processing attempts already failed for the inbound message.
+RETRY_COUNT_HEADER = 'x-retry-count'
+
+
+def get_retry_queue(retry_count: int) -> str:
+    """Return name of the delay queue holding the message before the retry."""
+    return f'input.retry.{retry_count}.q'
+
+
+def _get_retry_queues() -> list[dict[str, Any]]:
+    """Return delay queues, one per retry with exponentially growing delay.
+
+    Expired messages are dead-lettered back to the input queue. Queue arguments
+    can't be changed on redeclaration, so changing the delay settings requires
+    deleting the retry queues first.
+    """
+    return [
+        {
+            'name': get_retry_queue(retry_count),
+            'auto_delete': False,
+            'durable': True,
+            'arguments': {
+                'x-message-ttl': settings.RESEND_DELAY_MS * 2 ** (retry_count - 1),
+                'x-dead-letter-exchange': INPUT_EXCHANGE,
+                'x-dead-letter-routing-key': INPUT_QUEUE,
+            },
+        }
+        for retry_count in range(1, settings.CONSUMER_NUMBER_OF_RETRY + 1)
+    ]
 
 
 def get_rabbit_config() -> dict[str, list[dict[str, Any]]]:
+    retry_queues = _get_retry_queues()
     return {
         'queues': [
             {'name': INPUT_QUEUE, 'auto_delete': False, 'durable': True},
             {'name': ERROR_QUEUE, 'auto_delete': False, 'durable': True},
             {'name': SUCCESS_QUEUE, 'auto_delete': False, 'durable': True},
+            {'name': DEAD_LETTER_QUEUE, 'auto_delete': False, 'durable': True},
+            *retry_queues,
         ],
         'exchanges': [
             {
@@ -37,10 +79,33 @@ def get_rabbit_config() -> dict[str, list[dict[str, Any]]]:
                 'durable': True,
                 'type': ExchangeType.DIRECT.value,
             },
+            {
+                'name': CONTROL_EXCHANGE,
+                'auto_delete': False,
+                'durable': True,
+                'type': ExchangeType.FANOUT.value,
+            },
+            {
+                'name': RETRY_EXCHANGE,
+                'auto_delete': False,
+                'durable': True,
+                'type': ExchangeType.DIRECT.value,
+            },
+            {
+                'name': DEAD_LETTER_EXCHANGE,
+                'auto_delete': False,
+                'durable': True,
+                'type': ExchangeType.DIRECT.value,
+            },
         ],
         'queue_bindings': {
             INPUT_QUEUE: [{'exchange_name': INPUT_EXCHANGE}],
             ERROR_QUEUE: [{'exchange_name': ERROR_EXCHANGE}],
             SUCCESS_QUEUE: [{'exchange_name': SUCCESS_EXCHANGE}],
+            DEAD_LETTER_QUEUE: [{'exchange_name': DEAD_LETTER_EXCHANGE}],
+            **{
+                queue['name']: [{'exchange_name': RETRY_EXCHANGE}]
+                for queue in retry_queues
+            },
         },
     }
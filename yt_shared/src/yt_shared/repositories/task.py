@@ -4,8 +4,18 @@ from collections.abc import Sequence
 from typing import TYPE_CHECKING
 from uuid import UUID
 
-from sqlalchemy import Column, Row, delete, desc, distinct, func, insert, select
-from sqlalchemy.exc import NoResultFound
+from sqlalchemy import (
+    Column,
+    Row,
+    delete,
+    desc,
+    distinct,
+    func,
+    insert,
+    select,
+    update,
+)
+from sqlalchemy.exc import IntegrityError, NoResultFound
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 from yt_shared.constants import SHARED_ASYNC_LOCK
@@ -19,6 +29,8 @@ if TYPE_CHECKING:
 
 
 class TaskRepository:
+    _UNFINISHED_STATUSES = (TaskStatus.PENDING, TaskStatus.PROCESSING)
+
     def __init__(self, db: AsyncSession) -> None:
         self._log = logging.getLogger(self.__class__.__name__)
         self._db = db
@@ -35,17 +47,26 @@ class TaskRepository:
             return await self._create_task(media_payload)
 
     async def _create_task(self, media_payload: InbMediaPayload) -> Task:
-        task = Task(
+        task = self._build_task(media_payload)
+        self._db.add(task)
+        await self._db.commit()
+        return task
+
+    async def create_tasks(self, media_payloads: Sequence[InbMediaPayload]) -> None:
+        self._db.add_all([self._build_task(payload) for payload in media_payloads])
+        await self._db.commit()
+
+    @staticmethod
+    def _build_task(media_payload: InbMediaPayload) -> Task:
+        return Task(
             id=media_payload.id,
             url=media_payload.url,
             source=media_payload.source,
             from_user_id=media_payload.from_user_id,
             message_id=media_payload.message_id,
             added_at=media_payload.added_at,
+            parent_id=media_payload.parent_id,
         )
-        self._db.add(task)
-        await self._db.commit()
-        return task
 
     async def save_file_cache(self, file_id: str | UUID, cache: CacheSchema) -> None:
         stmt = insert(Cache).values(
@@ -71,30 +92,116 @@ class TaskRepository:
             file.width = media.width
             file.height = media.height
             file.thumb_name = media.thumb_name
+            file.encode_duration = media.encode_duration
+            file.encode_speed = media.encode_speed
 
         self._db.add(file)
         async with SHARED_ASYNC_LOCK:
-            await self._db.flush([file])
+            try:
+                await self._db.flush([file])
+            except IntegrityError:
+                # Task was deleted while being processed.
+                await self._db.rollback()
+                raise NoResultFound from None
         return file
 
     async def save_as_done(self, task: Task) -> None:
-        task.status = TaskStatus.DONE
-        await self._db.commit()
+        await self._save_status(task, status=TaskStatus.DONE)
 
     async def save_as_processing(self, task: Task) -> None:
-        task.status = TaskStatus.PROCESSING
-        await self._db.commit()
+        await self._save_status(task, status=TaskStatus.PROCESSING)
 
     async def save_as_failed(self, task: Task, error_message: str) -> None:
-        task.status = TaskStatus.FAILED
-        task.error = error_message
+        await self._save_status(task, status=TaskStatus.FAILED, error=error_message)
+
+    async def save_as_cancelled(self, task: Task) -> None:
+        await self._save_status(task, status=TaskStatus.CANCELLED)
+
+    async def _save_status(self, task: Task, **values: str | TaskStatus) -> None:
+        """Update task row without ORM flush, it may be deleted by the API meanwhile.
+
+        Raises `NoResultFound` if task doesn't exist anymore.
+        """
+        stmt = update(Task).where(Task.id == task.id).values(**values)
+        res: CursorResult = await self._db.execute(stmt)
+        if not res.rowcount:
+            raise NoResultFound
+        await self._update_parent_status(task)
+        await self._db.commit()
+
+    async def cancel_task(self, id_: str | uuid.UUID) -> list[uuid.UUID]:
+        """Mark unfinished task and its unfinished children as cancelled.
+
+        Returns ids of cancelled tasks. Raises `NoResultFound` if task doesn't exist.
+        """
+        task = (await self._db.execute(select(Task).filter_by(id=id_))).scalar_one()
+        stmt = (
+            update(Task)
+            .where(
+                ((Task.id == id_) | (Task.parent_id == id_))
+                & Task.status.in_(self._UNFINISHED_STATUSES)
+            )
+            .values(status=TaskStatus.CANCELLED)
+            .returning(Task.id)
+        )
+        cancelled_ids = list((await self._db.execute(stmt)).scalars().all())
+        # Pending child is never picked up by a worker, finish its parent here.
+        if cancelled_ids:
+            await self._update_parent_status(task)
         await self._db.commit()
+        return cancelled_ids
+
+    async def _update_parent_status(self, task: Task) -> None:
+        """Finish parent task of the finished child task if all children finished.
+
+        Parent row is locked so concurrently finishing children are counted
+        one after another and the last one always sees all others finished.
+        """
+        if not task.parent_id:
+            return
+
+        await self._db.flush([task])
+        stmt = (
+            select(Task)
+            .filter(Task.id == task.parent_id)
+            .with_for_update()
+            .execution_options(populate_existing=True)
+        )
+        parent = (await self._db.execute(stmt)).scalar_one_or_none()
+        if not parent or parent.status not in self._UNFINISHED_STATUSES:
+            return
+
+        count_ = func.count(Task.id)
+        stmt = select(
+            count_.label('total'),
+            count_.filter(Task.status.in_(self._UNFINISHED_STATUSES)).label(
+                'unfinished'
+            ),
+            count_.filter(Task.status == TaskStatus.FAILED).label('failed'),
+        ).filter(Task.parent_id == parent.id)
+        total, unfinished, failed = (await self._db.execute(stmt)).one()
+        if unfinished:
+            return
+
+        self._log.info(
+            'All %d children of task "%s" finished, %d failed', total, parent.id, failed
+        )
+        parent.status = TaskStatus.FAILED if failed == total else TaskStatus.DONE
+        if failed:
+            parent.error = f'{failed} of {total} playlist entries failed'
+
+    async def get_task_statuses(
+        self, ids: Sequence[uuid.UUID]
+    ) -> dict[uuid.UUID, TaskStatus]:
+        stmt = select(Task.id, Task.status).filter(Task.id.in_(ids))
+        result = await self._db.execute(stmt)
+        return dict(result.all())
 
     async def purge_user_tasks(self, user_ids: Sequence[int]) -> None:
         await self._db.execute(
             delete(Task).where(
                 ((Task.from_user_id.in_(user_ids)) | (Task.from_user_id.is_(None)))
-                & ~(Task.status.in_([TaskStatus.PENDING, TaskStatus.PROCESSING]))
+                & ~(Task.status.in_(self._UNFINISHED_STATUSES))
             )
         )
         await self._db.commit()
@@ -137,6 +244,8 @@ class TaskRepository:
             File.width,
             File.height,
             File.title,
+            File.encode_duration,
+            File.encode_speed,
         ]
         if include_meta:
             load_cols.append(File.meta)
@@ -180,7 +289,7 @@ class TaskRepository:
 
     async def get_stats(
         self,
-    ) -> Row[tuple[int, int, int, int, int, int]]:
+    ) -> Row[tuple[int, int, int, int, int, int, int]]:
         count_ = func.count(Task.id)
         stmt = select(
             count_.label('total'),
@@ -189,6 +298,7 @@ class TaskRepository:
             count_.filter(Task.status == TaskStatus.PROCESSING).label('processing'),
             count_.filter(Task.status == TaskStatus.FAILED).label('failed'),
             count_.filter(Task.status == TaskStatus.DONE).label('done'),
+            count_.filter(Task.status == TaskStatus.CANCELLED).label('cancelled'),
         )
         result = await self._db.execute(stmt)
         return result.one()
@@ -0,0 +1,12 @@
+import uuid
+from typing import Literal
+
+from yt_shared.enums import RabbitPayloadType
+from yt_shared.schemas.base import StrictBaseRabbitPayloadModel
+
+
+class CancelTaskPayload(StrictBaseRabbitPayloadModel):
+    """Broadcast to all workers to stop processing of the tasks."""
+
+    type: Literal[RabbitPayloadType.CANCEL_TASK] = RabbitPayloadType.CANCEL_TASK
+    task_ids: list[uuid.UUID]
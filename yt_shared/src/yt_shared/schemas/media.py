@@ -7,7 +7,13 @@ from typing import Annotated, Literal, Self
 from PIL import Image
 from pydantic import ConfigDict, DirectoryPath, Field, FilePath, model_validator
 
-from yt_shared.enums import DownMediaType, MediaFileType, TaskSource, TelegramChatType
+from yt_shared.enums import (
+    DownMediaType,
+    EncodeDecision,
+    MediaFileType,
+    TaskSource,
+    TelegramChatType,
+)
 from yt_shared.schemas.base import StrictRealBaseModel
 from yt_shared.utils.common import calculate_aspect_ratio, format_bytes
 from yt_shared.utils.file import file_size
@@ -31,6 +37,9 @@ class InbMediaPayload(StrictRealBaseModel):
     download_media_type: DownMediaType
     custom_filename: str | None
     automatic_extension: bool
+    max_file_size: int | None = None
+    fan_out_playlist: bool = False
+    parent_id: uuid.UUID | None = None
     added_at: datetime = Field(default_factory=lambda: datetime.now(UTC))
 
 
@@ -104,6 +113,10 @@ class Video(BaseMedia):
     width: int | float | None = None
     height: int | float | None = None
     thumb_path: Annotated[FilePath, Field(strict=False)] | None = None
+    encode_duration: float | None = None
+    encode_speed: float | None = None
+    encode_decision: Annotated[EncodeDecision, Field(strict=False)] | None = None
+    fit_to_size_rung: int | None = None
 
     @model_validator(mode='after')
     def set_thumb_name(self) -> Self:
@@ -136,7 +149,9 @@ class DownMedia(StrictRealBaseModel):
 
     media_type: Annotated[DownMediaType, Field(strict=False)]
     root_path: Annotated[DirectoryPath, Field(strict=False)]
-    meta: dict
+    # Sanitized yt-dlp info, often megabytes. Saved with the file to the database
+    # and left out of the success payload, fetch it by `orm_file_id` instead.
+    meta: dict = Field(default_factory=dict)
 
     @model_validator(mode='after')
     def validate_media(self) -> Self:
@@ -16,3 +16,5 @@ class URL(StrictRealBaseModel):
     ack_message_id: int
     save_to_storage: bool
     download_media_type: DownMediaType
+    max_file_size: int | None = None
+    fan_out_playlist: bool = False
@@ -1,10 +1,49 @@
+import errno
+import fcntl
 import logging
+import os
 import shutil
-from collections.abc import Iterable
+import time
+from collections.abc import Callable, Iterable, Iterator
+from contextlib import contextmanager
 from pathlib import Path
+from typing import BinaryIO
 
+from yt_shared.enums import FileTransferMethod, FsyncPolicy
+from yt_shared.schemas.base import StrictRealBaseModel
 from yt_shared.utils.common import format_bytes
 
+_log = logging.getLogger(__name__)
+
+_TRANSFER_CHUNK_SIZE = 64 * 1024 * 1024
+
+# Errors meaning the transfer method isn't supported for the given paths.
+_UNSUPPORTED_ERRNOS = frozenset(
+    (
+        errno.EXDEV,
+        errno.EOPNOTSUPP,
+        errno.ENOTSUP,
+        errno.EINVAL,
+        errno.ENOSYS,
+        errno.ENOTTY,
+        errno.EPERM,
+        errno.EMLINK,
+    )
+)
+
+
+class FileTransferResult(StrictRealBaseModel):
+    """Result of a file transfer made by `transfer_file`."""
+
+    method: FileTransferMethod
+    size: int
+    duration: float
+
+    @property
+    def rate(self) -> float:
+        """Transfer rate in bytes per second."""
+        return self.size / self.duration if self.duration else float('inf')
+
 
 def file_cleanup(file_paths: Iterable[Path], log: logging.Logger | None = None) -> None:
     """Delete the specified files if they exist.
@@ -57,3 +96,151 @@ def list_files_human(path: Path) -> dict[str, str]:
     return {
         filepath.name: format_bytes(file_size(filepath)) for filepath in path.iterdir()
     }
+
+
+def transfer_file(
+    src: Path,
+    dst: Path,
+    move: bool = False,
+    allow_hardlink: bool = True,
+    fsync: FsyncPolicy = FsyncPolicy.NONE,
+) -> FileTransferResult:
+    """Copy or move a file using the cheapest method the filesystems support.
+
+    Methods are tried in order: rename (only when moving), reflink (FICLONE),
+    hardlink, then in-kernel copy with `copy_file_range` or `sendfile` in large
+    chunks. Data never passes through Python unless all of them are unsupported.
+    Existing destination file is never overwritten, whichever method is used.
+
+    Args:
+        src (Path): The path of the source file.
+        dst (Path): The destination file path or an existing directory.
+        move (bool): Whether to remove the source file after transfer.
+        allow_hardlink (bool): Whether destination may share the inode with source.
+        fsync (FsyncPolicy): Whether to flush transferred data to disk.
+
+    Returns:
+        FileTransferResult: The method used, transferred bytes and duration.
+
+    Raises:
+        FileExistsError: If the destination file already exists.
+
+    """
+    if dst.is_dir():
+        dst = dst / src.name
+    # Rename replaces the destination, other methods create it exclusively.
+    if dst.exists():
+        raise FileExistsError(errno.EEXIST, os.strerror(errno.EEXIST), str(dst))
+    size = file_size(src)
+    start = time.perf_counter()
+
+    if move and _try_transfer(os.rename, src, dst):
+        method = FileTransferMethod.RENAME
+    elif _try_transfer(_reflink, src, dst):
+        method = FileTransferMethod.REFLINK
+    elif allow_hardlink and _try_transfer(os.link, src, dst):
+        method = FileTransferMethod.HARDLINK
+    else:
+        method = _copy_in_kernel(src, dst)
+        shutil.copystat(src, dst)
+
+    if move and method is not FileTransferMethod.RENAME:
+        src.unlink()
+    _fsync(dst, policy=fsync)
+
+    result = FileTransferResult(
+        method=method, size=size, duration=time.perf_counter() - start
+    )
+    _log.info(
+        'Transferred "%s" to "%s" with %s: %s in %.3fs (%s/s)',
+        src,
+        dst,
+        result.method,
+        format_bytes(result.size),
+        result.duration,
+        format_bytes(result.rate) if result.duration else 'inf',
+    )
+    return result
+
+
+def _try_transfer(func: Callable[[Path, Path], None], src: Path, dst: Path) -> bool:
+    try:
+        func(src, dst)
+    except OSError as err:
+        if err.errno not in _UNSUPPORTED_ERRNOS:
+            raise
+        _log.debug('%s of "%s" is not supported: %s', func.__name__, src, err)
+        return False
+    return True
+
+
+def _reflink(src: Path, dst: Path) -> None:
+    with src.open('rb') as src_fd, _create_exclusive(dst) as dst_fd:
+        fcntl.ioctl(dst_fd.fileno(), fcntl.FICLONE, src_fd.fileno())
+    shutil.copystat(src, dst)
+
+
+def _copy_in_kernel(src: Path, dst: Path) -> FileTransferMethod:
+    """Copy file data in kernel space, falling back to a regular copy."""
+    with src.open('rb') as src_fd, _create_exclusive(dst) as dst_fd:
+        src_no, dst_no = src_fd.fileno(), dst_fd.fileno()
+        for method, func in (
+            (FileTransferMethod.COPY_FILE_RANGE, _copy_file_range),
+            (FileTransferMethod.SENDFILE, _sendfile),
+        ):
+            try:
+                _copy_chunks(func, src_no, dst_no)
+            except OSError as err:
+                if err.errno not in _UNSUPPORTED_ERRNOS:
+                    raise
+                _log.debug('%s of "%s" is not supported: %s', method, src, err)
+                os.lseek(src_no, 0, os.SEEK_SET)
+                os.ftruncate(dst_no, 0)
+                os.lseek(dst_no, 0, os.SEEK_SET)
+            else:
+                return method
+
+        shutil.copyfileobj(src_fd, dst_fd, length=_TRANSFER_CHUNK_SIZE)
+        return FileTransferMethod.COPY
+
+
+@contextmanager
+def _create_exclusive(path: Path) -> Iterator[BinaryIO]:
+    """Open new file for writing, remove it if writing fails."""
+    with path.open('xb') as fd:
+        try:
+            yield fd
+        except BaseException:
+            fd.close()
+            path.unlink()
+            raise
+
+
+def _copy_file_range(src_no: int, dst_no: int, count: int) -> int:
+    # Missing when Python was built against a libc without it.
+    if not hasattr(os, 'copy_file_range'):
+        raise OSError(errno.ENOSYS, 'copy_file_range is not available')
+    return os.copy_file_range(src_no, dst_no, count)
+
+
+def _sendfile(src_no: int, dst_no: int, count: int) -> int:
+    return os.sendfile(dst_no, src_no, None, count)
+
+
+def _copy_chunks(
+    func: Callable[[int, int, int], int], src_no: int, dst_no: int
+) -> None:
+    while func(src_no, dst_no, _TRANSFER_CHUNK_SIZE):
+        pass
+
+
+def _fsync(path: Path, policy: FsyncPolicy) -> None:
+    if policy is FsyncPolicy.NONE:
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+    if policy is FsyncPolicy.FILE_AND_DIR:
+        _fsync(path.parent, policy=FsyncPolicy.FILE)
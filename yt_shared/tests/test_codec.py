@@ -0,0 +1,71 @@
+import json
+
+import pytest
+from yt_shared.config import settings
+from yt_shared.rabbit import codec
+from yt_shared.rabbit.codec import (
+    CONTENT_ENCODING_ZSTD,
+    BodyDecodeError,
+    UnsupportedContentEncodingError,
+    decode_body,
+    encode_body,
+)
+
+_MIN_SIZE = 1024
+
+
+@pytest.fixture(autouse=True)
+def compression(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'RABBITMQ_COMPRESSION_ENABLED', True)
+    monkeypatch.setattr(settings, 'RABBITMQ_COMPRESSION_MIN_SIZE', _MIN_SIZE)
+
+
+def make_body(size: int) -> bytes:
+    body = json.dumps({'formats': ['https://example.com/video.mp4'] * size}).encode()
+    return body[:size]
+
+
+def test_body_above_threshold_is_compressed_and_restored() -> None:
+    body = make_body(_MIN_SIZE)
+
+    encoded, content_encoding = encode_body(body)
+
+    assert content_encoding == CONTENT_ENCODING_ZSTD
+    assert len(encoded) < len(body)
+    assert decode_body(encoded, content_encoding) == body
+
+
+def test_body_below_threshold_is_sent_as_is() -> None:
+    body = make_body(_MIN_SIZE - 1)
+
+    assert encode_body(body) == (body, None)
+    assert decode_body(body, None) == body
+
+
+def test_compression_disabled(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(settings, 'RABBITMQ_COMPRESSION_ENABLED', False)
+    body = make_body(_MIN_SIZE * 10)
+
+    assert encode_body(body) == (body, None)
+
+
+def test_zstandard_not_installed(monkeypatch: pytest.MonkeyPatch) -> None:
+    body = make_body(_MIN_SIZE)
+    encoded, content_encoding = encode_body(body)
+    monkeypatch.setattr(codec, 'zstandard', None)
+
+    assert encode_body(body) == (body, None)
+    with pytest.raises(UnsupportedContentEncodingError):
+        decode_body(encoded, content_encoding)
+
+
+def test_unknown_content_encoding_is_rejected() -> None:
+    with pytest.raises(UnsupportedContentEncodingError):
+        decode_body(b'body', 'gzip')
+
+
+def test_corrupted_body_is_rejected() -> None:
+    encoded, content_encoding = encode_body(make_body(_MIN_SIZE))
+
+    with pytest.raises(BodyDecodeError):
+        decode_body(encoded[:-10], content_encoding)
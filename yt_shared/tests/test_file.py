@@ -0,0 +1,168 @@
+import errno
+import os
+from pathlib import Path
+
+import pytest
+from yt_shared.enums import FileTransferMethod
+from yt_shared.utils import file as file_utils
+from yt_shared.utils.file import transfer_file
+
+_DATA = b'media' * 1000
+
+
+def raise_errno(code: int) -> None:
+    raise OSError(code, os.strerror(code))
+
+
+@pytest.fixture
+def src(tmp_path: Path) -> Path:
+    path = tmp_path / 'src.mp4'
+    path.write_bytes(_DATA)
+    return path
+
+
+@pytest.fixture(autouse=True)
+def no_reflink(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Most test filesystems can't reflink, make it consistently unsupported."""
+    monkeypatch.setattr(
+        file_utils.fcntl, 'ioctl', lambda *_: raise_errno(errno.EOPNOTSUPP)
+    )
+
+
+def test_move_renames_on_same_filesystem(src: Path, tmp_path: Path) -> None:
+    result = transfer_file(src, tmp_path / 'dst.mp4', move=True)
+
+    assert result.method is FileTransferMethod.RENAME
+    assert result.size == len(_DATA)
+    assert (tmp_path / 'dst.mp4').read_bytes() == _DATA
+    assert not src.exists()
+
+
+def test_move_across_filesystems_copies_and_removes_source(
+    src: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(os, 'rename', lambda *_: raise_errno(errno.EXDEV))
+
+    result = transfer_file(src, tmp_path / 'dst.mp4', move=True)
+
+    assert result.method is FileTransferMethod.HARDLINK
+    assert (tmp_path / 'dst.mp4').read_bytes() == _DATA
+    assert not src.exists()
+
+
+def test_copy_hardlinks_into_directory(src: Path, tmp_path: Path) -> None:
+    dst_dir = tmp_path / 'dst'
+    dst_dir.mkdir()
+
+    result = transfer_file(src, dst_dir)
+
+    assert result.method is FileTransferMethod.HARDLINK
+    assert (dst_dir / src.name).stat().st_ino == src.stat().st_ino
+    assert src.exists()
+
+
+def test_reflink_is_preferred_to_hardlink(
+    src: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    def fake_reflink(src: Path, dst: Path) -> None:
+        dst.write_bytes(src.read_bytes())
+
+    monkeypatch.setattr(file_utils, '_reflink', fake_reflink)
+
+    result = transfer_file(src, tmp_path / 'dst.mp4')
+
+    assert result.method is FileTransferMethod.REFLINK
+
+
+@pytest.mark.parametrize(
+    ('unsupported', 'expected_method'),
+    [
+        pytest.param(
+            (),
+            FileTransferMethod.COPY_FILE_RANGE,
+            marks=pytest.mark.skipif(
+                not hasattr(os, 'copy_file_range'),
+                reason='Python is built without copy_file_range',
+            ),
+        ),
+        (('copy_file_range',), FileTransferMethod.SENDFILE),
+        (('copy_file_range', 'sendfile'), FileTransferMethod.COPY),
+    ],
+)
+def test_copy_falls_back_to_supported_method(
+    src: Path,
+    tmp_path: Path,
+    monkeypatch: pytest.MonkeyPatch,
+    unsupported: tuple[str, ...],
+    expected_method: FileTransferMethod,
+) -> None:
+    for func_name in unsupported:
+        monkeypatch.setattr(
+            os, func_name, lambda *_: raise_errno(errno.ENOSYS), raising=False
+        )
+    dst = tmp_path / 'dst.mp4'
+
+    result = transfer_file(src, dst, allow_hardlink=False)
+
+    assert result.method is expected_method
+    assert dst.read_bytes() == _DATA
+    assert dst.stat().st_ino != src.stat().st_ino
+
+
+def test_unexpected_error_is_raised(
+    src: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(os, 'link', lambda *_: raise_errno(errno.EACCES))
+
+    with pytest.raises(PermissionError):
+        transfer_file(src, tmp_path / 'dst.mp4')
+
+
+@pytest.mark.parametrize(
+    ('move', 'allow_hardlink'),
+    [
+        pytest.param(True, True, id='rename'),
+        pytest.param(False, True, id='hardlink'),
+        pytest.param(False, False, id='copy'),
+    ],
+)
+def test_existing_destination_is_kept(
+    src: Path, tmp_path: Path, move: bool, allow_hardlink: bool
+) -> None:
+    dst = tmp_path / 'dst.mp4'
+    dst.write_bytes(b'existing')
+
+    with pytest.raises(FileExistsError):
+        transfer_file(src, dst, move=move, allow_hardlink=allow_hardlink)
+
+    assert dst.read_bytes() == b'existing'
+    assert src.read_bytes() == _DATA
+
+
+def test_failed_copy_removes_created_destination(
+    src: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(file_utils, '_copy_chunks', lambda *_: raise_errno(errno.EIO))
+    dst = tmp_path / 'dst.mp4'
+
+    with pytest.raises(OSError, match='Input/output error'):
+        transfer_file(src, dst, allow_hardlink=False)
+
+    assert not dst.exists()
+
+
+def test_destination_created_concurrently_is_not_overwritten(
+    src: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    dst = tmp_path / 'dst.mp4'
+
+    def link(src: Path, dst: Path) -> None:  # noqa: ARG001
+        dst.write_bytes(b'concurrent')
+        raise_errno(errno.EEXIST)
+
+    monkeypatch.setattr(os, 'link', link)
+
+    with pytest.raises(FileExistsError):
+        transfer_file(src, dst)
+
+    assert dst.read_bytes() == b'concurrent'